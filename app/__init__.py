@@ -1,10 +1,11 @@
 from pathlib import Path
 import importlib.metadata as _meta
-from flask import Flask
+from flask import Flask, Response, g, request
 from .config import Config
 import logging
 import os
 import sys
+import time
 
 def configure_logging():
     """Configure application-wide logging"""
@@ -28,6 +29,50 @@ def configure_logging():
     logger.info(f"Logging configured at {log_level} level")
     return logger
 
+def preload_backends():
+    """
+    Import the model, chart and report backends now instead of on first use.
+
+    Run in the gunicorn master with ``preload_app`` so forked workers share
+    the imported modules rather than each paying for them on a request.
+    """
+    import importlib
+    from . import models
+    loaded = models.preload()
+    for module in ('scipy.signal', 'app.visualize.plotly_charts', 'app.reports.pdf_report',
+                   'app.reports.pdf_native'):
+        importlib.import_module(module)
+    return loaded
+
+def install_instrumentation(app):
+    """
+    Time every request into ``http_request_seconds`` and, when
+    ``PROFILE_DIR`` is set, save a cProfile dump of requests that ask for
+    one with ``?profile=1`` or an ``X-Profile: 1`` header.
+    """
+    from .utils import metrics, start_profile, dump_profile
+    logger = logging.getLogger(__name__)
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+        if Config.PROFILE_DIR and (request.args.get('profile') == '1' or request.headers.get('X-Profile') == '1'):
+            g.profiler = start_profile()
+
+    @app.after_request
+    def record_request(response):
+        started = g.pop('request_started', None)
+        if started is not None:
+            metrics.observe('http_request_seconds', time.perf_counter() - started,
+                            endpoint=request.endpoint or 'unmatched', method=request.method,
+                            status=response.status_code)
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            path = dump_profile(profiler, Config.PROFILE_DIR, request.endpoint or 'unmatched')
+            logger.info(f"Saved request profile to {path}")
+            response.headers['X-Profile-Path'] = os.path.basename(path)
+        return response
+
 def create_app():
     # Configure logging first
     logger = configure_logging()
@@ -39,9 +84,16 @@ def create_app():
     
     logger.info("Initializing Flask application")
     
+    if Config.PRELOAD_BACKENDS:
+        loaded = preload_backends()
+        logger.info(f"Preloaded model backends: {', '.join(loaded)}")
+    
     # Register blueprints
     from .web.routes import bp as web_bp
+    from .web.api import bp as api_bp
     app.register_blueprint(web_bp)
+    app.register_blueprint(api_bp)
+    install_instrumentation(app)
     
     @app.get("/ping")
     def ping():
@@ -50,8 +102,23 @@ def create_app():
             "version": _meta.version("Flask"),
             "status": "ok"
         }
+    
+    @app.get("/metrics")
+    def prometheus_metrics():
+        from .utils import metrics
+        return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
         
     logger.info("Flask application initialization complete")
     return app
 
-app = create_app()
+_app = None
+
+def __getattr__(name):
+    # ``app.app`` is built on first access so that importing any submodule
+    # (a pool worker, a test, the CLI) does not construct the Flask app
+    global _app
+    if name == 'app':
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
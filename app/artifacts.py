@@ -0,0 +1,91 @@
+import logging
+import os
+import tempfile
+import time
+
+from .utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactStore:
+    """
+    Generated files (PDF reports, CSV and Excel exports) stored by content key.
+
+    A key names everything the file is built from, so an existing file is
+    always current and can be served as is. Files are written to a temp file
+    and renamed into place, the least recently served ones are deleted once
+    the store exceeds ``max_bytes``, and temp files left behind by a crashed
+    writer are removed after ``stale_after`` seconds.
+    """
+
+    TMP_MARK = '.tmp.'
+
+    def __init__(self, root, max_bytes=512 * 1024 * 1024, stale_after=3600):
+        self.root = str(root)
+        self.max_bytes = max_bytes
+        self.stale_after = stale_after
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, key, ext):
+        return os.path.join(self.root, f"{key}.{ext}")
+
+    def get(self, key, ext):
+        """Path of the stored file, or None. Serving it counts as a use for eviction."""
+        path = self.path(key, ext)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, ext, write):
+        """Store the file ``write(path)`` creates and return its final path."""
+        # Keep the real extension last; some writers pick the format from it
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=f"{self.TMP_MARK}{ext}")
+        os.close(fd)
+        try:
+            write(tmp)
+            os.replace(tmp, self.path(key, ext))
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        self._evict()
+        return self.path(key, ext)
+
+    def get_or_create(self, key, ext, write):
+        """Return the stored file for ``key``, creating it with ``write(path)`` on a miss."""
+        path = self.get(key, ext)
+        metrics.inc('cache_lookups_total', cache='artifacts', result='miss' if path is None else 'hit')
+        if path is None:
+            logger.info(f"Building {ext} artifact {key[:12]}")
+            path = self.put(key, ext, write)
+        return path
+
+    def _evict(self):
+        now = time.time()
+        files = []
+        with os.scandir(self.root) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                stat = entry.stat()
+                if self.TMP_MARK in entry.name:
+                    if now - stat.st_mtime > self.stale_after:
+                        _unlink(entry.path)
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            _unlink(path)
+            total -= size
+
+
+def _unlink(path):
+    # Another worker may have removed it first
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,191 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from .utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(*parts) -> str:
+    """Build a stable cache key from JSON-serialisable parts."""
+    raw = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Pickled result cache in a SQLite file shared by every worker process.
+
+    Entries expire ``ttl`` seconds after they were written and the least
+    recently read entries are evicted once the stored values exceed
+    ``max_bytes``. A connection is opened per call so the cache is safe to
+    use from gunicorn workers forked after it was created.
+    """
+
+    def __init__(self, path, ttl=6 * 3600, max_bytes=256 * 1024 * 1024, name=None):
+        self.path = str(path)
+        self.name = name
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                ' key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,'
+                ' created REAL NOT NULL, accessed REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)')
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute('SELECT value FROM entries WHERE key = ? AND created > ?',
+                               (key, now - self.ttl)).fetchone()
+            if row is None:
+                self.misses += 1
+                _count_lookup(self.name, 'miss')
+                return default
+            conn.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, key))
+        self.hits += 1
+        _count_lookup(self.name, 'hit')
+        return pickle.loads(row[0])
+
+    def set(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            logger.warning(f"Not caching {len(blob)} byte result larger than the cache")
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)',
+                         (key, sqlite3.Binary(blob), len(blob), now, now))
+            self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        conn.execute('DELETE FROM entries WHERE created <= ?', (now - self.ttl,))
+        conn.execute(
+            'DELETE FROM entries WHERE key IN ('
+            ' SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed DESC, key) AS total'
+            ' FROM entries) WHERE total > ?)', (self.max_bytes,)
+        )
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for ``key``, computing and storing it on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM entries')
+
+
+def nbytes(value) -> int:
+    """Approximate in-memory size of a cached value."""
+    if hasattr(value, 'memory_usage'):
+        usage = value.memory_usage(index=True, deep=True)
+        return int(usage.sum() if hasattr(usage, 'sum') else usage)
+    if hasattr(value, 'nbytes'):
+        return int(value.nbytes)
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class MemoryLRU:
+    """
+    In-process LRU cache bounded by the total size of its values.
+
+    Unlike ``functools.lru_cache`` it evicts by bytes rather than by entry
+    count and expires entries ``ttl`` seconds after they were stored (None
+    keeps them until evicted). Cached values are shared, not copied, so
+    callers must not modify them. A ``name`` reports lookups and size to
+    ``utils.metrics``.
+    """
+
+    def __init__(self, max_bytes, ttl=None, name=None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None, count_miss=True):
+        """Cached value for ``key``; ``count_miss=False`` for probes that fall back to another key."""
+        with self._lock:
+            entry = self._entries.get(key)
+            hit = entry is not None and not self._expired(entry)
+            if hit:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += count_miss
+        if hit or count_miss:
+            _count_lookup(self.name, 'hit' if hit else 'miss')
+        return entry[0] if hit else default
+
+    def set(self, key, value, size=None):
+        size = nbytes(value) if size is None else size
+        if size > self.max_bytes:
+            logger.warning(f"Not caching {size} byte value larger than the cache")
+            return
+        with self._lock:
+            self._discard(key)
+            self._entries[key] = (value, size, time.monotonic())
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                self._discard(next(iter(self._entries)))
+                self.evictions += 1
+        if self.name:
+            metrics.set_gauge('cache_bytes', self.bytes, cache=self.name)
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for ``key``, computing and storing it on a miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {'entries': len(self._entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else None}
+
+    def _expired(self, entry):
+        return self.ttl is not None and time.monotonic() - entry[2] > self.ttl
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+
+
+def _count_lookup(cache, result):
+    if cache:
+        metrics.inc('cache_lookups_total', cache=cache, result=result)
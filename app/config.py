@@ -8,6 +8,118 @@ class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret")
     CACHE_TYPE = "simple"
     
+    # Root directory for on-disk caches shared by all worker processes
+    CACHE_ROOT = os.environ.get("CACHE_ROOT", str(BASE_DIR / "app" / "data" / "cache"))
+    
+    # Persistent price history store and how long (seconds) stored bars are
+    # served before asking the data provider for newer ones
+    PRICE_STORE_DIR = os.environ.get("PRICE_STORE_DIR", os.path.join(CACHE_ROOT, "prices"))
+    PRICE_STORE_MAX_AGE = int(os.environ.get("PRICE_STORE_MAX_AGE", 15 * 60))
+    
+    # Forecast results shared across workers, evicted by age and total size
+    FORECAST_CACHE_PATH = os.environ.get("FORECAST_CACHE_PATH", os.path.join(CACHE_ROOT, "forecasts.sqlite"))
+    FORECAST_CACHE_TTL = int(os.environ.get("FORECAST_CACHE_TTL", 6 * 3600))
+    FORECAST_CACHE_MAX_BYTES = int(os.environ.get("FORECAST_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+    
+    # Fitted Prophet models kept per ticker for reuse and warm starts
+    PROPHET_MODEL_DIR = os.environ.get("PROPHET_MODEL_DIR", os.path.join(CACHE_ROOT, "models"))
+    
+    # Background forecast jobs: state database, pool size per worker and the
+    # age (seconds) after which an unfinished job is reported as failed
+    JOB_DB_PATH = os.environ.get("JOB_DB_PATH", os.path.join(CACHE_ROOT, "jobs.sqlite"))
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+    JOB_TIMEOUT = int(os.environ.get("JOB_TIMEOUT", 600))
+    
+    # Batch forecasting API: pool size per worker (0 = all cores) and the
+    # largest accepted ticker list
+    BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", 0))
+    BATCH_MAX_TICKERS = int(os.environ.get("BATCH_MAX_TICKERS", 1000))
+    
+    # ARIMA order search: process pool size (0 = all cores) and how long the
+    # order chosen for a ticker is reused before searching again
+    ARIMA_SEARCH_WORKERS = int(os.environ.get("ARIMA_SEARCH_WORKERS", 0))
+    ARIMA_ORDER_CACHE_PATH = os.environ.get("ARIMA_ORDER_CACHE_PATH", os.path.join(CACHE_ROOT, "arima_orders.sqlite"))
+    ARIMA_ORDER_TTL = int(os.environ.get("ARIMA_ORDER_TTL", 7 * 24 * 3600))
+    
+    # Dashboard charts: most history points sent per chart and how they are
+    # picked ("lttb" keeps the shape, "minmax" keeps every bucket's extremes)
+    CHART_MAX_POINTS = int(os.environ.get("CHART_MAX_POINTS", 1000))
+    CHART_DOWNSAMPLE = os.environ.get("CHART_DOWNSAMPLE", "lttb")
+    
+    # PDF reports: "matplotlib" draws them in process, "wkhtmltopdf" renders
+    # the HTML template in a wkhtmltopdf subprocess
+    PDF_BACKEND = os.environ.get("PDF_BACKEND", "matplotlib")
+    
+    # Generated PDF/CSV/Excel downloads kept for reuse, bounded in total size
+    ARTIFACT_DIR = os.environ.get("ARTIFACT_DIR", os.path.join(CACHE_ROOT, "artifacts"))
+    ARTIFACT_MAX_BYTES = int(os.environ.get("ARTIFACT_MAX_BYTES", 512 * 1024 * 1024))
+    
+    # Price histories kept in memory per worker: total size bound and the
+    # dtype prices are stored as ("float32" halves the footprint)
+    HISTORY_CACHE_MAX_BYTES = int(os.environ.get("HISTORY_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+    HISTORY_DTYPE = os.environ.get("HISTORY_DTYPE", "float32")
+    
+    # Price data providers tried in order ("yahoo", "alphavantage", "fallback"
+    # for synthetic offline data) and their request budgets per minute
+    DATA_PROVIDERS = os.environ.get("DATA_PROVIDERS", "yahoo,alphavantage")
+    YAHOO_RATE_PER_MINUTE = int(os.environ.get("YAHOO_RATE_PER_MINUTE", 120))
+    ALPHA_VANTAGE_API_KEY = os.environ.get("ALPHA_VANTAGE_API_KEY", "")
+    ALPHA_VANTAGE_BASE_URL = os.environ.get("ALPHA_VANTAGE_BASE_URL", "https://www.alphavantage.co/query")
+    ALPHA_VANTAGE_RATE_PER_MINUTE = int(os.environ.get("ALPHA_VANTAGE_RATE_PER_MINUTE", 5))
+    
+    # Shared HTTP session for data providers: pooled connections per host,
+    # timeout (seconds), retries and the first backoff delay (seconds)
+    HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", 10))
+    HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 10))
+    HTTP_RETRIES = int(os.environ.get("HTTP_RETRIES", 3))
+    HTTP_BACKOFF = float(os.environ.get("HTTP_BACKOFF", 0.5))
+    
+    # Metrics: directory where every process leaves its values for /metrics
+    # ("" keeps them per process), and where ?profile=1 requests save cProfile
+    # stats (profiling is off while it is unset)
+    METRICS_DIR = os.environ.get("METRICS_DIR", os.path.join(CACHE_ROOT, "metrics"))
+    PROFILE_DIR = os.environ.get("PROFILE_DIR", "")
+    
+    # Monte Carlo scenarios: paths simulated when a request does not say,
+    # the most accepted, and the working memory (bytes) per chunk of paths
+    SIM_DEFAULT_PATHS = int(os.environ.get("SIM_DEFAULT_PATHS", 10000))
+    SIM_MAX_PATHS = int(os.environ.get("SIM_MAX_PATHS", 100000))
+    SIM_CHUNK_BYTES = int(os.environ.get("SIM_CHUNK_BYTES", 32 * 1024 * 1024))
+    
+    # Prophet forecast intervals: simulated draws per prediction, or with
+    # PROPHET_FAST=1 none at all and normal-approximation intervals instead
+    PROPHET_UNCERTAINTY_SAMPLES = int(os.environ.get("PROPHET_UNCERTAINTY_SAMPLES", 1000))
+    PROPHET_FAST = os.environ.get("PROPHET_FAST", "0").lower() in ("1", "true", "yes")
+    
+    # Screener: tickers it covers (empty = every ticker in the price store)
+    # and how often (seconds) it looks for newly stored bars
+    SCREENER_TICKERS = [t.strip() for t in os.environ.get("SCREENER_TICKERS", "").split(",") if t.strip()]
+    SCREENER_REFRESH_SECONDS = int(os.environ.get("SCREENER_REFRESH_SECONDS", 60))
+    
+    # Scheduled cache warming: watchlist entries ("AAPL:10,MSFT", higher
+    # priority first) from WATCHLIST and/or a file, the forecasts to warm,
+    # the weekday time after the close to run at, pool size and run log
+    WATCHLIST = os.environ.get("WATCHLIST", "")
+    WATCHLIST_FILE = os.environ.get("WATCHLIST_FILE", "")
+    WARM_HORIZONS = os.environ.get("WARM_HORIZONS", "30")
+    WARM_MODELS = os.environ.get("WARM_MODELS", "prophet")
+    SCHEDULER_RUN_AT = os.environ.get("SCHEDULER_RUN_AT", "16:30")
+    SCHEDULER_TIMEZONE = os.environ.get("SCHEDULER_TIMEZONE", "America/New_York")
+    SCHEDULER_WORKERS = int(os.environ.get("SCHEDULER_WORKERS", 2))
+    SCHEDULER_DB_PATH = os.environ.get("SCHEDULER_DB_PATH", os.path.join(CACHE_ROOT, "scheduler.sqlite"))
+    
+    # Bar intervals: the intraday bars downloaded and stored (longer intraday
+    # intervals are rolled up from them, weekly and monthly ones from daily
+    # bars), how many days back providers serve them, and the intervals
+    # offered in the UI
+    INTRADAY_BASE_INTERVAL = os.environ.get("INTRADAY_BASE_INTERVAL", "5m")
+    INTRADAY_MAX_DAYS = int(os.environ.get("INTRADAY_MAX_DAYS", 59))
+    INTERVALS = [i.strip() for i in os.environ.get("INTERVALS", "5m,15m,1h,1d,1wk,1mo").split(",") if i.strip()]
+    
+    # Import model, chart and report backends at startup (gunicorn master)
+    # instead of on the first request that needs them
+    PRELOAD_BACKENDS = os.environ.get("PRELOAD_BACKENDS", "0").lower() in ("1", "true", "yes")
+    
     # Set default wkhtmltopdf path based on OS
     if platform.system() == "Darwin":  # macOS
         # Common Homebrew installation paths
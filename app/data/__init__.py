@@ -1 +1 @@
-from .loader import fetch_price_history
+from .loader import fetch_price_history, fetch_price_histories
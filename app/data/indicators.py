@@ -1,4 +1,7 @@
+import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
 def sma(series: pd.Series, window: int = 20) -> pd.Series:
     return series.rolling(window).mean()
 def ema(series: pd.Series, window: int = 20) -> pd.Series:
@@ -15,3 +18,198 @@ def macd(series: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9):
     macd_line = fast_ema - slow_ema
     signal_line = ema(macd_line, signal)
     return macd_line.to_frame("macd").join(signal_line.to_frame("signal"))
+
+# Bars ``compute_indicators`` needs for its latest values: the longest window
+# is 50 bars, and after 300 bars an EMA's dependence on its seed is below 1e-8
+LOOKBACK = 300
+
+# ---------------------------------------------------------------------------
+# Vectorised indicator engine
+#
+# The functions below work on float64 NumPy arrays with time along the last
+# axis, so one call handles a single series of shape (dates,) or a whole
+# universe of shape (tickers, dates). Leading NaNs (shorter histories in a
+# universe matrix) are allowed; after the first valid value inputs are
+# expected to be gap-free. Results match the pandas versions above.
+# ---------------------------------------------------------------------------
+# Trading periods used to annualise volatility of daily bars
+PERIODS_PER_YEAR = 252
+
+def _pad(values, window, shape):
+    out = np.full(shape, np.nan)
+    out[..., window - 1:] = values
+    return out
+
+def _rolling(x, window, reduce):
+    x = np.asarray(x, dtype=np.float64)
+    if x.shape[-1] < window:
+        return np.full(x.shape, np.nan)
+    return _pad(reduce(sliding_window_view(x, window, axis=-1)), window, x.shape)
+
+def rolling_mean(x, window):
+    """Trailing mean over ``window`` values, NaN until the window is full."""
+    x = np.asarray(x, dtype=np.float64)
+    nan = np.isnan(x)
+    csum = np.cumsum(np.where(nan, 0.0, x), axis=-1)
+    ncount = np.cumsum(nan, axis=-1)
+    zero = np.zeros(x.shape[:-1] + (1,))
+    csum = np.concatenate([zero, csum], axis=-1)
+    ncount = np.concatenate([zero, ncount], axis=-1)
+    sums = csum[..., window:] - csum[..., :-window]
+    gaps = ncount[..., window:] - ncount[..., :-window]
+    return _pad(np.where(gaps > 0, np.nan, sums / window), window, x.shape)
+
+def rolling_std(x, window):
+    """Trailing sample standard deviation (ddof=1) over ``window`` values."""
+    return _rolling(x, window, lambda w: w.std(axis=-1, ddof=1))
+
+def rolling_min(x, window):
+    return _rolling(x, window, lambda w: w.min(axis=-1))
+
+def rolling_max(x, window):
+    return _rolling(x, window, lambda w: w.max(axis=-1))
+
+def ema_array(x, window):
+    """Exponential moving average matching ``ema`` (span, adjust=False)."""
+    from scipy.signal import lfilter  # deferred: scipy.signal is slow to import
+    x = np.asarray(x, dtype=np.float64)
+    alpha = 2.0 / (window + 1.0)
+    x2 = np.atleast_2d(x)
+    valid = ~np.isnan(x2)
+    first = np.where(valid.any(axis=-1), valid.argmax(axis=-1), x2.shape[-1])
+    leading = np.arange(x2.shape[-1]) < first[:, None]
+    seed = x2[np.arange(len(x2)), np.minimum(first, x2.shape[-1] - 1)]
+    filled = np.where(leading, seed[:, None], x2)
+    zi = ((1.0 - alpha) * seed)[:, None]
+    out, _ = lfilter([alpha], [1.0, alpha - 1.0], filled, axis=-1, zi=zi)
+    out[leading] = np.nan
+    return out.reshape(x.shape)
+
+def diff_array(x):
+    x = np.asarray(x, dtype=np.float64)
+    out = np.full(x.shape, np.nan)
+    out[..., 1:] = x[..., 1:] - x[..., :-1]
+    return out
+
+def volatility_mean(close, periods_per_year=PERIODS_PER_YEAR):
+    """
+    Mean of the ``volatility_30d`` values of ``compute_indicators`` over the
+    whole of ``close`` (NaN before 31 bars), which the dashboard compares
+    the latest volatility with. Only this statistic needs the full history.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = diff_array(close)[1:] / close[:-1]
+    volatility = rolling_std(returns, 30)
+    volatility = volatility[np.isfinite(volatility)]
+    if not len(volatility):
+        return np.nan
+    return float(volatility.mean() * np.sqrt(periods_per_year) * 100)
+
+def compute_indicators(close, high=None, low=None, volume=None, periods_per_year=PERIODS_PER_YEAR):
+    """
+    Compute the dashboard indicator set in one pass over contiguous arrays.
+
+    ``close`` (and the optional ``high``, ``low`` and ``volume``) are arrays
+    of shape (dates,) or (tickers, dates). Returns a dict of float64 arrays
+    of the same shape keyed by indicator name; the inputs are not modified
+    or copied when they already are float64. Without high/low the stochastic
+    oscillator and ATR fall back to close-only approximations.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    out = {}
+    for window in (7, 20, 50):
+        out[f'sma_{window}'] = rolling_mean(close, window)
+    for window in (12, 26):
+        out[f'ema_{window}'] = ema_array(close, window)
+
+    # RSI (simple moving average of gains and losses)
+    delta = diff_array(close)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = rolling_mean(np.clip(delta, 0, None), 14) / rolling_mean(-np.clip(delta, None, 0), 14)
+        out['rsi_14'] = 100 - (100 / (1 + rs))
+
+    # MACD
+    out['macd'] = out['ema_12'] - out['ema_26']
+    out['macd_signal'] = ema_array(out['macd'], 9)
+    out['macd_hist'] = out['macd'] - out['macd_signal']
+
+    # Bollinger Bands
+    bb_std = rolling_std(close, 20)
+    out['bb_middle'] = out['sma_20']
+    out['bb_upper'] = out['bb_middle'] + 2 * bb_std
+    out['bb_lower'] = out['bb_middle'] - 2 * bb_std
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out['bb_width'] = (out['bb_upper'] - out['bb_lower']) / out['bb_middle']
+
+    # Stochastic oscillator and ATR
+    n = 14
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if high is not None and low is not None:
+            high = np.asarray(high, dtype=np.float64)
+            low = np.asarray(low, dtype=np.float64)
+            lowest = rolling_min(low, n)
+            out['stoch_k'] = 100 * ((close - lowest) / (rolling_max(high, n) - lowest))
+            prev_close = np.full(close.shape, np.nan)
+            prev_close[..., 1:] = close[..., :-1]
+            tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+            out['atr_14'] = rolling_mean(tr, 14)
+        else:
+            lowest = rolling_min(close, n)
+            span = rolling_max(close, n) - lowest
+            out['stoch_k'] = 100 * ((close - lowest) / np.where(span == 0, 1, span))
+            out['atr_14'] = rolling_mean(np.abs(delta), 14)
+    out['stoch_d'] = rolling_mean(out['stoch_k'], 3)
+
+    if volume is not None:
+        out['volume_sma_20'] = rolling_mean(volume, 20)
+
+    # Annualised volatility of simple returns, in percent
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = delta / np.concatenate(
+            [np.full(close.shape[:-1] + (1,), np.nan), close[..., :-1]], axis=-1)
+    out['returns'] = returns
+    out['volatility_30d'] = rolling_std(returns, 30) * np.sqrt(periods_per_year) * 100
+    return out
+
+# ---------------------------------------------------------------------------
+# Buy/sell signals and the overall rating, from the latest indicator values
+# of one ticker (scalars) or a whole universe (arrays of shape (tickers,))
+# ---------------------------------------------------------------------------
+BUY, NEUTRAL, SELL = 1, 0, -1
+SIGNAL_LABELS = {BUY: "Buy", NEUTRAL: "Neutral", SELL: "Sell"}
+# Overall ratings in code order, from -2 (Strong Sell) to 2 (Strong Buy)
+RATINGS = ("Strong Sell", "Sell", "Neutral", "Buy", "Strong Buy")
+SIGNALS = ('sma_7', 'sma_20', 'sma_50', 'ema_12', 'ema_26', 'macd', 'rsi', 'stoch', 'bb')
+
+def signal_votes(close, last):
+    """
+    Buy (1), sell (-1) or neutral (0) vote of every signal in ``SIGNALS``,
+    given the latest ``close`` and the latest value of each indicator in
+    ``last`` (the keys of ``compute_indicators``).
+    """
+    close = np.asarray(close, dtype=np.float64)
+    votes = {}
+    with np.errstate(invalid='ignore'):
+        for name in ('sma_7', 'sma_20', 'sma_50', 'ema_12', 'ema_26'):
+            votes[name] = np.where(close > last[name], BUY, SELL)
+        votes['macd'] = np.where(last['macd_hist'] > 0, BUY, SELL)
+        rsi = np.asarray(last['rsi_14'])
+        votes['rsi'] = np.select([rsi < 30, rsi > 70], [BUY, SELL], NEUTRAL)
+        k, d = np.asarray(last['stoch_k']), np.asarray(last['stoch_d'])
+        votes['stoch'] = np.select([(k < 20) & (d < 20), (k > 80) & (d > 80)], [BUY, SELL], NEUTRAL)
+        votes['bb'] = np.select([close < last['bb_lower'], close > last['bb_upper']], [BUY, SELL], NEUTRAL)
+    return votes
+
+def rating(votes):
+    """
+    Percentages of buy, sell and neutral votes and the overall rating code
+    (an index into ``RATINGS`` minus 2): Strong Buy above 60% buys, Buy
+    above 40%, then the same for sells, otherwise Neutral.
+    """
+    stacked = np.stack([votes[name] for name in SIGNALS])
+    buy = np.round((stacked == BUY).sum(axis=0) / len(SIGNALS) * 100)
+    sell = np.round((stacked == SELL).sum(axis=0) / len(SIGNALS) * 100)
+    neutral = np.round((stacked == NEUTRAL).sum(axis=0) / len(SIGNALS) * 100)
+    code = np.select([buy > 60, buy > 40, sell > 60, sell > 40], [2, 1, -2, -1], 0)
+    return {'buy_percent': buy, 'sell_percent': sell, 'neutral_percent': neutral, 'rating': code}
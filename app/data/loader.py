@@ -1,13 +1,20 @@
 import yfinance as yf
-from functools import lru_cache
+import numpy as np
 import pandas as pd
 import logging
 import time
 import json
-import requests
 from urllib.error import URLError, HTTPError
 import os
 from datetime import datetime, timedelta
+from ..cache import MemoryLRU
+from ..config import Config
+from ..utils import timed
+from .store import PriceStore
+from .normalize import normalize_ohlcv, split_tickers
+from .resample import base_interval, derive_bars, is_intraday, periods_per_year
+from .streaming import refresh_state
+from .providers import FallbackProvider, ProviderChain, build_provider, default_chain
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -17,6 +24,12 @@ logger = logging.getLogger(__name__)
 CACHE_DIR = os.path.join(os.path.dirname(__file__), 'cache')
 os.makedirs(CACHE_DIR, exist_ok=True)
 
+# Persistent price history shared by all worker processes
+price_store = PriceStore(Config.PRICE_STORE_DIR)
+
+# Recently used histories in this process, bounded by size
+history_cache = MemoryLRU(Config.HISTORY_CACHE_MAX_BYTES, ttl=Config.PRICE_STORE_MAX_AGE, name='history')
+
 def get_fallback_data(ticker):
     """
     Get fallback data from cache or create sample data if no cache exists
@@ -64,116 +77,154 @@ def try_alternative_sources(ticker, start):
     Try alternative data sources when Yahoo Finance fails
     """
     logger.info(f"Trying alternative data source for {ticker}")
-    
-    # Try Alpha Vantage API if key is available
-    alpha_vantage_key = os.environ.get('ALPHA_VANTAGE_API_KEY')
-    if alpha_vantage_key:
-        try:
-            logger.info(f"Trying Alpha Vantage API for {ticker}")
-            url = f"https://www.alphavantage.co/query?function=TIME_SERIES_DAILY&symbol={ticker}&outputsize=full&apikey={alpha_vantage_key}"
-            r = requests.get(url)
-            data = r.json()
-            
-            if "Time Series (Daily)" in data:
-                logger.info(f"Successfully fetched {ticker} data from Alpha Vantage")
-                time_series = data["Time Series (Daily)"]
-                df = pd.DataFrame.from_dict(time_series, orient='index')
-                df.index = pd.DatetimeIndex(df.index)
-                df.columns = [col.split('. ')[1].lower() for col in df.columns]
-                df.rename(columns={
-                    'open': 'open',
-                    'high': 'high',
-                    'low': 'low',
-                    'close': 'close',
-                    'volume': 'volume'
-                }, inplace=True)
-                df = df.astype(float)
-                df = df[df.index >= start]
-                df.index.name = "date"
-                return df
-        except Exception as e:
-            logger.warning(f"Alpha Vantage API failed for {ticker}: {str(e)}")
-    
-    # Return fallback data
-    return get_fallback_data(ticker)
+    providers = [build_provider('alphavantage'), FallbackProvider()]
+    return ProviderChain(p for p in providers if p is not None).fetch(ticker, start)
 
 def process_yfinance_data(df, ticker):
     """
     Process the data from yfinance into a consistent format
     """
-    logger.info(f"Processing yfinance data for {ticker}")
-    
-    # Check if the DataFrame is empty
     if df.empty:
         logger.error(f"Empty DataFrame for {ticker}")
         return df
-    
-    # Log column structure to help debug
-    logger.info(f"Original columns for {ticker}: {df.columns}")
-    
-    # Handle multi-level column format 
-    if isinstance(df.columns, pd.MultiIndex):
-        logger.info(f"Multi-level columns detected for {ticker}")
-        
-        # Look for specific column names regardless of level
-        result_df = pd.DataFrame(index=df.index)
-        
-        # Find all the columns we need
-        for col_name in ['Close', 'Open', 'High', 'Low', 'Volume']:
-            # Find any column containing this name
-            matching_cols = [col for col in df.columns if col_name in str(col)]
-            
-            if matching_cols:
-                # Use the first matching column
-                result_df[col_name.lower()] = df[matching_cols[0]]
-                logger.info(f"Found and mapped {col_name} column for {ticker}")
-            else:
-                logger.warning(f"Could not find {col_name} column for {ticker}")
-        
-        # Ensure we have at least close prices
-        if 'close' not in result_df.columns and len(matching_cols) > 0:
-            # If we don't have a 'Close' column but have matched others, 
-            # use the first numeric column as close
-            numeric_cols = [col for col in result_df.columns 
-                           if pd.api.types.is_numeric_dtype(result_df[col])]
-            
-            if numeric_cols:
-                result_df['close'] = result_df[numeric_cols[0]]
-                logger.info(f"Using {numeric_cols[0]} as close price for {ticker}")
-    else:
-        # Handle regular column format
-        result_df = df.copy()
-        # Rename columns to lowercase
-        result_df.columns = [col.lower() for col in result_df.columns]
-        logger.info(f"Standard columns processed for {ticker}: {result_df.columns}")
-    
-    # Make sure index name is 'date'
-    result_df.index.name = 'date'
-    
-    # Drop any NaN values
-    result_df.dropna(inplace=True)
-    
-    logger.info(f"Final columns for {ticker}: {result_df.columns}")
-    return result_df
+    return normalize_ohlcv(df, ticker)
 
-@lru_cache(maxsize=128)
-def fetch_price_history(ticker: str, start: str = "2000-01-01", interval: str = "1d") -> pd.DataFrame:
+def _download(ticker, start, interval):
     df = yf.download(ticker, start=start, interval=interval, auto_adjust=True, progress=False)
     if df.empty:
         raise ValueError(f"No data for {ticker!r}")
-    
-    # Handle multi-level column format if present
-    if isinstance(df.columns, pd.MultiIndex):
-        # Get the Close price column - in the new format it's ('Price', 'Close', 'AAPL')
-        close_col = [col for col in df.columns if 'Close' in col]
-        if close_col:
-            # Create a new DataFrame with just the close price
-            result_df = pd.DataFrame({'close': df[close_col[0]]})
-            result_df.index.name = "date"
-            return result_df
-    
-    # If not a multi-level column format, proceed with the old approach
-    df.dropna(inplace=True)
-    df.rename(columns=str.lower, inplace=True)
-    df.index.name = "date"
+    return normalize_ohlcv(df, ticker)
+
+def compact(df: pd.DataFrame) -> pd.DataFrame:
+    """``df`` with prices as ``Config.HISTORY_DTYPE`` and volume as int64."""
+    return df.astype({col: np.int64 if col == 'volume' else Config.HISTORY_DTYPE for col in df.columns})
+
+def update_indicator_state(ticker, interval, df):
+    """Feed newly synced bars to the indicator state kept with the price store."""
+    try:
+        refresh_state(price_store, ticker, interval, df, periods_per_year(interval))
+    except Exception as e:
+        # The state only saves work; readers recompute without it
+        logger.warning(f"Could not update indicator state for {ticker} ({interval}): {str(e)}")
+
+def load_bars(ticker, start, interval, download=None, lookback=None):
+    """
+    Stored ``interval`` bars for ``ticker`` from ``start`` (only the last
+    ``lookback`` with one). Only base intervals are synced from the
+    providers (``download``, the default provider chain otherwise); other
+    intervals are rolled up from the synced base bars and kept in the store
+    as well, and the indicator state of the synced bars is brought up to
+    date. Intraday bars start at most ``INTRADAY_MAX_DAYS`` back, as far as
+    providers serve them.
+    """
+    base = base_interval(interval, Config.INTRADAY_BASE_INTERVAL)
+    if is_intraday(base):
+        earliest = (datetime.now() - timedelta(days=Config.INTRADAY_MAX_DAYS)).date()
+        start = str(max(pd.Timestamp(start).date(), earliest))
+    max_age = Config.PRICE_STORE_MAX_AGE
+    if lookback and price_store.pending_start(ticker, start, base, max_age) is None:
+        # The stored bars are fresh: read only the last ``lookback`` of them
+        if base == interval:
+            df = price_store.read(ticker, base, tail=lookback)
+        else:
+            df = derive_bars(price_store, ticker, interval, base, tail=lookback)
+    else:
+        df = price_store.sync(ticker, start, base, download or default_chain().fetch, max_age=max_age)
+        if base != interval:
+            df = derive_bars(price_store, ticker, interval, base)
+        if not df.empty:
+            update_indicator_state(ticker, interval, df)
+        if lookback:
+            df = df.iloc[-lookback:]
+    start_ts = pd.Timestamp(start)
+    if df.index.tz is not None:
+        start_ts = start_ts.tz_localize(df.index.tz)
+    return df[df.index >= start_ts]
+
+@timed('fetch')
+def fetch_price_history(ticker: str, start: str = "2000-01-01", interval: str = "1d",
+                        lookback: int = None) -> pd.DataFrame:
+    """
+    Load price history for a ticker, downloading only the bars that are not
+    yet in the shared on-disk price store from the configured providers.
+    ``interval`` is any bar interval ``load_bars`` can serve (``5m``,
+    ``1h``, ``1d``, ``1wk``, ...).
+    
+    Results are kept in ``history_cache`` in compact form until they are
+    ``PRICE_STORE_MAX_AGE`` old. With ``lookback`` only the last ``lookback``
+    bars are returned, and only those are kept when the full history is not
+    already cached. The frames are shared; do not modify them.
+    """
+    full_key = (ticker, start, interval, None)
+    key = (ticker, start, interval, lookback or None)
+    if lookback:
+        df = history_cache.get(full_key, count_miss=False)
+        if df is not None:
+            return df.iloc[-lookback:]
+    df = history_cache.get(key)
+    if df is None:
+        df = compact(load_bars(ticker, start, interval, lookback=lookback))
+        history_cache.set(key, df)
     return df
+
+def _download_many(tickers, start, interval):
+    """One bulk download for several tickers, split into per-ticker frames."""
+    bulk = yf.download(list(tickers), start=start, interval=interval, auto_adjust=True,
+                       progress=False, group_by='ticker', threads=True)
+    if bulk.empty:
+        return {}
+    if not isinstance(bulk.columns, pd.MultiIndex):
+        return {tickers[0]: normalize_ohlcv(bulk, tickers[0])}
+    frames = split_tickers(bulk)
+    return {ticker: frames[ticker] for ticker in tickers if ticker in frames}
+
+def fetch_price_histories(tickers, start: str = "2000-01-01", interval: str = "1d"):
+    """
+    Load price history for many tickers at once.
+
+    The price store is asked which tickers need new bars and those are
+    fetched with at most two bulk downloads (full histories for unseen
+    tickers, recent bars for stale ones) before each ticker is synced into
+    the store. Returns ``(frames, errors)`` keyed by ticker. Intervals that
+    are not stored as downloaded go through ``load_bars`` per ticker.
+    """
+    if base_interval(interval, Config.INTRADAY_BASE_INTERVAL) != interval:
+        frames, errors = {}, {}
+        for ticker in tickers:
+            try:
+                frames[ticker] = load_bars(ticker, start, interval)
+            except Exception as e:
+                logger.warning(f"Could not load {ticker}: {str(e)}")
+                errors[ticker] = str(e)
+        return frames, errors
+
+    max_age = Config.PRICE_STORE_MAX_AGE
+    pending = {t: price_store.pending_start(t, start, interval, max_age) for t in tickers}
+    full = [t for t, since in pending.items() if since == str(pd.Timestamp(start).date())]
+    stale = [t for t, since in pending.items() if since is not None and t not in full]
+
+    prefetched = {}
+    for group, since in ((full, start), (stale, min((pending[t] for t in stale), default=None))):
+        if group:
+            logger.info(f"Bulk downloading {len(group)} tickers from {since}")
+            for ticker, df in _download_many(group, since, interval).items():
+                prefetched[ticker] = (pd.Timestamp(since), df)
+
+    def download(ticker, since, interval):
+        # The store may plan differently under its lock; only serve what the
+        # bulk download actually covers
+        fetched_from, df = prefetched.get(ticker, (None, None))
+        if df is None or fetched_from > pd.Timestamp(since):
+            return default_chain().fetch(ticker, since, interval)
+        return df[df.index >= pd.Timestamp(since)]
+
+    frames, errors = {}, {}
+    for ticker in tickers:
+        try:
+            frames[ticker] = price_store.sync(ticker, start, interval, download, max_age=max_age)
+            if not frames[ticker].empty:
+                update_indicator_state(ticker, interval, frames[ticker])
+        except Exception as e:
+            logger.warning(f"Could not load {ticker}: {str(e)}")
+            errors[ticker] = str(e)
+    return frames, errors
@@ -0,0 +1,98 @@
+"""
+One normalization step for yfinance downloads.
+
+yfinance returns flat ``Open/High/Low/Close/Volume`` columns, or a column
+MultiIndex with the field names on one level and tickers on the other
+(``(Price, Ticker)`` by default, ``(Ticker, Price)`` with
+``group_by='ticker'``). Both layouts become frames with lowercase OHLCV
+columns, float prices and int64 volume, indexed by ``date``. Columns are
+found by level lookups on the index rather than by scanning ``str(col)``,
+and a multi-ticker download is cast once as a whole before it is split.
+"""
+import numpy as np
+import pandas as pd
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+FIELDS = PRICE_FIELDS + ('volume',)
+
+
+def _field_level(columns: pd.MultiIndex) -> int:
+    """Level of a column MultiIndex that holds the OHLCV field names."""
+    for level, values in enumerate(columns.levels):
+        if values.astype(str).str.lower().isin(FIELDS).any():
+            return level
+    raise ValueError(f"No OHLCV columns in {list(columns.names)}")
+
+
+def _finish(df: pd.DataFrame, dtype) -> pd.DataFrame:
+    if 'volume' in df.columns and df['volume'].hasnans:
+        df = df.fillna({'volume': 0})
+    df = df.rename_axis('date')
+    return df.astype({col: np.int64 if col == 'volume' else dtype for col in df.columns}, copy=False)
+
+
+def normalize_ohlcv(df: pd.DataFrame, ticker: str = None, dtype=np.float64) -> pd.DataFrame:
+    """
+    ``df`` in either yfinance layout as a single ticker's OHLCV frame, rows
+    without a close price dropped. ``ticker`` picks one ticker out of a
+    multi-ticker download.
+    """
+    columns = df.columns
+    if isinstance(columns, pd.MultiIndex):
+        field_level = _field_level(columns)
+        other = [level for level in range(columns.nlevels) if level != field_level]
+        if ticker is not None and len(other) == 1 and ticker in columns.levels[other[0]]:
+            df = df.xs(ticker, axis=1, level=other[0])
+        elif other:
+            df = df.droplevel(other, axis=1)
+        columns = df.columns
+    fields = columns.astype(str).str.lower()
+    if 'close' not in fields:
+        raise ValueError(f"No close prices for {ticker!r}")
+    # Positions of the first column of each field, in FIELDS order
+    unique = np.flatnonzero(~fields.duplicated())
+    names = pd.Index([field for field in FIELDS if field in fields])
+    keep = unique[fields[unique].get_indexer(names)]
+    close = df.iloc[:, keep[names.get_loc('close')]]
+    df = df.iloc[close.notna().to_numpy(), keep].set_axis(names, axis=1, copy=False)
+    return _finish(df, dtype)
+
+
+def split_tickers(bulk: pd.DataFrame, dtype=np.float64) -> dict:
+    """
+    Per-ticker OHLCV frames from a multi-ticker download in either layout.
+
+    The whole download is rearranged into one ticker-major array and cast in
+    one pass; each ticker's columns are then contiguous slices of it that the
+    frame wraps without copying. Leading bars without a close price (before
+    a listing) are sliced off, other gaps are dropped, and tickers with no
+    prices at all are left out.
+    """
+    columns = bulk.columns
+    field_level = _field_level(columns)
+    fields = columns.get_level_values(field_level).astype(str).str.lower()
+    tickers = columns.get_level_values(1 - field_level)
+    names = tickers.unique()
+    grid = pd.MultiIndex.from_product([names, FIELDS])
+    positions = pd.MultiIndex.from_arrays([tickers, fields]).get_indexer(grid)
+
+    # One row per (ticker, field), missing fields as NaN rows
+    values = bulk.to_numpy(dtype=np.float64).T
+    if (positions < 0).any():
+        values = np.vstack([values, np.full((1, len(bulk)), np.nan)])
+    cube = values.take(positions, axis=0).reshape(len(names), len(FIELDS), len(bulk))
+    prices = cube[:, :len(PRICE_FIELDS)].astype(dtype, copy=False)
+    volume = np.nan_to_num(cube[:, -1]).astype(np.int64)
+    valid = ~np.isnan(cube[:, FIELDS.index('close')])
+    first = valid.argmax(axis=1)
+
+    index = pd.DatetimeIndex(bulk.index, name='date')
+    frames = {}
+    for i in np.flatnonzero(valid.any(axis=1)):
+        rows = slice(first[i], None)
+        if not valid[i, rows].all():
+            rows = np.flatnonzero(valid[i])
+        data = dict(zip(PRICE_FIELDS, prices[i][:, rows]))
+        data['volume'] = volume[i, rows]
+        frames[names[i]] = pd.DataFrame(data, index=index[rows], copy=False)
+    return frames
@@ -0,0 +1,255 @@
+"""
+Price data providers tried in order, behind one shared HTTP layer.
+
+Every HTTP provider goes through a single pooled ``requests.Session`` with
+timeouts and exponential backoff, and each provider draws from its own
+token bucket so a burst of traffic cannot exceed its upstream rate limit.
+``ProviderChain`` asks the providers in turn and coalesces concurrent
+requests for the same ticker, so N threads asking for one hot ticker cause
+one upstream fetch.
+"""
+import logging
+import random
+from abc import ABC, abstractmethod
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime, timedelta
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class ProviderError(ValueError):
+    """A provider has no data for a request or could not be reached."""
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``rate`` tokens per second, bursts up to ``capacity``."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class Coalescer:
+    """Runs one call per key at a time; concurrent callers with the same key share its result."""
+
+    def __init__(self):
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def run(self, key, fn):
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            future.set_result(fn())
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._inflight[key]
+        return future.result()
+
+
+_session = None
+_session_lock = threading.Lock()
+
+def http_session():
+    """Process-wide pooled session; created on first use so forked workers get their own."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=Config.HTTP_POOL_SIZE, pool_maxsize=Config.HTTP_POOL_SIZE)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+        return _session
+
+
+def get_json(url, params=None, bucket=None, session=None, timeout=None, retries=None, backoff=None):
+    """
+    GET ``url`` and decode JSON, retrying connection errors, timeouts, 429
+    and 5xx responses with exponential backoff (honouring Retry-After).
+    """
+    session = session or http_session()
+    timeout = Config.HTTP_TIMEOUT if timeout is None else timeout
+    retries = Config.HTTP_RETRIES if retries is None else retries
+    backoff = Config.HTTP_BACKOFF if backoff is None else backoff
+    for attempt in range(retries + 1):
+        if bucket is not None:
+            bucket.acquire()
+        delay = backoff * 2 ** attempt * (1 + random.random() / 2)
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+        else:
+            if response.status_code not in RETRY_STATUS:
+                response.raise_for_status()
+                return response.json()
+            error = requests.HTTPError(f"HTTP {response.status_code} from {url}", response=response)
+            retry_after = response.headers.get('Retry-After', '')
+            if retry_after.isdigit():
+                delay = max(delay, int(retry_after))
+        if attempt == retries:
+            raise ProviderError(f"{url} failed after {retries + 1} attempts: {str(error)}")
+        logger.warning(f"Retrying {url} in {delay:.2f}s: {str(error)}")
+        time.sleep(delay)
+
+
+class Provider(ABC):
+    """A source of OHLCV bars."""
+
+    name = 'provider'
+
+    @abstractmethod
+    def fetch(self, ticker, start, interval='1d'):
+        """Bars of ``ticker`` from ``start`` as a frame indexed by ``date``; raises ProviderError."""
+
+
+class YahooProvider(Provider):
+    name = 'yahoo'
+
+    def __init__(self, rate_per_minute=120):
+        self.bucket = TokenBucket(rate_per_minute / 60.0, capacity=max(1, rate_per_minute // 10))
+
+    def fetch(self, ticker, start, interval='1d'):
+        from .loader import _download
+        self.bucket.acquire()
+        try:
+            return _download(ticker, start, interval)
+        except ValueError as e:
+            raise ProviderError(str(e)) from e
+
+
+class AlphaVantageProvider(Provider):
+    """
+    Alpha Vantage daily bars. Incremental requests (start within the last
+    ``COMPACT_DAYS`` calendar days) use ``outputsize=compact``, the latest
+    100 bars, instead of the full 20-year series.
+    """
+
+    name = 'alphavantage'
+    COMPACT_DAYS = 120
+
+    def __init__(self, api_key, base_url='https://www.alphavantage.co/query', rate_per_minute=5,
+                 session=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.bucket = TokenBucket(rate_per_minute / 60.0, capacity=1)
+        self.session = session
+
+    def fetch(self, ticker, start, interval='1d'):
+        if interval != '1d':
+            raise ProviderError(f"Alpha Vantage provider only serves daily bars, not {interval!r}")
+        start = pd.Timestamp(start)
+        compact = start >= pd.Timestamp(datetime.now() - timedelta(days=self.COMPACT_DAYS))
+        params = {'function': 'TIME_SERIES_DAILY', 'symbol': ticker, 'apikey': self.api_key,
+                  'outputsize': 'compact' if compact else 'full'}
+        data = get_json(self.base_url, params, bucket=self.bucket, session=self.session)
+        series = data.get('Time Series (Daily)')
+        if not series:
+            # Throttling and bad symbols come back as 200 with a message
+            message = data.get('Note') or data.get('Information') or data.get('Error Message') or 'no data'
+            raise ProviderError(f"Alpha Vantage has no data for {ticker!r}: {message}")
+        df = pd.DataFrame.from_dict(series, orient='index').astype(float)
+        df.columns = [col.split('. ')[1].lower() for col in df.columns]
+        df.index = pd.DatetimeIndex(df.index, name='date')
+        df = df.sort_index()
+        return df[df.index >= start]
+
+
+class FallbackProvider(Provider):
+    """Locally cached or synthetic history from ``get_fallback_data``; for offline use."""
+
+    name = 'fallback'
+
+    def fetch(self, ticker, start, interval='1d'):
+        if interval != '1d':
+            raise ProviderError(f"Fallback data only has daily bars, not {interval!r}")
+        from .loader import get_fallback_data
+        df = get_fallback_data(ticker)
+        return df[df.index >= pd.Timestamp(start)]
+
+
+class ProviderChain:
+    """Asks each provider in order until one returns bars; concurrent identical requests share one fetch."""
+
+    def __init__(self, providers):
+        self.providers = list(providers)
+        self.coalescer = Coalescer()
+
+    def fetch(self, ticker, start, interval='1d'):
+        return self.coalescer.run((ticker.upper(), str(start), interval),
+                                  lambda: self._fetch(ticker, start, interval))
+
+    __call__ = fetch
+
+    def _fetch(self, ticker, start, interval):
+        errors = []
+        for provider in self.providers:
+            try:
+                df = provider.fetch(ticker, start, interval)
+            except Exception as e:
+                logger.warning(f"{provider.name} failed for {ticker}: {str(e)}")
+                errors.append(f"{provider.name}: {str(e)}")
+                continue
+            if df is not None and not df.empty:
+                logger.info(f"Fetched {len(df)} bars for {ticker} from {provider.name}")
+                return df
+            errors.append(f"{provider.name}: no data")
+        raise ProviderError(f"No data for {ticker!r} ({'; '.join(errors) or 'no providers'})")
+
+
+def build_provider(name):
+    """Provider for a ``Config.DATA_PROVIDERS`` entry, or None if it is not configured."""
+    if name == 'yahoo':
+        return YahooProvider(Config.YAHOO_RATE_PER_MINUTE)
+    if name == 'alphavantage':
+        if not Config.ALPHA_VANTAGE_API_KEY:
+            return None
+        return AlphaVantageProvider(Config.ALPHA_VANTAGE_API_KEY, Config.ALPHA_VANTAGE_BASE_URL,
+                                    Config.ALPHA_VANTAGE_RATE_PER_MINUTE)
+    if name == 'fallback':
+        return FallbackProvider()
+    raise ValueError(f"Unknown data provider {name!r}")
+
+
+_chain = None
+
+def default_chain():
+    """The configured provider chain, built once per process."""
+    global _chain
+    if _chain is None:
+        names = [n.strip() for n in Config.DATA_PROVIDERS.split(',') if n.strip()]
+        _chain = ProviderChain(p for p in map(build_provider, names) if p is not None)
+    return _chain
@@ -0,0 +1,233 @@
+"""
+Bar intervals and the OHLCV resampling engine.
+
+Only base intervals are downloaded and stored: ``INTRADAY_BASE_INTERVAL``
+(5-minute bars by default) for everything shorter than a day, and ``1d``
+for daily and longer bars, which need decades of history that providers do
+not serve intraday. Every other interval (15m, 1h, 1wk, 1mo, ...) is rolled
+up from its base with ``resample_ohlcv``: bucket keys come from integer
+arithmetic on the timestamps and each field is reduced with one
+``ufunc.reduceat`` call, so there is no per-bucket Python loop.
+``derive_bars`` keeps the rolled-up bars in the price store and only
+recomputes the buckets that new base bars touch.
+"""
+import logging
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MINUTE_NS = 60 * 10 ** 9
+DAY_NS = 24 * 60 * MINUTE_NS
+# Regular US equity session, for bars per year of intraday intervals
+SESSION_MINUTES = 390
+TRADING_DAYS = 252
+# Bars of history future_index reads: enough sessions to see every
+# intraday bar time (about a month of 5-minute bars)
+FUTURE_INDEX_BARS = 2000
+
+_UNITS = {'m': 'minute', 'h': 'hour', 'd': 'day', 'wk': 'week', 'w': 'week', 'mo': 'month'}
+
+
+def parse_interval(interval: str):
+    """``(count, unit)`` of an interval such as ``'5m'``, ``'1h'``, ``'1d'``, ``'1wk'`` or ``'1mo'``."""
+    match = re.fullmatch(r'(\d+)(mo|wk|m|h|d|w)', str(interval))
+    if not match or int(match.group(1)) < 1:
+        raise ValueError(f"Unknown interval {interval!r}")
+    count, unit = int(match.group(1)), _UNITS[match.group(2)]
+    if unit in ('day', 'week', 'month') and count != 1:
+        raise ValueError(f"Only single-{unit} bars are supported, not {interval!r}")
+    return count, unit
+
+
+def interval_minutes(interval: str):
+    """Bar length in minutes for intraday intervals, None for daily and longer ones."""
+    count, unit = parse_interval(interval)
+    if unit == 'minute':
+        return count
+    if unit == 'hour':
+        return count * 60
+    return None
+
+
+def is_intraday(interval: str) -> bool:
+    return interval_minutes(interval) is not None
+
+
+def periods_per_year(interval: str) -> float:
+    """Bars per year of ``interval``, to annualise volatility."""
+    minutes = interval_minutes(interval)
+    if minutes is not None:
+        return TRADING_DAYS * max(1, round(SESSION_MINUTES / minutes))
+    return {'day': TRADING_DAYS, 'week': 52, 'month': 12}[parse_interval(interval)[1]]
+
+
+def base_interval(interval: str, intraday_base: str = '5m') -> str:
+    """
+    Stored interval ``interval`` is derived from: ``intraday_base`` for
+    intraday bars that are a multiple of it, ``1d`` for daily and longer
+    bars, or ``interval`` itself when it must be downloaded as is.
+    """
+    minutes = interval_minutes(interval)
+    if minutes is None:
+        return '1d'
+    base = interval_minutes(intraday_base)
+    return intraday_base if minutes % base == 0 else interval
+
+
+def _local_ns(index: pd.DatetimeIndex) -> np.ndarray:
+    """Wall-clock nanoseconds of ``index``, so days and weeks follow the exchange calendar."""
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.asi8
+
+
+def bucket_starts(index: pd.DatetimeIndex, interval: str):
+    """
+    Positions where each ``interval`` bucket of the sorted ``index`` starts,
+    and the bucket labels (start times). Intraday buckets are counted from
+    each day's first bar, so hourly bars of a 9:30 session start at 9:30,
+    10:30, ... as the providers label them; days, weeks (from Monday) and
+    months follow the local calendar.
+    """
+    index = pd.DatetimeIndex(index)
+    local = _local_ns(index)
+    days = local // DAY_NS
+    minutes = interval_minutes(interval)
+    unit = parse_interval(interval)[1]
+    if minutes is not None:
+        width = minutes * MINUTE_NS
+        day_starts = np.flatnonzero(np.r_[True, days[1:] != days[:-1]])
+        origin = np.repeat(local[day_starts], np.diff(np.r_[day_starts, len(local)]))
+        steps = (local - origin) // width
+        keys = days * (DAY_NS // width + 1) + steps
+    elif unit == 'day':
+        keys = days
+    elif unit == 'week':
+        # 1970-01-01 was a Thursday
+        keys = days - (days + 3) % 7
+    else:
+        keys = local.astype('datetime64[ns]').astype('datetime64[M]').astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+    if minutes is not None:
+        # Offsets from the day's first bar, applied to the real (UTC) instants
+        labels = index[starts] - pd.to_timedelta(local[starts] - (origin + steps * width)[starts])
+    else:
+        if unit == 'day':
+            wall = keys[starts] * DAY_NS
+        elif unit == 'week':
+            wall = keys[starts] * DAY_NS
+        else:
+            wall = keys[starts].astype('datetime64[M]').astype('datetime64[ns]').astype(np.int64)
+        labels = pd.DatetimeIndex(wall.view('datetime64[ns]'))
+        if index.tz is not None:
+            labels = labels.tz_localize(index.tz, ambiguous=False, nonexistent='shift_forward')
+    return starts, pd.DatetimeIndex(labels, name=index.name or 'date')
+
+
+def resample_ohlcv(df: pd.DataFrame, interval: str) -> pd.DataFrame:
+    """
+    Roll the bars of ``df`` (sorted, with any of open/high/low/close/volume)
+    up to ``interval``: first open, highest high, lowest low, last close and
+    summed volume per bucket. Missing values are skipped. The last bucket
+    may be partial, as a live bar is.
+    """
+    if df.empty:
+        return df.copy()
+    starts, labels = bucket_starts(df.index, interval)
+    ends = np.r_[starts[1:], len(df)] - 1
+    out = {}
+    for col in ('open', 'high', 'low', 'close', 'volume'):
+        if col not in df.columns:
+            continue
+        values = df[col].to_numpy()
+        if col == 'open':
+            out[col] = values[starts]
+        elif col == 'close':
+            out[col] = values[ends]
+        elif col == 'high':
+            out[col] = np.fmax.reduceat(values.astype(np.float64), starts)
+        elif col == 'low':
+            out[col] = np.fmin.reduceat(values.astype(np.float64), starts)
+        else:
+            volume = values if np.issubdtype(values.dtype, np.integer) else np.nan_to_num(values)
+            out[col] = np.add.reduceat(volume, starts)
+    return pd.DataFrame(out, index=labels)
+
+
+def derive_bars(store, ticker: str, interval: str, base: str, tail: int = None) -> pd.DataFrame:
+    """
+    ``interval`` bars for ``ticker`` (only the last ``tail`` with one)
+    rolled up from the ``base`` bars in ``store``, kept in the store
+    themselves. Only buckets from the last stored one on are recomputed when
+    base bars were added; everything is recomputed when the base history
+    was rewritten (re-adjusted or reloaded) underneath.
+    """
+    base_meta = store.read_meta(ticker, base)
+    with store.lock(ticker, interval):
+        meta = store.read_meta(ticker, interval)
+        if meta and meta.get('source_fetched_at') == base_meta.get('fetched_at'):
+            derived = store.read(ticker, interval, tail=tail)
+            if derived is not None:
+                return derived
+        derived = store.read(ticker, interval)
+
+        source = store.read(ticker, base)
+        if source is None or source.empty:
+            raise ValueError(f"No {base} bars stored for {ticker}")
+        fresh = None
+        if derived is not None and len(derived) > 1 and meta.get('source_start') == str(source.index[0]):
+            # Rebuild from the start of the last stored bucket (its day, for
+            # intraday buckets counted from the day's first bar)
+            last = derived.index[-1]
+            since = last.normalize() if is_intraday(interval) else last
+            kept = derived[derived.index < since]
+            before = source[source.index < since]
+            # The bar before the rebuilt range must still close the last kept bucket
+            if len(kept) and len(before) and np.isclose(before['close'].iloc[-1], kept['close'].iloc[-1]):
+                fresh = pd.concat([kept, resample_ohlcv(source[source.index >= since], interval)])
+        if fresh is None:
+            logger.info(f"Rolling up all {base} bars of {ticker} into {interval}")
+            fresh = resample_ohlcv(source, interval)
+        store.write(ticker, interval, fresh, source=base, source_start=str(source.index[0]),
+                    source_fetched_at=base_meta.get('fetched_at'), fetched_at=time.time())
+        return fresh.iloc[-tail:] if tail else fresh
+
+
+def index_tail(index) -> pd.DatetimeIndex:
+    """The end of ``index`` that ``future_index`` reads, for forecasters to keep after fitting."""
+    return pd.DatetimeIndex(index)[-FUTURE_INDEX_BARS:]
+
+
+def future_index(index: pd.DatetimeIndex, steps: int) -> pd.DatetimeIndex:
+    """
+    The next ``steps`` bar times after ``index``, following its spacing:
+    business days for daily bars, weeks and months for those, and for
+    intraday bars the times of day the recent sessions traded at, on the
+    following business days.
+    """
+    index = index_tail(index)
+    last = index[-1]
+    spacing = pd.Timedelta(np.median(np.diff(index[-50:].asi8))) if len(index) > 1 else pd.Timedelta(days=1)
+    if spacing < pd.Timedelta(hours=20):
+        local = index.tz_localize(None) if index.tz is not None else index
+        slots = np.unique(local.asi8 % DAY_NS)
+        wall_last = last.tz_localize(None) if last.tz is not None else last
+        days_needed = steps // len(slots) + 2
+        days = pd.bdate_range(wall_last.normalize(), periods=days_needed + 1).asi8
+        times = (days[:, None] + slots[None, :]).ravel()
+        times = times[times > wall_last.value][:steps]
+        future = pd.DatetimeIndex(times.view('datetime64[ns]'))
+        if index.tz is not None:
+            future = future.tz_localize(index.tz, ambiguous=False, nonexistent='shift_forward')
+    elif spacing >= pd.Timedelta(days=20):
+        future = pd.date_range(last + pd.DateOffset(months=1), periods=steps, freq=pd.DateOffset(months=1))
+    elif spacing >= pd.Timedelta(days=5):
+        future = pd.date_range(last + pd.Timedelta(weeks=1), periods=steps, freq='7D')
+    else:
+        future = pd.date_range(last + pd.offsets.BDay(), periods=steps, freq='B')
+    return pd.DatetimeIndex(future, name='ds')
@@ -0,0 +1,220 @@
+"""
+Cross-sectional screener: the latest indicator values, signal votes and
+rating of every ticker in the price store, kept as one ``(tickers,
+columns)`` matrix.
+
+``refresh`` only recomputes the rows of tickers whose stored bars changed
+since the last refresh: from the indicator state saved next to their bars
+when it is up to date, otherwise in one ``compute_indicators`` call over
+their last ``LOOKBACK`` bars. ``query`` answers filter and rank requests
+with boolean masks and one sort over the matrix, so screening thousands of
+tickers takes milliseconds.
+"""
+import logging
+import operator
+import os
+import threading
+import time
+
+import numpy as np
+
+from .indicators import (LOOKBACK, PERIODS_PER_YEAR, RATINGS, SIGNAL_LABELS, SIGNALS, compute_indicators,
+                         rating, signal_votes)
+from .resample import periods_per_year
+from .streaming import stored_state
+
+logger = logging.getLogger(__name__)
+
+INDICATORS = ('sma_7', 'sma_20', 'sma_50', 'ema_12', 'ema_26', 'rsi_14', 'macd', 'macd_signal',
+              'macd_hist', 'bb_upper', 'bb_lower', 'bb_width', 'stoch_k', 'stoch_d', 'atr_14',
+              'volume_sma_20', 'volatility_30d')
+# Text-valued columns, stored as codes: labels by code
+CATEGORIES = {'rating': {code - 2: label for code, label in enumerate(RATINGS)},
+              **{f"{name}_signal": SIGNAL_LABELS for name in SIGNALS}}
+COLUMNS = ('close', 'change_pct', 'volume') + INDICATORS + \
+          ('buy_percent', 'sell_percent', 'neutral_percent') + tuple(CATEGORIES)
+
+OPERATORS = {'<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge,
+             '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+             'in': lambda values, choices: np.isin(values, choices)}
+
+
+def latest_rows(frames: dict, periods_per_year=PERIODS_PER_YEAR) -> np.ndarray:
+    """
+    ``(len(frames), len(COLUMNS))`` matrix of the screener columns for
+    price frames or dicts of column arrays (the last ``LOOKBACK`` bars are
+    enough) of bars ``periods_per_year`` to a year, computed for all of
+    them at once.
+    """
+    rows = np.full((len(frames), len(COLUMNS)), np.nan)
+    # compute_indicators takes high/low for all rows or none
+    groups = {}
+    for i, bars in enumerate(frames.values()):
+        groups.setdefault('high' in bars and 'low' in bars, []).append(i)
+    frames = list(frames.values())
+    for has_range, members in groups.items():
+        fields = {name: np.full((len(members), LOOKBACK), np.nan)
+                  for name in ('close', 'high', 'low', 'volume')}
+        for row, i in enumerate(members):
+            for name, matrix in fields.items():
+                if name in frames[i]:
+                    values = np.asarray(frames[i][name], dtype=np.float64)[-LOOKBACK:]
+                    # Right-aligned: shorter histories start with NaNs
+                    matrix[row, LOOKBACK - len(values):] = values
+        ind = compute_indicators(fields['close'], fields['high'] if has_range else None,
+                                 fields['low'] if has_range else None, fields['volume'],
+                                 periods_per_year=periods_per_year)
+        last = {name: values[:, -1] for name, values in ind.items()}
+        rows[members] = _rows(fields['close'][:, -1], fields['volume'][:, -1], last)
+    return rows
+
+
+def state_rows(states: dict) -> np.ndarray:
+    """``latest_rows`` for tickers' up-to-date ``IndicatorState`` objects, without reading bars."""
+    states = list(states.values())
+    close = np.array([state.prev_close for state in states], dtype=np.float64)
+    volume = np.array([state.volume.values[-1] if state.has_volume and state.volume.values else np.nan
+                       for state in states], dtype=np.float64)
+    names = set(INDICATORS).union(*(state.latest for state in states))
+    last = {name: np.array([state.latest.get(name, np.nan) for state in states], dtype=np.float64)
+            for name in names}
+    return _rows(close, volume, last)
+
+
+def _rows(close, volume, last):
+    """Screener columns from the latest close, volume and indicator values (arrays by ticker)."""
+    votes = signal_votes(close, last)
+    columns = {'close': close, 'change_pct': last['returns'] * 100, 'volume': volume,
+               **{name: last[name] for name in INDICATORS}, **rating(votes),
+               **{f"{name}_signal": vote for name, vote in votes.items()}}
+    return np.column_stack([columns[name] for name in COLUMNS])
+
+
+class Screener:
+    """
+    Screener over the ``interval`` bars in ``store``, for ``tickers`` or,
+    without a list, every ticker stored. Queries refresh the matrix when it
+    is older than ``refresh_seconds``.
+    """
+
+    def __init__(self, store, interval='1d', tickers=None, refresh_seconds=300):
+        self.store = store
+        self.interval = interval
+        self.universe = [t.upper() for t in tickers] if tickers else None
+        self.refresh_seconds = refresh_seconds
+        # (tickers, values) swapped as one so queries never see a half refresh
+        self.matrix = ([], np.empty((0, len(COLUMNS))))
+        self.versions = {}
+        self.refreshed_at = None
+        self._lock = threading.Lock()
+
+    def _version(self, ticker):
+        try:
+            stat = os.stat(self.store.data_path(ticker, self.interval))
+        except OSError:
+            return None
+        # A state saved after the bars turns a recomputed row into a saved one
+        try:
+            state_mtime = os.stat(self.store.state_path(ticker, self.interval)).st_mtime_ns
+        except OSError:
+            state_mtime = None
+        return stat.st_mtime_ns, stat.st_size, state_mtime
+
+    def refresh(self) -> int:
+        """Recompute the rows of tickers whose stored bars changed; returns how many."""
+        with self._lock:
+            universe = self.universe if self.universe is not None else self.store.tickers(self.interval)
+            versions = {ticker: self._version(ticker) for ticker in universe}
+            versions = {ticker: version for ticker, version in versions.items() if version is not None}
+            changed = [t for t, version in versions.items() if self.versions.get(t) != version]
+            states, frames = {}, {}
+            for ticker in changed:
+                last = self.store.read(ticker, self.interval, tail=1)
+                if last is None or last.empty:
+                    continue
+                state = stored_state(self.store, ticker, self.interval, last.index[-1], last['close'].iloc[-1])
+                if state is not None:
+                    states[ticker] = state
+                    continue
+                bars = self.store.read_columns(ticker, self.interval, tail=LOOKBACK)
+                if bars and len(bars.get('close', ())):
+                    frames[ticker] = bars
+            rows = [state_rows(states)] if states else []
+            if frames:
+                rows.append(latest_rows(frames, periods_per_year(self.interval)))
+            updated = list(states) + list(frames)
+
+            # Kept rows, then the recomputed and new ones, swapped in at once
+            old_tickers, old_values = self.matrix
+            position = {t: i for i, t in enumerate(old_tickers)}
+            kept = [t for t in old_tickers if t in versions and t not in states and t not in frames]
+            tickers = kept + updated
+            self.matrix = (tickers, np.vstack([old_values[[position[t] for t in kept]], *rows]))
+            self.versions = {t: versions[t] for t in tickers}
+            self.refreshed_at = time.time()
+        if updated:
+            logger.info(f"Screener refreshed {len(updated)} of {len(tickers)} tickers "
+                        f"({len(states)} from saved indicator state)")
+        return len(updated)
+
+    def maybe_refresh(self):
+        if self.refreshed_at is None or time.time() - self.refreshed_at >= self.refresh_seconds:
+            self.refresh()
+
+    @staticmethod
+    def _column(name):
+        if name not in COLUMNS:
+            raise ValueError(f"Unknown screener column {name!r}")
+        return COLUMNS.index(name)
+
+    @staticmethod
+    def _encode(name, value):
+        """Comparable value for ``name``: the code of a category label, else a float."""
+        if isinstance(value, (list, tuple)):
+            return [Screener._encode(name, v) for v in value]
+        if name in CATEGORIES:
+            codes = {label.lower(): code for code, label in CATEGORIES[name].items()}
+            if str(value).lower() not in codes:
+                raise ValueError(f"{name} must be one of {', '.join(CATEGORIES[name].values())}")
+            return codes[str(value).lower()]
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be compared with a number")
+
+    def query(self, filters=(), sort=None, descending=False, limit=None, columns=None) -> dict:
+        """
+        Tickers matching every ``(column, operator, value)`` in ``filters``,
+        ordered by the ``sort`` column (missing values last) and cut to
+        ``limit``. Returns ``{'count', 'total', 'refreshed_at', 'results'}``,
+        each result holding the ticker and ``columns`` (all by default).
+        """
+        tickers, values = self.matrix
+        mask = np.ones(len(tickers), dtype=bool)
+        for name, op, value in filters:
+            if op not in OPERATORS:
+                raise ValueError(f"Unknown operator {op!r}")
+            with np.errstate(invalid='ignore'):
+                mask &= OPERATORS[op](values[:, self._column(name)], self._encode(name, value))
+        selected = np.flatnonzero(mask)
+        if sort:
+            keys = values[selected, self._column(sort)]
+            # NaN sorts last either way
+            selected = selected[np.argsort(-keys if descending else keys, kind='stable')]
+        if limit is not None:
+            selected = selected[:limit]
+
+        columns = list(columns or COLUMNS)
+        indexes = [self._column(name) for name in columns]
+        results = []
+        for i in selected:
+            row = {'ticker': tickers[i]}
+            for name, j in zip(columns, indexes):
+                value = values[i, j]
+                if name in CATEGORIES:
+                    row[name] = CATEGORIES[name].get(int(value)) if np.isfinite(value) else None
+                else:
+                    row[name] = float(value) if np.isfinite(value) else None
+            results.append(row)
+        return {'count': int(mask.sum()), 'total': len(tickers), 'refreshed_at': self.refreshed_at,
+                'results': results}
@@ -0,0 +1,233 @@
+import fcntl
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Relative change on an already stored bar that means the provider has
+# re-adjusted the history (split or dividend) and a full reload is needed.
+ADJUSTMENT_TOLERANCE = 1e-4
+
+
+class PriceStore:
+    """
+    Columnar on-disk store of price bars, one memory-mapped .npy file per
+    ticker and interval.
+
+    Every file holds a structured array with an int64 ``date`` field (UTC
+    nanoseconds) followed by one field per price column. Files are replaced
+    atomically, so readers never need a lock; writers serialise on a
+    per-ticker ``flock`` so several gunicorn workers can share one store.
+    """
+
+    def __init__(self, root):
+        self.root = str(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _name(self, ticker, interval):
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', ticker.upper())
+        return os.path.join(self.root, f"{safe}_{interval}")
+
+    def data_path(self, ticker, interval):
+        return self._name(ticker, interval) + '.npy'
+
+    def meta_path(self, ticker, interval):
+        return self._name(ticker, interval) + '.json'
+
+    @contextmanager
+    def lock(self, ticker, interval):
+        """Exclusive cross-process lock for one ticker/interval."""
+        with open(self._name(ticker, interval) + '.lock', 'a') as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+    def state_path(self, ticker, interval):
+        return self._name(ticker, interval) + '.state.json'
+
+    def read_state(self, ticker, interval):
+        """Saved incremental indicator state for a ticker/interval, if any."""
+        try:
+            with open(self.state_path(ticker, interval)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_state(self, ticker, interval, state):
+        self._atomic_write(self.state_path(ticker, interval),
+                           lambda f: f.write(json.dumps(state).encode()))
+
+    def read_meta(self, ticker, interval):
+        try:
+            with open(self.meta_path(ticker, interval)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self, ticker, interval):
+        path = self.data_path(ticker, interval)
+        if not os.path.exists(path):
+            return None, None
+        try:
+            arr = np.load(path, mmap_mode='r')
+        except (OSError, ValueError) as e:
+            logger.warning(f"Unreadable price store file {path}: {str(e)}")
+            return None, None
+
+        meta = self.read_meta(ticker, interval)
+        index = pd.DatetimeIndex(np.asarray(arr['date']).view('datetime64[ns]'), name='date')
+        if meta.get('tz'):
+            index = index.tz_localize('UTC').tz_convert(meta['tz'])
+        return arr, index
+
+    def read_index(self, ticker, interval):
+        """Return only the stored bar dates, or None if nothing is stored."""
+        return self._load(ticker, interval)[1]
+
+    def read(self, ticker, interval, tail=None):
+        """Return the stored bars (only the last ``tail`` with one) as a DataFrame, or None if nothing is stored."""
+        arr, index = self._load(ticker, interval)
+        if arr is None:
+            return None
+        if tail is not None:
+            arr, index = arr[-tail:], index[-tail:]
+        columns = [name for name in arr.dtype.names if name != 'date']
+        return pd.DataFrame({col: arr[col] for col in columns}, index=index)
+
+    def read_columns(self, ticker, interval, tail=None):
+        """Like ``read`` but as a dict of NumPy column arrays, without building a DataFrame."""
+        arr, _ = self._load(ticker, interval)
+        if arr is None:
+            return None
+        if tail is not None:
+            arr = arr[-tail:]
+        return {name: np.asarray(arr[name]) for name in arr.dtype.names if name != 'date'}
+
+    def tickers(self, interval):
+        """Tickers with bars stored for ``interval``, as their (upper-cased) file names."""
+        suffix = f"_{interval}.npy"
+        return sorted(name[:-len(suffix)] for name in os.listdir(self.root) if name.endswith(suffix))
+
+    def write(self, ticker, interval, df, **meta):
+        """Atomically replace the stored bars for a ticker/interval."""
+        index = pd.DatetimeIndex(df.index)
+        tz = str(index.tz) if index.tz is not None else None
+        if tz:
+            index = index.tz_convert('UTC').tz_localize(None)
+
+        columns = [str(col) for col in df.columns]
+        dtype = [('date', 'i8')] + [
+            (col, 'i8' if pd.api.types.is_integer_dtype(df[col]) else 'f8')
+            for col in columns
+        ]
+        arr = np.empty(len(df), dtype=dtype)
+        arr['date'] = index.asi8
+        for col in columns:
+            arr[col] = df[col].to_numpy()
+
+        self._atomic_write(self.data_path(ticker, interval), lambda f: np.save(f, arr))
+        meta.update({'tz': tz, 'columns': columns, 'rows': len(df)})
+        self._atomic_write(self.meta_path(ticker, interval),
+                           lambda f: f.write(json.dumps(meta).encode()))
+
+    def _atomic_write(self, path, writer):
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                writer(f)
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def _plan(self, ticker, start_ts, interval, max_age, stored_index):
+        """Decide how to serve a request: ('hit', None), ('full', start) or ('refresh', anchor)."""
+        meta = self.read_meta(ticker, interval)
+        covered = meta.get('start')
+        if stored_index is None or len(stored_index) == 0 or covered is None \
+                or start_ts < pd.Timestamp(covered):
+            return 'full', str(start_ts.date())
+        if time.time() - meta.get('fetched_at', 0) < max_age:
+            return 'hit', None
+        # Re-request the last two stored bars: the last one may have been
+        # a partial bar, the one before it must not have changed.
+        anchor = stored_index[-2] if len(stored_index) > 1 else stored_index[-1]
+        return 'refresh', anchor.strftime('%Y-%m-%d')
+
+    def pending_start(self, ticker, start, interval, max_age=0):
+        """
+        Date from which ``sync`` would currently download bars for this
+        request, or None when the stored bars are fresh enough. Used to plan
+        bulk downloads; ``sync`` re-checks under the lock.
+        """
+        _, since = self._plan(ticker, pd.Timestamp(start), interval, max_age,
+                              self.read_index(ticker, interval))
+        return since
+
+    def sync(self, ticker, start, interval, download, max_age=0):
+        """
+        Bring the stored history for ``ticker`` up to date and return it from
+        ``start`` onwards.
+
+        ``download(ticker, start, interval)`` is only asked for the bars from
+        the last settled stored bar onwards; the full history is downloaded
+        when nothing is stored, when ``start`` predates what was stored, or
+        when the overlapping bars show the provider re-adjusted prices.
+        """
+        start_ts = pd.Timestamp(start)
+        with self.lock(ticker, interval):
+            stored = self.read(ticker, interval)
+            action, since = self._plan(ticker, start_ts, interval, max_age,
+                                       None if stored is None else stored.index)
+
+            if action == 'full':
+                logger.info(f"Price store miss for {ticker} ({interval}), downloading from {since}")
+                df = download(ticker, since, interval)
+                self.write(ticker, interval, df, start=since, fetched_at=time.time())
+                return _since(df, start_ts)
+
+            if action == 'hit':
+                logger.info(f"Price store hit for {ticker} ({interval})")
+                return _since(stored, start_ts)
+
+            logger.info(f"Price store refresh for {ticker} ({interval}) from {since}")
+            covered = self.read_meta(ticker, interval)['start']
+            anchor = stored.index[-2] if len(stored) > 1 else stored.index[-1]
+            try:
+                fresh = download(ticker, since, interval)
+            except ValueError:
+                fresh = stored.iloc[:0]
+
+            if not fresh.empty and _was_readjusted(stored, fresh, anchor):
+                logger.info(f"Adjusted history changed for {ticker}, reloading in full")
+                df = download(ticker, covered, interval)
+            else:
+                df = pd.concat([stored, fresh[fresh.index >= anchor]])
+                df = df[~df.index.duplicated(keep='last')].sort_index()
+            self.write(ticker, interval, df, start=covered, fetched_at=time.time())
+            return _since(df, start_ts)
+
+
+def _since(df, start_ts):
+    if df.index.tz is not None and start_ts.tz is None:
+        start_ts = start_ts.tz_localize(df.index.tz)
+    return df[df.index >= start_ts]
+
+
+def _was_readjusted(stored, fresh, anchor):
+    if anchor not in fresh.index or 'close' not in fresh.columns:
+        return False
+    old = float(stored.at[anchor, 'close'])
+    new = float(fresh.at[anchor, 'close'])
+    return abs(new - old) > ADJUSTMENT_TOLERANCE * abs(old)
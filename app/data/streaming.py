@@ -0,0 +1,379 @@
+"""
+Incremental versions of the indicators in ``indicators.compute_indicators``.
+
+Each state object keeps O(window) memory and absorbs one new bar in O(1)
+(amortised), so appending a bar does not mean recomputing 25 years of
+history. Values follow the batch engine exactly: NaN until a window is full
+and the same EMA seeding. States serialise to plain dicts so they can be
+saved next to the stored price history.
+"""
+import logging
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from .indicators import PERIODS_PER_YEAR
+from .store import ADJUSTMENT_TOLERANCE
+
+logger = logging.getLogger(__name__)
+
+NAN = float('nan')
+
+
+class RollingWindow:
+    """Trailing window with running sum and sum of squares."""
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.gaps = 0
+        self._reset_sums()
+
+    def _reset_sums(self):
+        finite = [v for v in self.values if math.isfinite(v)]
+        # Sums are taken around a shift to keep the variance well conditioned
+        self.shift = finite[0] if finite else 0.0
+        self.sum = sum(v - self.shift for v in finite)
+        self.sumsq = sum((v - self.shift) ** 2 for v in finite)
+        self.updates = 0
+
+    def push(self, value):
+        value = float(value)
+        self.values.append(value)
+        self._add(value, 1)
+        if len(self.values) > self.window:
+            self._add(self.values.popleft(), -1)
+        # Refresh the running sums every window to stop rounding drift
+        self.updates += 1
+        if self.updates >= self.window:
+            self._reset_sums()
+
+    def _add(self, value, sign):
+        if math.isfinite(value):
+            self.sum += sign * (value - self.shift)
+            self.sumsq += sign * (value - self.shift) ** 2
+        else:
+            self.gaps += sign
+
+    @property
+    def full(self):
+        return len(self.values) == self.window and self.gaps == 0
+
+    def mean(self):
+        return self.shift + self.sum / self.window if self.full else NAN
+
+    def std(self):
+        if not self.full:
+            return NAN
+        var = (self.sumsq - self.sum ** 2 / self.window) / (self.window - 1)
+        return math.sqrt(max(var, 0.0))
+
+    def to_dict(self):
+        return {'window': self.window, 'values': list(self.values)}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['window'])
+        state.values = deque(data['values'])
+        state.gaps = sum(not math.isfinite(v) for v in state.values)
+        state._reset_sums()
+        return state
+
+
+class RollingExtreme:
+    """Trailing min or max with a monotonic deque."""
+
+    def __init__(self, window, mode='min'):
+        self.window = window
+        self.mode = mode
+        self.count = 0
+        self.candidates = deque()  # (position, value), monotonic in value
+
+    def _dominated(self, kept, new):
+        return kept >= new if self.mode == 'min' else kept <= new
+
+    def push(self, value):
+        value = float(value)
+        while self.candidates and self._dominated(self.candidates[-1][1], value):
+            self.candidates.pop()
+        self.candidates.append((self.count, value))
+        self.count += 1
+        while self.candidates[0][0] <= self.count - 1 - self.window:
+            self.candidates.popleft()
+
+    def value(self):
+        return self.candidates[0][1] if self.count >= self.window else NAN
+
+    def to_dict(self):
+        return {'window': self.window, 'mode': self.mode, 'count': self.count,
+                'candidates': [list(c) for c in self.candidates]}
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['window'], data['mode'])
+        state.count = data['count']
+        state.candidates = deque((int(p), float(v)) for p, v in data['candidates'])
+        return state
+
+
+class EMAState:
+    """Exponential moving average with ``ema``'s span and adjust=False."""
+
+    def __init__(self, window, value=NAN):
+        self.window = window
+        self.alpha = 2.0 / (window + 1.0)
+        self.value = value
+
+    def push(self, x):
+        x = float(x)
+        if math.isnan(self.value):
+            self.value = x
+        else:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+    def to_dict(self):
+        return {'window': self.window, 'value': self.value}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['window'], data['value'])
+
+
+class IndicatorState:
+    """
+    Streaming counterpart of ``compute_indicators`` for one ticker.
+
+    ``update`` takes one bar and returns the latest value of every indicator
+    under the same names as the batch engine; ``update_many`` feeds a batch
+    of bars. ``to_dict``/``from_dict`` round-trip the whole state.
+    """
+
+    VERSION = 1
+
+    def __init__(self, has_range=True, has_volume=True, periods_per_year=PERIODS_PER_YEAR):
+        self.has_range = has_range
+        self.has_volume = has_volume
+        self.periods_per_year = periods_per_year
+        self.bars = 0
+        self.last_date = None
+        self.prev_close = NAN
+        self.sma = {w: RollingWindow(w) for w in (7, 20, 50)}
+        self.ema = {w: EMAState(w) for w in (12, 26)}
+        self.macd_signal = EMAState(9)
+        self.gains = RollingWindow(14)
+        self.losses = RollingWindow(14)
+        self.lowest = RollingExtreme(14, 'min')
+        self.highest = RollingExtreme(14, 'max')
+        self.stoch = RollingWindow(3)
+        self.true_range = RollingWindow(14)
+        self.volume = RollingWindow(20)
+        self.returns = RollingWindow(30)
+        self.vol_sum = 0.0
+        self.vol_count = 0
+        self.latest = {}
+
+    def update(self, close, high=None, low=None, volume=None, date=None):
+        close = float(close)
+        prev = self.prev_close
+        out = {}
+        for w, state in self.sma.items():
+            state.push(close)
+            out[f'sma_{w}'] = state.mean()
+        for w, state in self.ema.items():
+            out[f'ema_{w}'] = state.push(close)
+
+        if self.bars > 0:
+            delta = close - prev
+            self.gains.push(max(delta, 0.0))
+            self.losses.push(-min(delta, 0.0))
+        gain, loss = self.gains.mean(), self.losses.mean()
+        if math.isnan(gain) or math.isnan(loss):
+            out['rsi_14'] = NAN
+        elif loss == 0:
+            out['rsi_14'] = 100.0 if gain > 0 else NAN
+        else:
+            out['rsi_14'] = 100 - (100 / (1 + gain / loss))
+
+        out['macd'] = out['ema_12'] - out['ema_26']
+        out['macd_signal'] = self.macd_signal.push(out['macd'])
+        out['macd_hist'] = out['macd'] - out['macd_signal']
+
+        bb_std = self.sma[20].std()
+        out['bb_middle'] = out['sma_20']
+        out['bb_upper'] = out['bb_middle'] + 2 * bb_std
+        out['bb_lower'] = out['bb_middle'] - 2 * bb_std
+        out['bb_width'] = _div(out['bb_upper'] - out['bb_lower'], out['bb_middle'])
+
+        if self.has_range:
+            high, low = float(high), float(low)
+            self.lowest.push(low)
+            self.highest.push(high)
+            lowest = self.lowest.value()
+            out['stoch_k'] = 100 * _div(close - lowest, self.highest.value() - lowest)
+            tr = high - low
+            if self.bars > 0:
+                tr = max(tr, abs(high - prev), abs(low - prev))
+            self.true_range.push(tr)
+        else:
+            self.lowest.push(close)
+            self.highest.push(close)
+            lowest = self.lowest.value()
+            span = self.highest.value() - lowest
+            out['stoch_k'] = 100 * _div(close - lowest, 1.0 if span == 0 else span)
+            if self.bars > 0:
+                self.true_range.push(abs(close - prev))
+        out['atr_14'] = self.true_range.mean()
+        if self.lowest.count >= self.lowest.window:
+            self.stoch.push(out['stoch_k'])
+        out['stoch_d'] = self.stoch.mean()
+
+        if self.has_volume:
+            self.volume.push(volume)
+            out['volume_sma_20'] = self.volume.mean()
+
+        out['returns'] = _div(close - prev, prev) if self.bars > 0 else NAN
+        if self.bars > 0:
+            self.returns.push(out['returns'])
+        out['volatility_30d'] = self.returns.std() * math.sqrt(self.periods_per_year) * 100
+        if math.isfinite(out['volatility_30d']):
+            self.vol_sum += out['volatility_30d']
+            self.vol_count += 1
+
+        self.prev_close = close
+        self.bars += 1
+        if date is not None:
+            self.last_date = pd.Timestamp(date).isoformat()
+        self.latest = out
+        return out
+
+    def update_many(self, df: pd.DataFrame):
+        """Feed every bar of ``df`` (columns close and optionally high/low/volume)."""
+        close = df['close'].to_numpy(dtype=np.float64)
+        high = df['high'].to_numpy(dtype=np.float64) if self.has_range else [None] * len(df)
+        low = df['low'].to_numpy(dtype=np.float64) if self.has_range else [None] * len(df)
+        volume = df['volume'].to_numpy(dtype=np.float64) if self.has_volume else [None] * len(df)
+        for i, date in enumerate(df.index):
+            self.update(close[i], high[i], low[i], volume[i], date=date)
+        return self.latest
+
+    @property
+    def volatility_mean(self):
+        """Mean of every 30-day volatility value seen so far."""
+        return self.vol_sum / self.vol_count if self.vol_count else NAN
+
+    def to_dict(self):
+        return {
+            'version': self.VERSION,
+            'has_range': self.has_range, 'has_volume': self.has_volume,
+            'periods_per_year': self.periods_per_year,
+            'bars': self.bars, 'last_date': self.last_date, 'prev_close': self.prev_close,
+            'sma': {str(w): s.to_dict() for w, s in self.sma.items()},
+            'ema': {str(w): s.to_dict() for w, s in self.ema.items()},
+            'macd_signal': self.macd_signal.to_dict(),
+            'gains': self.gains.to_dict(), 'losses': self.losses.to_dict(),
+            'lowest': self.lowest.to_dict(), 'highest': self.highest.to_dict(),
+            'stoch': self.stoch.to_dict(), 'true_range': self.true_range.to_dict(),
+            'volume': self.volume.to_dict(), 'returns': self.returns.to_dict(),
+            'vol_sum': self.vol_sum, 'vol_count': self.vol_count,
+            'latest': self.latest,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get('version') != cls.VERSION:
+            raise ValueError(f"Unsupported indicator state version {data.get('version')!r}")
+        state = cls(data['has_range'], data['has_volume'], data['periods_per_year'])
+        state.bars = data['bars']
+        state.last_date = data['last_date']
+        state.prev_close = data['prev_close']
+        state.sma = {int(w): RollingWindow.from_dict(s) for w, s in data['sma'].items()}
+        state.ema = {int(w): EMAState.from_dict(s) for w, s in data['ema'].items()}
+        state.macd_signal = EMAState.from_dict(data['macd_signal'])
+        for name in ('gains', 'losses', 'stoch', 'true_range', 'volume', 'returns'):
+            setattr(state, name, RollingWindow.from_dict(data[name]))
+        state.lowest = RollingExtreme.from_dict(data['lowest'])
+        state.highest = RollingExtreme.from_dict(data['highest'])
+        state.vol_sum = data['vol_sum']
+        state.vol_count = data['vol_count']
+        state.latest = data['latest']
+        return state
+
+
+def _div(a, b):
+    """Division with NumPy's results for zero denominators."""
+    if b == 0:
+        return NAN if a == 0 or math.isnan(a) else math.copysign(math.inf, a)
+    return a / b
+
+
+def _parse_state(saved, ticker):
+    if saved:
+        try:
+            return IndicatorState.from_dict(saved)
+        except (KeyError, ValueError) as e:
+            logger.warning(f"Discarding indicator state for {ticker}: {str(e)}")
+    return None
+
+
+def stored_state(store, ticker, interval, last_date, last_close):
+    """
+    The saved indicator state for ``ticker`` if it ends at the bar dated
+    ``last_date`` closing at ``last_close`` (to float32 precision), else None.
+    """
+    state = _parse_state(store.read_state(ticker, interval), ticker)
+    if state is None or state.last_date is None or pd.Timestamp(state.last_date) != pd.Timestamp(last_date) \
+            or not math.isclose(state.prev_close, float(last_close), rel_tol=1e-6):
+        return None
+    return state
+
+
+def refresh_state(store, ticker, interval, df, periods_per_year=PERIODS_PER_YEAR):
+    """
+    Bring the saved indicator state for ``ticker`` up to date with ``df``.
+
+    The last bar may still be open (and rolled-up bars always are), so the
+    state is saved twice: settled up to the bar before the last, and with
+    the last bar applied to a copy of that. A refresh feeds the settled
+    state the bars after its last date but the last one, then applies the
+    latest last bar again, so a revised last bar costs one update. The
+    state is rebuilt from scratch when it is missing, from another column
+    layout or annualisation, or no longer lines up with the price history.
+    Runs under the store's lock for the ticker, like writes of its bars.
+    Returns the state at the last bar.
+    """
+    has_range = 'high' in df.columns and 'low' in df.columns
+    has_volume = 'volume' in df.columns
+    columns = ['close'] + (['high', 'low'] if has_range else []) + (['volume'] if has_volume else [])
+    last_bar = [pd.Timestamp(df.index[-1]).isoformat()] + [float(v) for v in df[columns].iloc[-1]]
+    with store.lock(ticker, interval):
+        saved = store.read_state(ticker, interval) or {}
+        settled = _parse_state(saved.get('settled'), ticker)
+        position = None
+        if settled is not None and settled.has_range == has_range and settled.has_volume == has_volume \
+                and settled.periods_per_year == periods_per_year and settled.last_date is not None:
+            last = pd.Timestamp(settled.last_date)
+            found = df.index.searchsorted(last, side='right')
+            # The stored history may have been re-adjusted since the state was saved
+            if 0 < found < len(df) and df.index[found - 1] == last \
+                    and math.isclose(df['close'].iloc[found - 1], settled.prev_close,
+                                     rel_tol=ADJUSTMENT_TOLERANCE):
+                position = found
+
+        if position is None:
+            logger.info(f"Rebuilding indicator state for {ticker} ({interval})")
+            settled = IndicatorState(has_range, has_volume, periods_per_year)
+            position = 0
+        elif position == len(df) - 1 and saved.get('last_bar') == last_bar:
+            current = _parse_state(saved, ticker)
+            if current is not None:
+                return current
+
+        settled.update_many(df.iloc[position:-1])
+        data = settled.to_dict()
+        current = IndicatorState.from_dict(data)
+        current.update_many(df.iloc[-1:])
+        store.write_state(ticker, interval, {**current.to_dict(), 'settled': data, 'last_bar': last_bar})
+        return current
@@ -0,0 +1,137 @@
+import json
+import logging
+import multiprocessing
+import os
+import pickle
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+
+def make_pool(max_workers=None, initializer=None, max_tasks_per_child=None):
+    """
+    Process pool for model fitting. Pool processes start from a clean
+    forkserver rather than forking a web worker that holds open SQLite
+    handles and model state. With ``PRELOAD_BACKENDS`` the forkserver
+    imports the model backends once, so each pool process starts warm.
+    """
+    ctx = multiprocessing.get_context('forkserver')
+    if Config.PRELOAD_BACKENDS:
+        ctx.set_forkserver_preload(['app.models.service', 'app.models.prophet_model',
+                                    'app.models.arima_model'])
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx, initializer=initializer,
+                               max_tasks_per_child=max_tasks_per_child)
+
+
+def _connect(db_path):
+    return sqlite3.connect(db_path, timeout=30)
+
+
+def _update(db_path, job_id, **fields):
+    fields['updated'] = time.time()
+    assignments = ', '.join(f"{name} = ?" for name in fields)
+    with _connect(db_path) as conn:
+        conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+
+def run_job(db_path, job_id, ticker, horizon, model, params, interval='1d'):
+    """Fit and predict one forecast job on ``interval`` bars; runs inside a pool process."""
+    from .data import fetch_price_history
+    from .models.service import get_forecast, model_lookback
+
+    _update(db_path, job_id, status=RUNNING)
+    try:
+        df = fetch_price_history(ticker, interval=interval, lookback=model_lookback(model))
+        forecast_df = get_forecast(ticker, df, horizon, model, params, interval)
+    except Exception as e:
+        logger.error(f"Forecast job {job_id} for {ticker} failed: {str(e)}")
+        _update(db_path, job_id, status=FAILED, error=str(e))
+        return
+    _update(db_path, job_id, status=DONE,
+            result=sqlite3.Binary(pickle.dumps(forecast_df, protocol=pickle.HIGHEST_PROTOCOL)))
+
+
+class JobQueue:
+    """
+    Forecast jobs executed by a local process pool.
+
+    Job state lives in a SQLite file, so a job submitted through one gunicorn
+    worker can be polled through any other. Each worker owns its pool, which
+    is created on first use so it is never inherited across a fork.
+    """
+
+    def __init__(self, db_path, max_workers=2, timeout=600, ttl=24 * 3600):
+        self.db_path = str(db_path)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.ttl = ttl
+        self._executor = None
+        self._pid = None
+        os.makedirs(os.path.dirname(self.db_path) or '.', exist_ok=True)
+        with _connect(self.db_path) as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS jobs ('
+                ' id TEXT PRIMARY KEY, ticker TEXT NOT NULL, horizon INTEGER NOT NULL,'
+                ' model TEXT NOT NULL, params TEXT NOT NULL, status TEXT NOT NULL,'
+                ' error TEXT, result BLOB, created REAL NOT NULL, updated REAL NOT NULL,'
+                " interval TEXT NOT NULL DEFAULT '1d')"
+            )
+            try:
+                # Job databases created before jobs had an interval
+                conn.execute("ALTER TABLE jobs ADD COLUMN interval TEXT NOT NULL DEFAULT '1d'")
+            except sqlite3.OperationalError:
+                pass
+
+    @property
+    def executor(self):
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = make_pool(self.max_workers)
+            self._pid = os.getpid()
+        return self._executor
+
+    def submit(self, ticker: str, horizon: int, model: str = 'prophet', params: dict = None,
+               interval: str = '1d') -> str:
+        """Queue a forecast on ``interval`` bars and return its job id immediately."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        params = params or {}
+        with _connect(self.db_path) as conn:
+            conn.execute('DELETE FROM jobs WHERE created < ?', (now - self.ttl,))
+            conn.execute('INSERT INTO jobs (id, ticker, horizon, model, params, status, created, updated, interval)'
+                         ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                         (job_id, ticker, horizon, model, json.dumps(params), QUEUED, now, now, interval))
+        logger.info(f"Queued forecast job {job_id} for {ticker} ({model}, {interval}, horizon {horizon})")
+        future = self.executor.submit(run_job, self.db_path, job_id, ticker, horizon, model, params, interval)
+        future.add_done_callback(lambda f: self._check_crash(job_id, f))
+        return job_id
+
+    def _check_crash(self, job_id, future):
+        # run_job records its own failures; this catches a pool that died under it
+        error = future.exception()
+        if error is not None:
+            logger.error(f"Forecast job {job_id} crashed: {str(error)}")
+            _update(self.db_path, job_id, status=FAILED, error=str(error) or type(error).__name__)
+            if self._executor is not None and getattr(self._executor, '_broken', False):
+                self._executor = None
+
+    def get(self, job_id: str) -> dict:
+        """Return the job record, with the forecast DataFrame under ``result`` once done."""
+        with _connect(self.db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['result'] = pickle.loads(job['result']) if job['result'] is not None else None
+        if job['status'] in (QUEUED, RUNNING) and time.time() - job['created'] > self.timeout:
+            job['status'] = FAILED
+            job['error'] = f"Forecast did not finish within {self.timeout} seconds"
+        return job
@@ -1,6 +1,52 @@
-from .prophet_model import ProphetForecaster
-from .arima_model import ARIMAForecaster
-try:
-    from .lstm_model import LSTMForecaster
-except Exception:
-    LSTMForecaster = None
+"""
+Forecasting backends, imported on first use.
+
+Prophet, statsmodels and TensorFlow each take a noticeable time to import,
+so the package only records where each backend lives. ``get_forecaster``
+(or attribute access such as ``app.models.ProphetForecaster``) imports a
+backend the first time it is needed; ``preload`` imports them all up front,
+e.g. in the gunicorn master before workers fork.
+"""
+import importlib
+import importlib.util
+import logging
+
+logger = logging.getLogger(__name__)
+
+# model name -> (module, class, third-party package the backend needs)
+MODEL_BACKENDS = {
+    'prophet': ('.prophet_model', 'ProphetForecaster', 'prophet'),
+    'arima': ('.arima_model', 'ARIMAForecaster', 'statsmodels'),
+    'auto_arima': ('.arima_model', 'AutoARIMAForecaster', 'statsmodels'),
+    'lstm': ('.lstm_model', 'LSTMForecaster', 'tensorflow'),
+    'linear': ('.linear_model', 'LinearForecaster', 'numpy'),
+}
+
+_loaded = {}
+
+def model_available(name: str) -> bool:
+    """Whether backend ``name`` is registered and its dependency is installed, without importing it."""
+    backend = MODEL_BACKENDS.get(name)
+    return backend is not None and importlib.util.find_spec(backend[2]) is not None
+
+def get_forecaster(name: str):
+    """Return the forecaster class for ``name``, or None if its backend cannot be imported."""
+    if name not in _loaded:
+        module_name, class_name, _ = MODEL_BACKENDS[name]
+        try:
+            module = importlib.import_module(module_name, __name__)
+            _loaded[name] = getattr(module, class_name)
+        except Exception as e:
+            logger.warning(f"Model backend {name!r} is unavailable: {str(e)}")
+            _loaded[name] = None
+    return _loaded[name]
+
+def preload():
+    """Import every available backend now rather than on first request."""
+    return {name: get_forecaster(name) for name in MODEL_BACKENDS if model_available(name)}
+
+def __getattr__(name):
+    for model, (_, class_name, _) in MODEL_BACKENDS.items():
+        if class_name == name:
+            return get_forecaster(model)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
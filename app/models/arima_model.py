@@ -1,12 +1,107 @@
 from statsmodels.tsa.arima.model import ARIMA
+from statsmodels.tsa.stattools import adfuller
+import numpy as np
 import pandas as pd
+import itertools
+import logging
+import math
+import warnings
+from ..data.resample import future_index, index_tail
+
+logger = logging.getLogger(__name__)
+
 class ARIMAForecaster:
-    def __init__(self, order=(5,1,0)):
-        self.order = order
+    # Bars of history fitted on; older prices barely move the estimates
+    lookback = 1000
+    def __init__(self, order=(5,1,0), interval_width=0.8):
+        self.order = tuple(order)
+        self.interval_width = interval_width
         self.model = None
+        self.index = None
     def fit(self, series: pd.Series):
-        self.model = ARIMA(series, order=self.order).fit()
-    def predict(self, steps: int = 30) -> pd.Series:
+        # Fit on plain values; dates are re-attached in predict, since a
+        # trading-day (or trading-hours) index has no fixed frequency
+        # statsmodels could use
+        self.model = ARIMA(np.asarray(series, dtype=np.float64), order=self.order).fit()
+        self.index = index_tail(series.index) if isinstance(series.index, pd.DatetimeIndex) else None
+    def predict(self, steps: int = 30) -> pd.DataFrame:
         if self.model is None:
             raise RuntimeError("Call fit() first.")
-        return self.model.forecast(steps=steps)
+        forecast = self.model.get_forecast(steps=steps)
+        bounds = forecast.conf_int(alpha=1 - self.interval_width)
+        if self.index is not None:
+            idx = future_index(self.index, steps)
+        else:
+            idx = pd.date_range(start=pd.Timestamp.today().normalize() + pd.offsets.BDay(), periods=steps,
+                                freq='B', name='ds')
+        return pd.DataFrame({'yhat': forecast.predicted_mean, 'yhat_lower': bounds[:, 0],
+                             'yhat_upper': bounds[:, 1]}, index=idx)
+
+def score_order(values, order, criterion='aic'):
+    """Information criterion of one ARIMA fit, or inf if it fails."""
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            result = ARIMA(values, order=order).fit()
+        score = getattr(result, criterion)
+        return score if math.isfinite(score) else math.inf
+    except Exception:
+        return math.inf
+
+def choose_d(values, max_d=2, alpha=0.05):
+    """Smallest differencing order whose series passes the ADF unit-root test."""
+    for d in range(max_d):
+        diffed = np.diff(values, n=d) if d else values
+        if adfuller(diffed, autolag='AIC')[1] < alpha:
+            return d
+    return max_d
+
+def select_order(values, criterion='aic', max_p=5, max_q=5, max_d=2, executor=None):
+    """
+    Pick the (p, d, q) with the lowest ``criterion``.
+
+    ``d`` comes from ADF tests; (p, q) candidates are fitted in rounds of
+    increasing p + q, each round in parallel on ``executor`` when given.
+    The search stops at the first round that does not beat the best order
+    so far, which skips most of the large, slow-to-fit orders.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    d = choose_d(values, max_d)
+    best_order, best_score = None, math.inf
+    for k in range(max_p + max_q + 1):
+        orders = [(p, d, k - p) for p in range(max(0, k - max_q), min(k, max_p) + 1)]
+        if executor is not None:
+            scores = list(executor.map(score_order, itertools.repeat(values), orders,
+                                       itertools.repeat(criterion)))
+        else:
+            scores = [score_order(values, order, criterion) for order in orders]
+        round_score, round_order = min(zip(scores, orders))
+        if round_score >= best_score:
+            break
+        best_score, best_order = round_score, round_order
+    if best_order is None:
+        raise ValueError("No ARIMA order could be fitted")
+    logger.info(f"Selected ARIMA{best_order} ({criterion.upper()} {best_score:.1f})")
+    return best_order
+
+class AutoARIMAForecaster(ARIMAForecaster):
+    """
+    ARIMA whose order is chosen by ``select_order``. The search runs on the
+    last ``search_window`` observations; the chosen order is then fitted on
+    the full series. Pass ``order`` to ``fit`` to skip the search, e.g. with
+    an order cached from an earlier fit of the same ticker.
+    """
+    def __init__(self, criterion='aic', max_p=5, max_q=5, max_d=2, search_window=500,
+                 interval_width=0.8):
+        if criterion not in ('aic', 'bic'):
+            raise ValueError(f"criterion must be 'aic' or 'bic', not {criterion!r}")
+        super().__init__(order=(0, 0, 0), interval_width=interval_width)
+        self.criterion = criterion
+        self.max_p, self.max_q, self.max_d = max_p, max_q, max_d
+        self.search_window = search_window
+    def fit(self, series: pd.Series, order=None, executor=None):
+        if order is None:
+            values = np.asarray(series, dtype=np.float64)[-self.search_window:]
+            order = select_order(values, self.criterion, self.max_p, self.max_q, self.max_d, executor)
+        self.order = tuple(order)
+        super().fit(series)
@@ -0,0 +1,122 @@
+"""
+Rolling-origin backtests of the forecasting models.
+
+Each (ticker, model) pair is evaluated at several cutoffs: the model is fitted
+on the bars up to a cutoff and scored on the ``horizon`` bars after it. The
+folds of one pair run in order in the same process so fitted state carries
+over: Prophet warm-starts from the previous fold, auto-ARIMA keeps the order
+found on the first fold and the LSTM network keeps training from the
+previous fold's weights on each later fold's window. Pairs run in parallel.
+"""
+import logging
+import resource
+import time
+from concurrent.futures import as_completed
+
+import numpy as np
+import pandas as pd
+
+from .service import build_forecaster
+from ..jobs import make_pool
+
+logger = logging.getLogger(__name__)
+
+
+def rolling_origins(n: int, horizon: int, folds: int, min_train: int) -> list:
+    """Training lengths for ``folds`` evenly spaced cutoffs, the last leaving ``horizon`` bars to score."""
+    last = n - horizon
+    if last < min_train:
+        raise ValueError(f"{n} bars cannot hold {min_train} training and {horizon} test bars")
+    step = (last - min_train) // (folds - 1) if folds > 1 else 0
+    return sorted({last - i * step for i in range(folds)})
+
+
+def score(actual, predicted) -> dict:
+    """MAPE (percent) and RMSE of ``predicted`` against ``actual``."""
+    actual = np.asarray(actual, dtype=np.float64)
+    predicted = np.asarray(predicted, dtype=np.float64)
+    error = predicted - actual
+    return {'mape': float(np.mean(np.abs(error / actual)) * 100),
+            'rmse': float(np.sqrt(np.mean(error ** 2)))}
+
+
+def _fit(model, params, train, previous):
+    """Fit ``model`` on ``train``, reusing the previous fold's forecaster where the model allows."""
+    if model == 'lstm' and previous is not None:
+        previous.update(train)
+        return previous
+    forecaster = build_forecaster(model, params)
+    if model == 'prophet' and previous is not None:
+        try:
+            forecaster.fit(train, init=previous.warm_start_params())
+            return forecaster
+        except Exception as e:
+            logger.warning(f"Prophet warm start failed, fitting cold: {str(e)}")
+            forecaster = build_forecaster(model, params)
+    if model == 'auto_arima':
+        forecaster.fit(train['close'], order=previous.order if previous is not None else None)
+    elif model == 'arima':
+        forecaster.fit(train['close'])
+    else:
+        forecaster.fit(train)
+    return forecaster
+
+
+def backtest_ticker(ticker: str, df: pd.DataFrame, model: str, params: dict = None,
+                    horizon: int = 30, folds: int = 5, min_train: int = 250) -> list:
+    """Score ``model`` on every fold of one ticker; returns one dict per fold."""
+    rows, previous = [], None
+    for cutoff in rolling_origins(len(df), horizon, folds, min_train):
+        train, test = df.iloc[:cutoff], df['close'].iloc[cutoff:cutoff + horizon]
+        started = time.perf_counter()
+        forecaster = _fit(model, params or {}, train, previous)
+        fitted = time.perf_counter()
+        forecast = forecaster.predict(horizon)
+        predicted = time.perf_counter()
+        yhat = forecast['yhat'] if isinstance(forecast, pd.DataFrame) else forecast
+        # Step i of the forecast is scored against the i-th bar after the cutoff
+        rows.append({'ticker': ticker, 'model': model, 'cutoff': str(train.index[-1].date()),
+                     'train_bars': cutoff, **score(test.to_numpy(), np.asarray(yhat)[:len(test)]),
+                     'fit_s': fitted - started, 'predict_s': predicted - fitted})
+        previous = forecaster
+    # Linux reports ru_maxrss in KiB; the process peak covers every fold
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    for row in rows:
+        row['peak_mb'] = peak_mb
+    return rows
+
+
+def run_backtest(frames: dict, models, params: dict = None, horizon: int = 30, folds: int = 5,
+                 min_train: int = 250, workers: int = None) -> pd.DataFrame:
+    """
+    Backtest every model on every ticker in ``frames`` and return one row
+    per fold. ``params`` maps model name to constructor parameters. With
+    ``workers`` > 1 each (ticker, model) pair runs in a fresh pool process,
+    so ``peak_mb`` is that pair's own peak resident memory.
+    """
+    params = params or {}
+    tasks = [(ticker, df, model, params.get(model), horizon, folds, min_train)
+             for ticker, df in frames.items() for model in models]
+    rows = []
+    if workers is not None and workers <= 1:
+        for task in tasks:
+            rows.extend(backtest_ticker(*task))
+        return pd.DataFrame(rows)
+
+    with make_pool(workers, max_tasks_per_child=1) as pool:
+        futures = {pool.submit(backtest_ticker, *task): (task[0], task[2]) for task in tasks}
+        for future in as_completed(futures):
+            ticker, model = futures[future]
+            try:
+                rows.extend(future.result())
+            except Exception as e:
+                logger.warning(f"Backtest of {model} on {ticker} failed: {str(e)}")
+    return pd.DataFrame(rows)
+
+
+def summarize(results: pd.DataFrame) -> pd.DataFrame:
+    """Per-model accuracy and cost: mean error and timings, worst peak memory."""
+    return results.groupby('model').agg(
+        folds=('mape', 'size'), mape=('mape', 'mean'), rmse=('rmse', 'mean'),
+        fit_s=('fit_s', 'mean'), predict_s=('predict_s', 'mean'), peak_mb=('peak_mb', 'max'),
+    ).sort_values('mape')
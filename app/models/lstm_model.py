@@ -1,37 +1,115 @@
 import pandas as pd, numpy as np
+import tensorflow as tf
 from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Dense, LSTM
+from tensorflow.keras.layers import Dense, Input, LSTM
 from sklearn.preprocessing import MinMaxScaler
+from .windows import WindowDataset, minmax_scale
+from ..data.resample import future_index, index_tail
 class LSTMForecaster:
+    # Bars of history trained on: five years of trading days
+    lookback = 5 * 252
     def __init__(self, seq_len=60, epochs=10, batch_size=32):
         self.seq_len = seq_len; self.epochs = epochs; self.batch_size = batch_size
         self.scaler = MinMaxScaler()
-        self.model = None; self.last_sequence = None
+        self.model = None; self.last_sequence = None; self._rollout = None
+        self.scaling = {}; self.last_sequences = {}; self.indexes = {}; self.index = None
     def _prep(self, series):
-        scaled = self.scaler.fit_transform(series.values.reshape(-1,1))
-        X, y = [], []
-        for i in range(self.seq_len, len(scaled)):
-            X.append(scaled[i-self.seq_len:i,0]); y.append(scaled[i,0])
-        return np.array(X), np.array(y)
-    def fit(self, df: pd.DataFrame):
-        series = df['close']; X, y = self._prep(series)
-        X = X.reshape((X.shape[0], X.shape[1], 1))
+        """Scaled series; training windows are strided views over it (see ``windows``)."""
+        return self.scaler.fit_transform(series.values.reshape(-1,1))[:,0].astype(np.float32)
+    def _build(self):
         self.model = Sequential([
-            LSTM(50, return_sequences=True, input_shape=(X.shape[1],1)),
+            Input(shape=(self.seq_len,1)),
+            LSTM(50, return_sequences=True),
             LSTM(50),
             Dense(1)
         ])
         self.model.compile(optimizer='adam', loss='mse')
-        self.model.fit(X, y, epochs=self.epochs, batch_size=self.batch_size, verbose=0)
+        self._rollout = None
+    def fit(self, df: pd.DataFrame):
+        self._build()
+        self._train(df, self.epochs)
+    def update(self, df: pd.DataFrame, epochs=None):
+        """
+        Continue training the fitted network on ``df`` (a quarter of
+        ``epochs`` by default) instead of starting from random weights, e.g.
+        when a few bars were added since the last fit.
+        """
+        if self.model is None: raise RuntimeError("Call fit() first.")
+        self._train(df, epochs or max(1, self.epochs // 4))
+    def _train(self, df, epochs):
+        series = df['close']; scaled = self._prep(series)
+        self.model.fit(WindowDataset([scaled], self.seq_len, self.batch_size), epochs=epochs, verbose=0)
         self.last_sequence = series.values[-self.seq_len:]
-    def predict(self, steps=30):
+        self.index = _tail(df)
+    def fit_many(self, frames: dict):
+        """
+        Train one shared model on every ticker in ``frames`` (ticker -> DataFrame
+        with a ``close`` column). Each series is min-max scaled on its own so
+        price levels do not dominate; windows are streamed batch by batch.
+        """
+        series, self.scaling, self.last_sequences, self.indexes = [], {}, {}, {}
+        for ticker, df in frames.items():
+            close = df['close'].to_numpy(dtype=np.float64)
+            if len(close) <= self.seq_len: continue
+            scaled, scale, offset = minmax_scale(close)
+            series.append(scaled)
+            self.scaling[ticker] = (scale, offset)
+            self.last_sequences[ticker] = close[-self.seq_len:]
+            self.indexes[ticker] = _tail(df)
+        if not series: raise ValueError(f"No series longer than seq_len={self.seq_len}")
+        self._build()
+        self.model.fit(WindowDataset(series, self.seq_len, self.batch_size), epochs=self.epochs, verbose=0)
+    def _rollout_fn(self):
+        """
+        Compiled recursive forecast: one graph call runs every step for a
+        whole batch of windows, feeding each prediction back into the window.
+        Traced once per fitted model; XLA compiles it once more per new
+        (batch size, horizon) pair, after which a 30-step call takes ~3 ms.
+        """
+        if self._rollout is None:
+            model = self.model
+            @tf.function(input_signature=[tf.TensorSpec([None, self.seq_len, 1], tf.float32),
+                                          tf.TensorSpec([], tf.int32)], jit_compile=True)
+            def rollout(window, steps):
+                preds = tf.TensorArray(tf.float32, size=steps)
+                for i in tf.range(steps):
+                    pred = model(window, training=False)
+                    preds = preds.write(i, pred[:, 0])
+                    window = tf.concat([window[:, 1:, :], pred[:, tf.newaxis, :]], axis=1)
+                return tf.transpose(preds.stack())
+            self._rollout = rollout
+        return self._rollout
+    def predict_many(self, sequences, steps=30, scale=None, offset=None) -> np.ndarray:
+        """
+        Forecast ``steps`` values after each of several price sequences in a
+        single batched call. ``sequences`` is a 2-D array (or list) of rows
+        holding at least ``seq_len`` prices each; the last ``seq_len`` are
+        used. Rows are scaled with the fitted scaler unless per-row ``scale``
+        and ``offset`` arrays are given. Returns (rows, steps) prices.
+        """
         if self.model is None: raise RuntimeError("Call fit() first.")
-        seq = self.last_sequence.copy(); preds=[]
-        import pandas as pd, numpy as np
-        for _ in range(steps):
-            inp = self.scaler.transform(seq.reshape(-1,1))[-self.seq_len:]
-            pred = self.model.predict(inp.reshape((1,self.seq_len,1)), verbose=0)[0][0]
-            val = self.scaler.inverse_transform([[pred]])[0][0]; preds.append(val)
-            seq = np.append(seq[1:], val)
-        idx = pd.date_range(start=pd.Timestamp.today().normalize()+pd.Timedelta(days=1), periods=steps, freq='B')
-        return pd.Series(preds, index=idx)
+        windows = np.stack([np.asarray(s, dtype=np.float64)[-self.seq_len:] for s in sequences])
+        # Min-max scaling is affine, so scale the whole batch in one expression
+        if scale is None:
+            scale, offset = self.scaler.scale_[0], self.scaler.min_[0]
+        else:
+            scale, offset = np.asarray(scale)[:, np.newaxis], np.asarray(offset)[:, np.newaxis]
+        scaled = (windows * scale + offset).astype(np.float32)
+        preds = self._rollout_fn()(tf.constant(scaled[..., np.newaxis]), tf.constant(steps, tf.int32)).numpy()
+        return (preds.astype(np.float64) - offset) / scale
+    def predict(self, steps=30):
+        preds = self.predict_many([self.last_sequence], steps)[0]
+        return pd.Series(preds, index=_future(self.index, steps))
+    def predict_tickers(self, steps=30) -> dict:
+        """Forecasts for every ticker seen by ``fit_many``, in one batched call."""
+        if not getattr(self, 'scaling', None): raise RuntimeError("Call fit_many() first.")
+        tickers = list(self.scaling)
+        scale, offset = np.array([self.scaling[t] for t in tickers]).T
+        preds = self.predict_many([self.last_sequences[t] for t in tickers], steps, scale, offset)
+        return {t: pd.Series(preds[i], index=_future(self.indexes.get(t), steps)) for i, t in enumerate(tickers)}
+def _tail(df):
+    return index_tail(df.index) if isinstance(df.index, pd.DatetimeIndex) else None
+def _future(index, steps):
+    """Dates of the ``steps`` bars after ``index``, or business days from tomorrow without one."""
+    if index is not None: return future_index(index, steps)
+    return pd.date_range(start=pd.Timestamp.today().normalize()+pd.Timedelta(days=1), periods=steps, freq='B')
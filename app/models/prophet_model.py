@@ -1,25 +1,211 @@
 from prophet import Prophet
+from prophet.serialize import model_to_json, model_from_json
+from statistics import NormalDist
+from ..cache import make_key
+from ..config import Config
+from ..data.resample import future_index
+from ..utils import metrics
+import numpy as np
 import pandas as pd
+import json
+import logging
+import os
+import re
+import tempfile
+
+logger = logging.getLogger(__name__)
 
 class ProphetForecaster:
-    def __init__(self, daily_seasonality=True):
+    # Bars of history fitted on: five years of trading days
+    lookback = 5 * 252
+
+    # Constructor options that only affect prediction
+    PREDICT_OPTIONS = ('uncertainty_samples', 'fast')
+
+    def __init__(self, daily_seasonality=True, uncertainty_samples=None, fast=None):
+        """
+        ``uncertainty_samples`` is the number of simulated draws behind the
+        forecast intervals (``PROPHET_UNCERTAINTY_SAMPLES`` by default). With
+        ``fast`` (``PROPHET_FAST``) no draws are simulated and the intervals
+        are computed analytically instead.
+        """
+        self.daily_seasonality = daily_seasonality
         self.model = Prophet(daily_seasonality=daily_seasonality)
-        
-    def fit(self, df: pd.DataFrame):
+        self.tz = None
+        self._set_predict_options(uncertainty_samples, fast)
+
+    def _set_predict_options(self, uncertainty_samples=None, fast=None):
+        self.uncertainty_samples = Config.PROPHET_UNCERTAINTY_SAMPLES if uncertainty_samples is None \
+            else int(uncertainty_samples)
+        self.fast = Config.PROPHET_FAST if fast is None else bool(fast)
+
+    def fit(self, df: pd.DataFrame, init: dict = None):
+        """
+        Fit on the ``close`` column of ``df``. ``init`` optionally gives Stan
+        starting values, e.g. ``warm_start_params()`` of an earlier fit.
+        """
         # Make sure the df has a 'close' column
         if 'close' not in df.columns:
             raise ValueError("DataFrame must have a 'close' column")
-            
+
         # Reset index to convert the date index to a column, and rename for Prophet
         df_ = df[['close']].reset_index().rename(columns={'date':'ds','close':'y'})
-        
+        # Prophet takes no time zones: fit on exchange wall-clock times
+        self.tz = getattr(df.index, 'tz', None)
+        if self.tz is not None:
+            df_['ds'] = df_['ds'].dt.tz_localize(None)
+
         # Ensure y is numeric
         df_['y'] = pd.to_numeric(df_['y'])
-        
-        self.model.fit(df_)
-        
+
+        if init is not None:
+            self.model.fit(df_, init=init)
+        else:
+            self.model.fit(df_)
+
     def predict(self, steps: int = 30) -> pd.DataFrame:
-        future = self.model.make_future_dataframe(periods=steps)
+        return self.predict_many([steps])[steps]
+
+    def predict_many(self, horizons) -> dict:
+        """
+        Forecasts for several horizons from one prediction over the longest,
+        as ``{steps: frame}`` with ``ds`` as index and all Prophet columns.
+        Only the future dates are evaluated, not the history. Daily fits
+        predict calendar days, as Prophet does; other bar intervals predict
+        the bars that follow the history (``future_index``).
+        """
+        history = pd.DatetimeIndex(self.model.history['ds'])
+        spacing = history[-50:].to_series().diff().median() if len(history) > 1 else pd.Timedelta(days=1)
+        if pd.Timedelta(hours=20) <= spacing < pd.Timedelta(days=5):
+            future = self.model.make_future_dataframe(periods=max(horizons), include_history=False)
+        else:
+            future = pd.DataFrame({'ds': future_index(history, max(horizons))})
+        self.model.uncertainty_samples = 0 if self.fast else self.uncertainty_samples
         forecast = self.model.predict(future)
-        # Return the forecast DataFrame with ds as index, keeping all columns
-        return forecast.set_index('ds')[-steps:]
+        if self.fast:
+            forecast = self.analytic_intervals(forecast)
+        forecast = forecast.set_index('ds')
+        if self.tz is not None:
+            forecast.index = forecast.index.tz_localize(self.tz, ambiguous=False, nonexistent='shift_forward')
+        return {steps: forecast.iloc[:steps] for steps in horizons}
+
+    def analytic_intervals(self, forecast: pd.DataFrame) -> pd.DataFrame:
+        """
+        ``forecast`` with ``yhat_lower``/``yhat_upper`` from a normal
+        approximation of what Prophet's simulation measures: observation
+        noise ``sigma_obs`` plus the variance of the future trend changes.
+        Changepoints arrive at rate S (the number of fitted changepoints) per
+        unit of scaled time past the history, each changing the slope by a
+        Laplace(0, lambda) amount, so the trend variance at scaled time t is
+        ``2 S lambda^2 (t - 1)^3 / 3``.
+        """
+        model = self.model
+        sigma_obs = float(np.ravel(model.params['sigma_obs'])[0])
+        lambda_ = float(np.mean(np.abs(model.params['delta'][0]))) + 1e-8
+        t = ((forecast['ds'] - model.start) / model.t_scale).to_numpy(dtype=np.float64)
+        ahead = np.clip(t - 1, 0, None)
+        trend_var = 2 * len(model.changepoints_t) * lambda_ ** 2 * ahead ** 3 / 3
+        sd = model.y_scale * np.sqrt(sigma_obs ** 2 + trend_var)
+        z = NormalDist().inv_cdf(0.5 + model.interval_width / 2)
+        yhat = forecast['yhat'].to_numpy(dtype=np.float64)
+        return forecast.assign(yhat_lower=yhat - z * sd, yhat_upper=yhat + z * sd)
+
+    @property
+    def cutoff(self):
+        """Last training date, or None before fitting."""
+        history = getattr(self.model, 'history', None)
+        return None if history is None else history['ds'].max()
+
+    def warm_start_params(self) -> dict:
+        """Fitted parameters in the shape Stan accepts as ``init``."""
+        params = self.model.params
+        init = {name: float(params[name][0][0]) for name in ('k', 'm', 'sigma_obs')}
+        init.update({name: params[name][0] for name in ('delta', 'beta')})
+        return init
+
+    def to_json(self) -> str:
+        return model_to_json(self.model)
+
+    @classmethod
+    def from_json(cls, payload: str, **options) -> 'ProphetForecaster':
+        """Load a saved model; ``options`` may hold the ``PREDICT_OPTIONS`` to predict with."""
+        forecaster = cls.__new__(cls)
+        forecaster.model = model_from_json(payload)
+        forecaster.daily_seasonality = forecaster.model.daily_seasonality
+        forecaster.tz = None
+        forecaster._set_predict_options(**{k: v for k, v in options.items() if k in cls.PREDICT_OPTIONS})
+        return forecaster
+
+class ProphetModelStore:
+    """
+    Fitted Prophet models saved per ticker and parameter set.
+
+    ``fit`` reuses the saved model untouched when the training data has not
+    changed since it was fitted, and otherwise refits starting Stan from the
+    saved parameters, which needs far fewer optimizer iterations than a
+    cold start when only a few bars were added.
+    """
+
+    def __init__(self, root):
+        self.root = str(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, ticker, params):
+        safe = re.sub(r'[^A-Za-z0-9_.-]', '_', ticker.upper())
+        # Predict-only options are applied on load and do not change the fit
+        fit_params = {k: v for k, v in params.items() if k not in ProphetForecaster.PREDICT_OPTIONS}
+        return os.path.join(self.root, f"{safe}_{make_key(fit_params)[:12]}.json")
+
+    def load(self, ticker, params=None):
+        """Return ``(forecaster, meta)`` for the saved model, or ``(None, None)``."""
+        try:
+            with open(self._path(ticker, params or {})) as f:
+                saved = json.load(f)
+            return ProphetForecaster.from_json(saved['model'], **(params or {})), saved['meta']
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Ignoring unreadable Prophet model for {ticker}: {str(e)}")
+            return None, None
+
+    def save(self, ticker, forecaster, params=None, fingerprint=None):
+        meta = {'cutoff': str(forecaster.cutoff), 'fingerprint': fingerprint}
+        payload = json.dumps({'model': forecaster.to_json(), 'meta': meta})
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(payload)
+            os.replace(tmp, self._path(ticker, params or {}))
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+    def fit(self, ticker, df: pd.DataFrame, params: dict = None, fingerprint: str = None) -> ProphetForecaster:
+        """Return a forecaster fitted on ``df``, reusing or warm-starting from the saved model."""
+        params = params or {}
+        previous, meta = self.load(ticker, params)
+        # Fits are on wall-clock times, so the saved cutoff has no time zone
+        cutoff = str(pd.Timestamp(df.index[-1]).tz_localize(None))
+        if previous is not None and fingerprint is not None \
+                and meta.get('fingerprint') == fingerprint and meta.get('cutoff') == cutoff:
+            logger.info(f"Reusing saved Prophet model for {ticker} (cutoff {cutoff})")
+            previous.tz = getattr(df.index, 'tz', None)
+            return previous
+
+        forecaster = ProphetForecaster(**params)
+        init = None
+        if previous is not None:
+            logger.info(f"Warm-starting Prophet for {ticker} from cutoff {meta.get('cutoff')}")
+            init = previous.warm_start_params()
+        try:
+            forecaster.fit(df, init=init)
+        except Exception as e:
+            if init is None:
+                raise
+            # A changed parameter layout cannot seed the optimizer; fit cold
+            logger.warning(f"Warm start failed for {ticker}, refitting from scratch: {str(e)}")
+            forecaster = ProphetForecaster(**params)
+            forecaster.fit(df)
+        metrics.inc('model_fits_total', model='prophet')
+        self.save(ticker, forecaster, params, fingerprint)
+        return forecaster
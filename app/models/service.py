@@ -0,0 +1,202 @@
+import hashlib
+import logging
+import multiprocessing
+import os
+from concurrent.futures import as_completed
+import pandas as pd
+from ..cache import ResultCache, make_key
+from ..config import Config
+from ..jobs import make_pool
+from ..utils import metrics, timed
+from . import get_forecaster, model_available
+
+logger = logging.getLogger(__name__)
+
+forecast_cache = ResultCache(Config.FORECAST_CACHE_PATH,
+                             ttl=Config.FORECAST_CACHE_TTL,
+                             max_bytes=Config.FORECAST_CACHE_MAX_BYTES,
+                             name='forecasts')
+
+_prophet_models = None
+
+def prophet_model_store():
+    """Saved Prophet models, created on first use so Prophet is imported lazily."""
+    global _prophet_models
+    if _prophet_models is None:
+        from .prophet_model import ProphetModelStore
+        _prophet_models = ProphetModelStore(Config.PROPHET_MODEL_DIR)
+    return _prophet_models
+
+_arima_orders = None
+_search_pool = None
+_search_pool_pid = None
+
+def arima_order_cache():
+    """ARIMA orders chosen per ticker, reused until ``ARIMA_ORDER_TTL`` expires."""
+    global _arima_orders
+    if _arima_orders is None:
+        _arima_orders = ResultCache(Config.ARIMA_ORDER_CACHE_PATH, ttl=Config.ARIMA_ORDER_TTL,
+                                    max_bytes=16 * 1024 * 1024, name='arima_orders')
+    return _arima_orders
+
+def arima_search_pool():
+    """
+    Per-process pool for ARIMA order searches, or None to search serially.
+    Processes of another pool (forecast jobs, batches, cache warming)
+    already fit in parallel and always search serially, rather than each
+    starting a pool of their own.
+    """
+    global _search_pool, _search_pool_pid
+    workers = Config.ARIMA_SEARCH_WORKERS or os.cpu_count()
+    if workers <= 1 or multiprocessing.parent_process() is not None:
+        return None
+    if _search_pool is None or _search_pool_pid != os.getpid() or getattr(_search_pool, '_broken', False):
+        _search_pool = make_pool(workers)
+        _search_pool_pid = os.getpid()
+    return _search_pool
+
+def fit_auto_arima(df: pd.DataFrame, params: dict = None, ticker: str = None):
+    """Fit an auto-ARIMA, reusing the order found for ``ticker`` on an earlier fit."""
+    forecaster = build_forecaster('auto_arima', params)
+    key = make_key('arima-order', ticker.upper(), params or {}) if ticker else None
+    order = arima_order_cache().get(key) if key else None
+    if order is None:
+        forecaster.fit(df['close'], executor=arima_search_pool())
+        if key:
+            arima_order_cache().set(key, forecaster.order)
+    else:
+        logger.info(f"Reusing ARIMA{tuple(order)} for {ticker}")
+        forecaster.fit(df['close'], order=order)
+    return forecaster
+
+def model_lookback(model: str):
+    """Bars of history ``model`` is fitted on, or None for all of them."""
+    forecaster_cls = get_forecaster(model) if model_available(model) else None
+    return getattr(forecaster_cls, 'lookback', None)
+
+def data_fingerprint(df: pd.DataFrame, columns=('close',)) -> str:
+    """Hash of the dates and values a forecast is fitted on."""
+    h = hashlib.sha1(pd.DatetimeIndex(df.index).asi8.tobytes())
+    for col in columns:
+        h.update(df[col].to_numpy(dtype='float64').tobytes())
+    return h.hexdigest()
+
+def build_forecaster(model: str = 'prophet', params: dict = None):
+    forecaster_cls = get_forecaster(model) if model_available(model) else None
+    if forecaster_cls is None:
+        raise ValueError(f"Unknown or unavailable model {model!r}")
+    return forecaster_cls(**(params or {}))
+
+def run_forecast(df: pd.DataFrame, horizon: int, model: str = 'prophet', params: dict = None,
+                 ticker: str = None) -> pd.DataFrame:
+    """
+    Fit ``model`` on ``df`` and return a forecast frame with at least a
+    ``yhat`` column. With a ``ticker``, Prophet models are persisted and
+    reused or warm-started on later calls, and auto-ARIMA reuses the order
+    it selected for that ticker.
+    """
+    with timed('fit', model=model):
+        if model == 'prophet' and ticker:
+            # Counts its own fits; a saved model may be reused as is
+            forecaster = prophet_model_store().fit(ticker, df, params, fingerprint=data_fingerprint(df))
+        else:
+            if model == 'auto_arima':
+                forecaster = fit_auto_arima(df, params, ticker)
+            else:
+                forecaster = build_forecaster(model, params)
+                forecaster.fit(df['close'] if model == 'arima' else df)
+            metrics.inc('model_fits_total', model=model)
+    with timed('predict', model=model):
+        forecast = forecaster.predict(horizon)
+    if isinstance(forecast, pd.Series):
+        forecast = forecast.to_frame('yhat')
+    return forecast
+
+def series_name(ticker: str, interval: str = '1d') -> str:
+    """Name a ticker's fitted state (saved Prophet models, ARIMA orders) is kept under for ``interval`` bars."""
+    return ticker if interval == '1d' else f"{ticker}@{interval}"
+
+def get_forecast(ticker: str, df: pd.DataFrame, horizon: int, model: str = 'prophet',
+                 params: dict = None, interval: str = '1d') -> pd.DataFrame:
+    """
+    Cached ``run_forecast``: identical ticker, model, parameters, horizon and
+    input data reuse the forecast computed by any worker process. Only the
+    model's ``lookback`` bars of ``df`` (``interval`` bars) are used.
+    """
+    lookback = model_lookback(model)
+    if lookback:
+        df = df.iloc[-lookback:]
+    key = make_key('forecast', ticker.upper(), model, params or {}, horizon, data_fingerprint(df))
+    def compute():
+        logger.info(f"Forecast cache miss for {ticker} ({model}, horizon {horizon})")
+        return run_forecast(df, horizon, model, params, ticker=series_name(ticker, interval))
+    return forecast_cache.get_or_compute(key, compute)
+
+def forecast_records(forecast_df: pd.DataFrame) -> list:
+    """JSON-friendly rows of a forecast frame: date plus yhat and its bounds."""
+    rows = pd.DataFrame({'ds': pd.DatetimeIndex(forecast_df.index).strftime('%Y-%m-%d %H:%M:%S')})
+    for col in ('yhat', 'yhat_lower', 'yhat_upper'):
+        if col in forecast_df.columns:
+            rows[col] = forecast_df[col].to_numpy(dtype='float64')
+    return rows.to_dict(orient='records')
+
+def iter_linear_forecasts(frames: dict, horizon: int, params: dict = None):
+    """
+    Linear forecasts for every ticker in ``frames``: cached ones as they
+    are, all others from one batched fit. Yields ``(ticker, forecast_df,
+    error)`` and caches under the same keys as ``get_forecast``.
+    """
+    from .linear_model import forecast_universe
+    lookback = model_lookback('linear')
+    keys, missing = {}, {}
+    for ticker, df in frames.items():
+        df = df.iloc[-lookback:]
+        keys[ticker] = make_key('forecast', ticker.upper(), 'linear', params or {}, horizon, data_fingerprint(df))
+        cached = forecast_cache.get(keys[ticker])
+        if cached is not None:
+            yield ticker, cached, None
+        else:
+            missing[ticker] = df
+    if not missing:
+        return
+    logger.info(f"Fitting linear forecasts for {len(missing)} tickers in one batch")
+    try:
+        with timed('fit', model='linear'):
+            forecasts, errors = forecast_universe(missing, horizon, **(params or {}))
+    except Exception as e:
+        logger.warning(f"Batched linear fit failed: {str(e)}")
+        forecasts, errors = {}, {ticker: str(e) for ticker in missing}
+    metrics.inc('model_fits_total', len(forecasts), model='linear')
+    for ticker, forecast in forecasts.items():
+        forecast_cache.set(keys[ticker], forecast)
+        yield ticker, forecast, None
+    for ticker, error in errors.items():
+        yield ticker, None, error
+
+def iter_batch_forecasts(frames: dict, horizon: int, executor, model: str = 'prophet',
+                         params: dict = None):
+    """
+    Fit one forecast per ticker on ``executor`` and yield
+    ``(ticker, forecast_df, error)`` in completion order. Linear forecasts
+    are fitted together in this process instead.
+    """
+    if model == 'linear':
+        yield from iter_linear_forecasts(frames, horizon, params)
+        return
+    # Only the bars the model fits on are sent to the pool processes
+    lookback = model_lookback(model)
+    futures = {executor.submit(get_forecast, ticker, df.iloc[-lookback:] if lookback else df,
+                               horizon, model, params): ticker
+               for ticker, df in frames.items()}
+    try:
+        for future in as_completed(futures):
+            ticker = futures[future]
+            try:
+                yield ticker, future.result(), None
+            except Exception as e:
+                logger.warning(f"Batch forecast for {ticker} failed: {str(e)}")
+                yield ticker, None, str(e)
+    finally:
+        # Stop queued fits when the consumer goes away early
+        for future in futures:
+            future.cancel()
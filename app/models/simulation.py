@@ -0,0 +1,149 @@
+"""
+Monte Carlo price scenarios: a distribution of outcomes rather than a point
+forecast.
+
+Paths are simulated from a ticker's daily log returns over the last
+``window`` bars, either as geometric Brownian motion (the random walk
+``get_fallback_data`` draws, with drift and volatility fitted to the
+history) or by bootstrapping the observed returns. All paths of a chunk are
+one ``(paths, horizon)`` array: a single draw of random numbers and a
+cumulative sum along the horizon, with no per-path loop. Chunks are sized
+to ``chunk_bytes`` and only the prices at the reported steps are kept, so
+memory stays bounded however many paths are asked for.
+"""
+import zlib
+from concurrent.futures import as_completed
+
+import numpy as np
+import pandas as pd
+
+from ..data.resample import future_index
+from ..utils import timed
+
+METHODS = ('gbm', 'bootstrap')
+PERCENTILES = (5, 25, 50, 75, 95)
+VAR_LEVELS = (0.95, 0.99)
+
+
+def log_returns(close, window: int = 252) -> np.ndarray:
+    """Daily log returns of the last ``window`` bars of ``close``, NaNs dropped."""
+    close = np.asarray(close, dtype=np.float64)[-(window + 1):]
+    returns = np.diff(np.log(close))
+    return returns[np.isfinite(returns)]
+
+
+def band_steps(horizon: int, max_steps: int = 60) -> np.ndarray:
+    """Steps (1-based) the percentile bands are reported at: all of them, or ``max_steps`` spread evenly."""
+    if horizon <= max_steps:
+        return np.arange(1, horizon + 1)
+    return np.unique(np.linspace(1, horizon, max_steps).round().astype(np.int64))
+
+
+def simulate_chunks(returns, horizon: int, n_paths: int, method: str = 'gbm', rng=None,
+                    chunk_bytes: int = 32 * 1024 * 1024):
+    """
+    Yield ``(paths, horizon)`` arrays of cumulative log returns, together
+    covering ``n_paths`` paths. Each chunk holds at most about
+    ``chunk_bytes`` of float64s.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown simulation method {method!r}")
+    returns = np.asarray(returns, dtype=np.float64)
+    if len(returns) < 2:
+        raise ValueError("At least two returns are needed to simulate")
+    rng = rng if rng is not None else np.random.default_rng()
+    chunk = max(1, min(n_paths, chunk_bytes // (8 * horizon)))
+    mu, sigma = returns.mean(), returns.std(ddof=1)
+    for start in range(0, n_paths, chunk):
+        size = (min(chunk, n_paths - start), horizon)
+        if method == 'gbm':
+            # The mean log return already includes the -sigma^2/2 drift correction
+            steps = rng.standard_normal(size)
+            steps *= sigma
+            steps += mu
+        else:
+            steps = returns[rng.integers(0, len(returns), size)]
+        yield np.cumsum(steps, axis=1, out=steps)
+
+
+@timed('simulate')
+def simulate(df: pd.DataFrame, horizon: int = 30, n_paths: int = 10000, method: str = 'gbm',
+             window: int = 252, seed=None, percentiles=PERCENTILES, levels=VAR_LEVELS,
+             chunk_bytes: int = 32 * 1024 * 1024) -> dict:
+    """
+    Simulate ``n_paths`` price paths ``horizon`` business days past the end
+    of ``df`` (a frame with a ``close`` column).
+
+    Returns a dict with ``bands`` (a frame of price percentiles per reported
+    step, indexed by date), ``var`` and ``cvar`` (value at risk and expected
+    shortfall of the final price per confidence level, as positive losses in
+    price and percent), ``last_price``, ``expected_price`` and
+    ``prob_loss``.
+    """
+    close = df['close'].to_numpy(dtype=np.float64)
+    last_price = float(close[-1])
+    returns = log_returns(close, window)
+    steps = band_steps(horizon)
+    rng = np.random.default_rng(seed)
+
+    kept = np.empty((n_paths, len(steps)), dtype=np.float32)
+    final = np.empty(n_paths, dtype=np.float64)
+    row = 0
+    for cumulative in simulate_chunks(returns, horizon, n_paths, method, rng, chunk_bytes):
+        n = len(cumulative)
+        kept[row:row + n] = np.exp(cumulative[:, steps - 1]) * last_price
+        final[row:row + n] = np.exp(cumulative[:, -1]) * last_price
+        row += n
+
+    dates = future_index(df.index, horizon)[steps - 1]
+    bands = pd.DataFrame(np.percentile(kept, percentiles, axis=0).T,
+                         index=pd.DatetimeIndex(dates, name='ds'), columns=[f"p{p}" for p in percentiles])
+
+    losses = last_price - final
+    var, cvar = {}, {}
+    for level in levels:
+        threshold = float(np.quantile(losses, level))
+        tail = float(losses[losses >= threshold].mean())
+        var[str(level)] = {'price': threshold, 'pct': threshold / last_price * 100}
+        cvar[str(level)] = {'price': tail, 'pct': tail / last_price * 100}
+    return {'method': method, 'paths': n_paths, 'horizon': horizon, 'last_price': last_price,
+            'expected_price': float(final.mean()), 'prob_loss': float((losses > 0).mean()),
+            'bands': bands, 'var': var, 'cvar': cvar}
+
+
+def band_records(bands: pd.DataFrame) -> list:
+    """JSON-friendly rows of a ``bands`` frame: date plus one value per percentile."""
+    rows = bands.astype('float64').reset_index()
+    rows['ds'] = rows['ds'].dt.strftime('%Y-%m-%d')
+    return rows.to_dict(orient='records')
+
+
+def ticker_seed(seed, ticker: str):
+    """Per-ticker seed, so a seeded run gives each ticker its own reproducible stream."""
+    return None if seed is None else [int(seed), zlib.crc32(ticker.encode())]
+
+
+def iter_simulations(frames: dict, executor=None, seed=None, **kwargs):
+    """
+    Run ``simulate`` for every ticker in ``frames``, in parallel on
+    ``executor`` when one is given, and yield ``(ticker, result, error)``
+    in completion order.
+    """
+    if executor is None:
+        for ticker, df in frames.items():
+            try:
+                yield ticker, simulate(df, seed=ticker_seed(seed, ticker), **kwargs), None
+            except Exception as e:
+                yield ticker, None, str(e)
+        return
+    futures = {executor.submit(simulate, df, seed=ticker_seed(seed, ticker), **kwargs): ticker
+               for ticker, df in frames.items()}
+    try:
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, str(e)
+    finally:
+        for future in futures:
+            future.cancel()
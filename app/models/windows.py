@@ -0,0 +1,76 @@
+"""
+Training windows for sequence models without materialising them.
+
+``sliding_windows`` returns every (window, next value) pair of a series as
+strided views over the series itself, so 6,000 bars with a 60-bar window
+cost 6,000 floats rather than 360,000. ``WindowDataset`` streams shuffled
+mini-batches from any number of such series, copying one batch at a time,
+which lets a single model train over a large ticker universe in bounded
+memory.
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from tensorflow.keras.utils import PyDataset
+
+
+def sliding_windows(values, seq_len):
+    """
+    ``(X, y)`` views over ``values``: ``X[i]`` is ``values[i:i + seq_len]``
+    and ``y[i]`` the value right after it. Both share memory with ``values``.
+    """
+    values = np.asarray(values)
+    if len(values) <= seq_len:
+        return np.empty((0, seq_len), dtype=values.dtype), np.empty(0, dtype=values.dtype)
+    return sliding_window_view(values[:-1], seq_len), values[seq_len:]
+
+
+def minmax_scale(values):
+    """Scale to [0, 1] like MinMaxScaler; returns ``(scaled, scale, offset)`` with ``scaled = values * scale + offset``."""
+    values = np.asarray(values, dtype=np.float64)
+    lo, hi = np.nanmin(values), np.nanmax(values)
+    scale = 1.0 / (hi - lo) if hi > lo else 1.0
+    offset = -lo * scale
+    return (values * scale + offset).astype(np.float32), scale, offset
+
+
+class WindowDataset(PyDataset):
+    """
+    Mini-batches of ``(batch, seq_len, 1)`` windows and ``(batch,)`` targets
+    drawn from one or more already scaled series.
+
+    Only the index of (series, position) pairs is held in full; each batch
+    gathers its windows from the strided views on demand.
+    """
+
+    def __init__(self, series, seq_len, batch_size=32, shuffle=True, seed=None, **kwargs):
+        super().__init__(**kwargs)
+        self.seq_len = seq_len
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.views = [sliding_windows(s, seq_len) for s in series]
+        counts = [len(y) for _, y in self.views]
+        self.series_index = np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+        self.position = np.concatenate([np.arange(c, dtype=np.int64) for c in counts]) if counts \
+            else np.empty(0, dtype=np.int64)
+        self.rng = np.random.default_rng(seed)
+        self.order = np.arange(len(self.position))
+        self.on_epoch_end()
+
+    def __len__(self):
+        return -(-len(self.order) // self.batch_size)
+
+    def __getitem__(self, i):
+        picks = self.order[i * self.batch_size:(i + 1) * self.batch_size]
+        X = np.empty((len(picks), self.seq_len, 1), dtype=np.float32)
+        y = np.empty(len(picks), dtype=np.float32)
+        for s in np.unique(self.series_index[picks]):
+            rows = np.flatnonzero(self.series_index[picks] == s)
+            windows, targets = self.views[s]
+            pos = self.position[picks[rows]]
+            X[rows, :, 0] = windows[pos]
+            y[rows] = targets[pos]
+        return X, y
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.order)
@@ -1 +1,13 @@
-from .pdf_report import build_pdf, dataframe_to_excel
+import importlib
+
+# pdfkit and Jinja are imported when a report is first built, not when the app starts
+_EXPORTS = {
+    'build_pdf': '.pdf_report',
+    'build_pdfs': '.pdf_report',
+    'dataframe_to_excel': '.pdf_report',
+}
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,153 @@
+"""
+In-process PDF reports drawn with matplotlib.
+
+Lays out the same content as ``templates/report.html`` (summary figures,
+price and forecast charts, indicator tables) directly onto A4 pages, so a
+report needs no browser engine, subprocess or X server. Figures use the
+object-oriented API with the Agg-based PDF backend and never touch pyplot's
+global state, so reports can be built from several threads at once.
+"""
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_pdf import PdfPages
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.patches import FancyBboxPatch
+
+from ..visualize.chart_data import downsample
+
+A4 = (8.27, 11.69)
+INK, MUTED, RULE = '#2c3e50', '#7f8c8d', '#eeeeee'
+SIGNAL_COLORS = {'Buy': '#27ae60', 'Strong Buy': '#27ae60', 'Sell': '#e74c3c',
+                 'Strong Sell': '#e74c3c', 'Neutral': '#f39c12'}
+
+
+def _text(fig, x, y, text, **kwargs):
+    # Prices carry "$" signs, which must not switch matplotlib into mathtext
+    return fig.text(x, y, text, parse_math=False, **kwargs)
+
+
+def _change_color(value) -> str:
+    return SIGNAL_COLORS['Buy'] if float(value) > 0 else SIGNAL_COLORS['Sell']
+
+
+def _summary_box(fig, x, label, value, note, note_color):
+    fig.add_artist(FancyBboxPatch((x, 0.805), 0.2, 0.075, boxstyle='round,pad=0.004',
+                                  transform=fig.transFigure, facecolor='#f8f9fa', edgecolor=RULE))
+    _text(fig, x + 0.01, 0.865, label, fontsize=8, color=MUTED)
+    _text(fig, x + 0.01, 0.835, value, fontsize=14, color=INK, weight='bold')
+    _text(fig, x + 0.01, 0.815, note, fontsize=8, color=note_color)
+
+
+def _rule(fig, y):
+    return Line2D([0.06, 0.94], [y, y], transform=fig.transFigure, color=INK, linewidth=1.5)
+
+
+def _style(ax, title):
+    ax.set_title(title, loc='left', fontsize=11, color=INK)
+    ax.grid(True, color=RULE, linewidth=0.6)
+    ax.tick_params(labelsize=7, colors=MUTED)
+    for side in ('top', 'right'):
+        ax.spines[side].set_visible(False)
+
+
+def summary_page(context: dict, max_points: int = 1000) -> Figure:
+    """First page: header, summary figures, price chart and forecast chart."""
+    stats, df, forecast = context['stats'], context['df'], context['forecast_df']
+    fig = Figure(figsize=A4)
+    _text(fig, 0.06, 0.95, f"{context['ticker']} Stock Analysis Report", fontsize=20, color=INK, weight='bold')
+    _text(fig, 0.06, 0.93, f"{context['horizon']}-day forecast | Generated on {context['current_date']}",
+             fontsize=9, color=MUTED)
+    fig.add_artist(_rule(fig, 0.92))
+
+    rsi = stats['rsi_val']
+    rsi_note = 'Overbought' if rsi > 70 else 'Oversold' if rsi < 30 else 'Neutral'
+    _summary_box(fig, 0.06, 'Latest Close', f"${stats['latest_close']}",
+                 f"{stats['price_change_1d']}% (1-day)", _change_color(stats['price_change_1d']))
+    _summary_box(fig, 0.285, '30-Day Volatility', stats['volatility_30d'],
+                 'Higher than normal' if stats['volatility_high'] else 'Normal range',
+                 SIGNAL_COLORS['Sell'] if stats['volatility_high'] else SIGNAL_COLORS['Buy'])
+    _summary_box(fig, 0.51, 'RSI (14)', stats['rsi'], rsi_note,
+                 SIGNAL_COLORS['Sell'] if rsi > 70 else SIGNAL_COLORS['Buy'] if rsi < 30 else MUTED)
+    _summary_box(fig, 0.735, 'Technical Rating', stats['rating'],
+                 f"Buy: {stats['buy_signals']}% | Sell: {stats['sell_signals']}%",
+                 SIGNAL_COLORS.get(stats['rating'], MUTED))
+
+    close = downsample(df['close'], max_points)
+    ax = fig.add_axes([0.09, 0.49, 0.85, 0.25])
+    ax.plot(close.index, close.to_numpy(), color='#1f77b4', linewidth=0.9)
+    _style(ax, 'Historical Close Price')
+
+    # The forecast chart shows the last year of history leading into the forecast
+    yhat = forecast['yhat'] if isinstance(forecast, pd.DataFrame) else forecast
+    recent = df['close'][df.index >= df.index[-1] - pd.DateOffset(years=1)]
+    ax = fig.add_axes([0.09, 0.16, 0.85, 0.25])
+    ax.plot(recent.index, recent.to_numpy(), color='#1f77b4', linewidth=0.9, label='Close Price')
+    ax.plot(yhat.index, yhat.to_numpy(dtype=np.float64), color='#ff7f0e', linestyle='--',
+            linewidth=1.2, label='Forecast')
+    if isinstance(forecast, pd.DataFrame) and {'yhat_lower', 'yhat_upper'} <= set(forecast.columns):
+        ax.fill_between(forecast.index, forecast['yhat_lower'].to_numpy(dtype=np.float64),
+                        forecast['yhat_upper'].to_numpy(dtype=np.float64), color='#ff7f0e', alpha=0.15,
+                        linewidth=0, label='Forecast interval')
+    ax.legend(fontsize=7, frameon=False, loc='upper left')
+    _style(ax, 'Price Forecast')
+
+    _text(fig, 0.06, 0.10, f"Forecast Period: {context['horizon']} days (ending {stats['forecast_end_date']})",
+             fontsize=9, color=INK)
+    _text(fig, 0.06, 0.08, f"Current Price: ${stats['latest_close']}    Predicted Price: ${stats['forecast_close']}",
+             fontsize=9, color=INK)
+    _text(fig, 0.06, 0.06, f"Expected Change: {stats['forecast_change_pct']}%", fontsize=9,
+             color=_change_color(stats['forecast_change_pct']))
+    return fig
+
+
+def _table(fig, rect, title, rows):
+    ax = fig.add_axes(rect)
+    ax.axis('off')
+    ax.set_title(title, loc='left', fontsize=11, color=INK)
+    table = ax.table(cellText=rows, colLabels=['Indicator', 'Value', 'Signal'], loc='upper center',
+                     cellLoc='left', colWidths=[0.42, 0.33, 0.25])
+    table.auto_set_font_size(False)
+    table.set_fontsize(8)
+    table.scale(1, 1.5)
+    for (row, col), cell in table.get_celld().items():
+        cell.set_edgecolor('#dddddd')
+        if row == 0:
+            cell.set_facecolor('#f0f0f0')
+            cell.set_text_props(weight='bold')
+        elif col == 2:
+            cell.set_text_props(color=SIGNAL_COLORS.get(rows[row - 1][2], MUTED))
+
+
+def indicators_page(context: dict) -> Figure:
+    """Second page: indicator tables and the disclaimer."""
+    stats = context['stats']
+    fig = Figure(figsize=A4)
+    _text(fig, 0.06, 0.95, 'Technical Indicators', fontsize=16, color=INK, weight='bold')
+    fig.add_artist(_rule(fig, 0.935))
+    _table(fig, [0.06, 0.62, 0.42, 0.28], 'Moving Averages', [
+        [name, f"${stats[key]}", stats[f'{key}_indicator']]
+        for name, key in (('SMA (7)', 'sma_7'), ('SMA (20)', 'sma_20'), ('SMA (50)', 'sma_50'),
+                          ('EMA (12)', 'ema_12'), ('EMA (26)', 'ema_26'))
+    ])
+    _table(fig, [0.52, 0.62, 0.42, 0.28], 'Oscillators & Other Indicators', [
+        ['MACD', stats['macd'], stats['macd_indicator']],
+        ['Stochastic %K', stats['stoch'], stats['stoch_indicator']],
+        ['Bollinger Width', stats['bb_width'], stats['bb_indicator']],
+        ['ATR (14)', stats['atr'], '-'],
+    ])
+    for i, line in enumerate((
+        f"This report was generated by Stock Forecaster AI on {context['current_date']}.",
+        'DISCLAIMER: This report is for informational purposes only and does not constitute investment advice.',
+        'Past performance is not indicative of future results. Always do your own research before making investment decisions.',
+    )):
+        _text(fig, 0.5, 0.08 - i * 0.018, line, fontsize=7, color=MUTED, ha='center')
+    return fig
+
+
+def write_reports(contexts, out_file, max_points: int = 1000):
+    """Write one two-page report per context into a single PDF file."""
+    with PdfPages(str(out_file)) as pdf:
+        for context in contexts:
+            pdf.savefig(summary_page(context, max_points))
+            pdf.savefig(indicators_page(context))
@@ -2,15 +2,53 @@ from jinja2 import Environment, FileSystemLoader
 import pdfkit, pandas as pd
 from pathlib import Path
 from ..config import Config
+from ..utils import timed
 import os
 import logging
 
 logger = logging.getLogger(__name__)
 TEMPLATE_DIR = Path(__file__).parent / 'templates'
 
-def build_pdf(context: dict, out_file: Path):
-    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
-    html = env.get_template('report.html').render(**context)
+# Compiled once per process; Jinja caches the parsed template on the environment
+env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), auto_reload=False)
+
+def _html_context(context: dict) -> dict:
+    """Add the interactive chart HTML the wkhtmltopdf template embeds"""
+    if 'fig_price' in context:
+        return context
+    from .. import visualize
+    df, forecast_df = context['df'], context['forecast_df']
+    price_fig = visualize.price_chart(df, Config.CHART_MAX_POINTS)
+    fc_fig = visualize.overlay_forecast(df, forecast_df, Config.CHART_MAX_POINTS)
+    return {**context,
+            'fig_price': price_fig.to_html(full_html=False, include_plotlyjs='cdn'),
+            'fig_forecast': fc_fig.to_html(full_html=False, include_plotlyjs=False)}
+
+def build_pdf(context: dict, out_file: Path, backend: str = None):
+    """
+    Render one report. ``context`` holds ticker, horizon, stats, current_date
+    and the ``df``/``forecast_df`` frames. The backend defaults to
+    ``Config.PDF_BACKEND``: "matplotlib" draws the report in process,
+    "wkhtmltopdf" renders the HTML template through pdfkit.
+    """
+    build_pdfs([context], out_file, backend)
+
+@timed('pdf')
+def build_pdfs(contexts, out_file: Path, backend: str = None):
+    """Render the reports for many tickers into one PDF in a single pass"""
+    backend = backend or Config.PDF_BACKEND
+    if backend == 'matplotlib':
+        from .pdf_native import write_reports
+        write_reports(contexts, out_file, Config.CHART_MAX_POINTS)
+        logger.info(f"PDF with {len(contexts)} report(s) generated at {out_file}")
+        return
+    if backend != 'wkhtmltopdf':
+        raise ValueError(f"Unknown PDF backend {backend!r}")
+    
+    # One wkhtmltopdf run for every report, each starting on a new page
+    template = env.get_template('report.html')
+    html = '<div style="page-break-after: always;"></div>'.join(
+        template.render(**_html_context(context)) for context in contexts)
     
     # Get the path from environment variable or use default
     wkhtmltopdf_path = os.environ.get('WKHTMLTOPDF_PATH', '/usr/bin/wkhtmltopdf')
@@ -24,25 +62,16 @@ def build_pdf(context: dict, out_file: Path):
         'enable-local-file-access': None
     }
     
-    try:
-        # Make sure the executable exists before using it
-        if os.path.exists(wkhtmltopdf_path):
-            pdfkit.from_string(html, str(out_file), 
-                              configuration=pdfkit.configuration(wkhtmltopdf=wkhtmltopdf_path),
-                              options=options)
-            logger.info(f"PDF successfully generated at {out_file}")
-        else:
-            error_msg = f"wkhtmltopdf executable not found at {wkhtmltopdf_path}"
-            logger.error(error_msg)
-            with open(str(out_file), 'w') as f:
-                f.write("PDF Generation Error: wkhtmltopdf not found")
-            logger.info("Created error placeholder PDF")
-    except Exception as e:
-        logger.error(f"PDF generation error: {str(e)}")
-        # Create a basic error file instead of failing completely
-        with open(str(out_file), 'w') as f:
-            f.write(f"PDF Generation Error: {str(e)}")
-        logger.info("Created error placeholder PDF due to exception")
+    # Make sure the executable exists before using it. Failures raise rather
+    # than leave a placeholder, which would be stored and served as a report
+    if not os.path.exists(wkhtmltopdf_path):
+        error_msg = f"wkhtmltopdf executable not found at {wkhtmltopdf_path}"
+        logger.error(error_msg)
+        raise RuntimeError(error_msg)
+    pdfkit.from_string(html, str(out_file), 
+                      configuration=pdfkit.configuration(wkhtmltopdf=wkhtmltopdf_path),
+                      options=options)
+    logger.info(f"PDF successfully generated at {out_file}")
 
 def dataframe_to_excel(df: pd.DataFrame, out_file: Path):
-    df.to_excel(out_file, index=True)
+    df.to_excel(out_file, index=True, engine='openpyxl')
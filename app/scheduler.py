@@ -0,0 +1,218 @@
+"""
+Scheduled cache warming for a watchlist.
+
+After every market close the scheduler refreshes each watched ticker's
+prices and precomputes what its dashboard asks for: indicator stats,
+forecasts per model and horizon, and chart payloads. All of it lands in the
+shared caches, so a dashboard hit for a watched ticker is served warm.
+Tickers run on a bounded process pool in priority order, and every run and
+stage is recorded in SQLite with its duration and error.
+
+``scheduler.py`` next to ``wsgi.py`` runs it as its own process.
+"""
+import logging
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import as_completed
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from .config import Config
+from .jobs import make_pool
+from .utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+def parse_watchlist(text: str) -> list:
+    """
+    ``[(ticker, priority)]`` from entries such as ``"AAPL:10, MSFT\\nNVDA"``
+    (commas, spaces or new lines between entries, ``#`` comments), highest
+    priority first. Priority defaults to 0; ties keep the listed order and
+    a repeated ticker keeps its highest priority.
+    """
+    priorities = {}
+    for line in text.splitlines():
+        for entry in re.split(r'[,\s]+', line.split('#', 1)[0]):
+            if not entry:
+                continue
+            ticker, _, priority = entry.partition(':')
+            try:
+                priority = int(priority) if priority else 0
+            except ValueError:
+                raise ValueError(f"Invalid watchlist priority in {entry!r}")
+            ticker = ticker.upper()
+            priorities[ticker] = max(priority, priorities.get(ticker, priority))
+    return sorted(priorities.items(), key=lambda item: -item[1])
+
+
+def configured_watchlist() -> list:
+    """The watchlist from ``WATCHLIST`` and the file named by ``WATCHLIST_FILE``."""
+    text = Config.WATCHLIST
+    if Config.WATCHLIST_FILE:
+        with open(Config.WATCHLIST_FILE) as f:
+            text += '\n' + f.read()
+    return parse_watchlist(text)
+
+
+def warm_ticker(ticker, horizons, models):
+    """
+    Refresh one ticker's prices and fill the caches its dashboard reads;
+    runs inside a pool process. Returns one ``{'stage', 'model',
+    'horizon', 'seconds', 'error'}`` record per stage.
+    """
+    from .data import fetch_price_history
+    from .models.service import get_forecast
+    from .web.routes import cached_chart, indicator_stats
+
+    records = []
+    def stage(name, compute, model=None, horizon=None):
+        started = time.perf_counter()
+        try:
+            value, error = compute(), None
+        except Exception as e:
+            logger.warning(f"Warming {name} for {ticker} failed: {str(e)}")
+            value, error = None, str(e) or type(e).__name__
+        records.append({'stage': name, 'model': model, 'horizon': horizon,
+                        'seconds': time.perf_counter() - started, 'error': error})
+        return value, error
+
+    df, error = stage('prices', lambda: fetch_price_history(ticker))
+    if error is not None:
+        return records
+    stage('indicators', lambda: indicator_stats(ticker, df))
+    for model in models:
+        for horizon in horizons:
+            forecast_df, error = stage('forecast', lambda: get_forecast(ticker, df, horizon, model),
+                                       model, horizon)
+            if error is None:
+                stage('chart', lambda: cached_chart(ticker, df, forecast_df), model, horizon)
+    return records
+
+
+class Scheduler:
+    """
+    Warms ``watchlist`` (``[(ticker, priority)]``) every weekday at
+    ``run_at`` (``"HH:MM"`` in ``timezone``) on a pool of ``workers``
+    processes, logging runs to the SQLite file ``db_path``.
+    """
+
+    def __init__(self, db_path, watchlist, horizons=(30,), models=('prophet',), workers=2,
+                 run_at='16:30', timezone='America/New_York'):
+        self.db_path = str(db_path)
+        self.watchlist = list(watchlist)
+        self.horizons = [int(h) for h in horizons]
+        self.models = list(models)
+        self.workers = workers
+        hour, minute = (int(part) for part in run_at.split(':'))
+        self.run_at = (hour, minute)
+        self.timezone = ZoneInfo(timezone)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS runs ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT, started REAL NOT NULL, finished REAL,'
+                ' tickers INTEGER NOT NULL, failed INTEGER, seconds REAL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS stages ('
+                ' run_id INTEGER NOT NULL, ticker TEXT NOT NULL, priority INTEGER NOT NULL,'
+                ' stage TEXT NOT NULL, model TEXT, horizon INTEGER, seconds REAL NOT NULL, error TEXT)'
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    def next_run(self, now: datetime = None) -> datetime:
+        """The first weekday ``run_at`` after ``now`` (timezone-aware)."""
+        now = (now or datetime.now(self.timezone)).astimezone(self.timezone)
+        candidate = now.replace(hour=self.run_at[0], minute=self.run_at[1], second=0, microsecond=0)
+        while candidate <= now or candidate.weekday() >= 5:
+            candidate = (candidate + timedelta(days=1)).replace(hour=self.run_at[0], minute=self.run_at[1])
+        return candidate
+
+    def run_once(self, executor=None) -> dict:
+        """
+        Warm every watched ticker now, highest priority first, and return
+        the run's summary. Uses a fresh pool of ``workers`` processes
+        unless an ``executor`` is given.
+        """
+        started = time.time()
+        with self._connect() as conn:
+            run_id = conn.execute('INSERT INTO runs (started, tickers) VALUES (?, ?)',
+                                  (started, len(self.watchlist))).lastrowid
+        logger.info(f"Warming {len(self.watchlist)} tickers (run {run_id})")
+
+        own_pool = executor is None
+        executor = executor or make_pool(self.workers)
+        failed = set()
+        try:
+            # The pool takes tasks in submission order, so priority decides who goes first
+            futures = {executor.submit(warm_ticker, ticker, self.horizons, self.models): (ticker, priority)
+                       for ticker, priority in self.watchlist}
+            for future in as_completed(futures):
+                ticker, priority = futures[future]
+                try:
+                    records = future.result()
+                except Exception as e:
+                    records = [{'stage': 'task', 'model': None, 'horizon': None, 'seconds': 0.0,
+                                'error': str(e) or type(e).__name__}]
+                self._record(run_id, ticker, priority, records)
+                if any(r['error'] for r in records):
+                    failed.add(ticker)
+        finally:
+            if own_pool:
+                executor.shutdown(cancel_futures=True)
+
+        seconds = time.time() - started
+        with self._connect() as conn:
+            conn.execute('UPDATE runs SET finished = ?, failed = ?, seconds = ? WHERE id = ?',
+                         (time.time(), len(failed), seconds, run_id))
+        metrics.observe('stage_seconds', seconds, stage='warm_run')
+        logger.info(f"Warm run {run_id} finished in {seconds:.1f}s, {len(failed)} tickers with failures")
+        return {'run_id': run_id, 'tickers': len(self.watchlist), 'failed': sorted(failed), 'seconds': seconds}
+
+    def _record(self, run_id, ticker, priority, records):
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT INTO stages (run_id, ticker, priority, stage, model, horizon, seconds, error)'
+                ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [(run_id, ticker, priority, r['stage'], r['model'], r['horizon'], r['seconds'], r['error'])
+                 for r in records])
+        for r in records:
+            metrics.inc('warm_stages_total', stage=r['stage'], status='failed' if r['error'] else 'ok')
+
+    def history(self, limit=10) -> list:
+        """The latest ``limit`` runs, newest first, each with its failed stages."""
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            runs = [dict(row) for row in conn.execute('SELECT * FROM runs ORDER BY id DESC LIMIT ?', (limit,))]
+            for run in runs:
+                run['failures'] = [dict(row) for row in conn.execute(
+                    'SELECT ticker, stage, model, horizon, error FROM stages'
+                    ' WHERE run_id = ? AND error IS NOT NULL', (run['id'],))]
+        return runs
+
+    def serve(self, stop: threading.Event = None):
+        """Run after every close until ``stop`` is set."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            when = self.next_run()
+            logger.info(f"Next warm run at {when.isoformat()}")
+            if stop.wait((when - datetime.now(self.timezone)).total_seconds()):
+                break
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Warm run failed: {str(e)}")
+
+
+def from_config(watchlist=None) -> Scheduler:
+    """A ``Scheduler`` set up from ``Config``, optionally for another watchlist."""
+    return Scheduler(Config.SCHEDULER_DB_PATH, configured_watchlist() if watchlist is None else watchlist,
+                     horizons=[int(h) for h in Config.WARM_HORIZONS.split(',') if h.strip()],
+                     models=[m.strip() for m in Config.WARM_MODELS.split(',') if m.strip()],
+                     workers=Config.SCHEDULER_WORKERS, run_at=Config.SCHEDULER_RUN_AT,
+                     timezone=Config.SCHEDULER_TIMEZONE)
@@ -1,4 +1,19 @@
 import io, base64
+import cProfile
+import fcntl
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import ContextDecorator
+
+from .config import Config
+
+logger = logging.getLogger(__name__)
+
 def fig_to_base64(fig):
     if hasattr(fig, "to_image"):
         img_bytes = fig.to_image(format="png")
@@ -7,3 +22,262 @@ def fig_to_base64(fig):
         fig.savefig(buf, format="png", bbox_inches="tight")
         img_bytes = buf.getvalue()
     return "data:image/png;base64," + base64.b64encode(img_bytes).decode()
+
+
+# ---------------------------------------------------------------------------
+# Stage timing and Prometheus metrics
+#
+# Counters, gauges and latency histograms are kept per process and written
+# to one JSON file per process in a shared directory, so stages that run in
+# job or batch pool processes show up in the same ``/metrics`` scrape as the
+# gunicorn workers. Files of processes that have exited are folded into
+# ``exited.json`` (their gauges dropped) so the directory stays small.
+# ---------------------------------------------------------------------------
+
+PREFIX = 'stockapp_'
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# name -> (type, help)
+METRICS = {
+    'stage_seconds': ('histogram', 'Time spent in one request stage'),
+    'http_request_seconds': ('histogram', 'Time to handle an HTTP request'),
+    'model_fits_total': ('counter', 'Forecast models fitted'),
+    'cache_lookups_total': ('counter', 'Cache lookups by result'),
+    'cache_hit_ratio': ('gauge', 'Share of cache lookups that were hits'),
+    'cache_bytes': ('gauge', 'Bytes held by in-memory caches, summed over live processes'),
+    'warm_stages_total': ('counter', 'Scheduled cache-warming stages by result'),
+}
+
+
+def _labels_key(labels: dict) -> str:
+    return json.dumps(labels, sort_keys=True)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: dict, **extra) -> str:
+    items = sorted(labels.items()) + list(extra.items())
+    if not items:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in items) + '}'
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Metrics:
+    """Process-local metric values, persisted to ``directory`` at most every ``flush_interval`` seconds."""
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.values = {'counter': {}, 'gauge': {}, 'histogram': {}}
+        self._lock = threading.Lock()
+        self._flushed = 0.0
+        self._timer = None
+        self._pid = os.getpid()
+
+    def _reset_after_fork(self):
+        # A forked child starts from zero rather than re-reporting its parent's values
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self.values = {'counter': {}, 'gauge': {}, 'histogram': {}}
+            self._flushed = 0.0
+            self._timer = None
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            self._reset_after_fork()
+            series = self.values['counter'].setdefault(name, {})
+            key = _labels_key(labels)
+            series[key] = series.get(key, 0) + value
+        self._maybe_flush()
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._reset_after_fork()
+            self.values['gauge'].setdefault(name, {})[_labels_key(labels)] = value
+        self._maybe_flush()
+
+    def observe(self, name, seconds, **labels):
+        with self._lock:
+            self._reset_after_fork()
+            series = self.values['histogram'].setdefault(name, {})
+            # Per-bucket (not cumulative) counts plus +Inf, then sum and count
+            hist = series.setdefault(_labels_key(labels), [0] * (len(BUCKETS) + 1) + [0.0, 0])
+            hist[next((i for i, bound in enumerate(BUCKETS) if seconds <= bound), len(BUCKETS))] += 1
+            hist[-2] += seconds
+            hist[-1] += 1
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        if not self.directory:
+            return
+        wait = self.flush_interval - (time.monotonic() - self._flushed)
+        if wait <= 0:
+            self.flush()
+        elif self._timer is None:
+            # Values recorded just after a flush are written once the interval
+            # is up, even if the process records nothing else (an idle pool worker)
+            self._timer = threading.Timer(wait, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def flush(self):
+        """Write this process's values to its file in ``directory``."""
+        if not self.directory:
+            return
+        with self._lock:
+            self._reset_after_fork()
+            payload = json.dumps(self.values)
+            self._flushed = time.monotonic()
+            self._timer = None
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(payload)
+        os.replace(tmp, self._path(f"{os.getpid()}.json"))
+
+    def collect(self) -> dict:
+        """Values summed over every process that has written to ``directory`` (or just this one)."""
+        if not self.directory:
+            return self.values
+        self.flush()
+        total = {'counter': {}, 'gauge': {}, 'histogram': {}}
+        with open(self._path('.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            exited = self._read('exited.json')
+            for entry in os.scandir(self.directory):
+                stem = entry.name[:-len('.json')]
+                if not entry.name.endswith('.json') or not stem.isdigit():
+                    continue
+                values = self._read(entry.name)
+                if _pid_alive(int(stem)):
+                    _merge(total, values)
+                else:
+                    values['gauge'] = {}
+                    _merge(exited, values)
+                    os.unlink(entry.path)
+                    self._write('exited.json', exited)
+            _merge(total, exited)
+        return total
+
+    def _read(self, name):
+        try:
+            with open(self._path(name)) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {'counter': {}, 'gauge': {}, 'histogram': {}}
+
+    def _write(self, name, values):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(values, f)
+        os.replace(tmp, self._path(name))
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        values = self.collect()
+        # Hit ratios are derived from the summed lookup counters
+        ratios = {}
+        for key, count in values['counter'].get('cache_lookups_total', {}).items():
+            labels = json.loads(key)
+            hits, total = ratios.get(labels['cache'], (0, 0))
+            ratios[labels['cache']] = (hits + count * (labels['result'] == 'hit'), total + count)
+        values['gauge']['cache_hit_ratio'] = {_labels_key({'cache': cache}): hits / total
+                                              for cache, (hits, total) in ratios.items() if total}
+
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            series = values[kind].get(name)
+            if not series:
+                continue
+            lines.append(f"# HELP {PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+            for key, value in sorted(series.items()):
+                labels = json.loads(key)
+                if kind != 'histogram':
+                    lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (math.inf,), value[:-2]):
+                    cumulative += count
+                    le = '+Inf' if bound == math.inf else repr(bound)
+                    lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, le=le)} {cumulative}")
+                lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {value[-2]}")
+                lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {value[-1]}")
+        return '\n'.join(lines) + '\n'
+
+
+def _merge(total, values):
+    for kind in ('counter', 'gauge'):
+        for name, series in values.get(kind, {}).items():
+            into = total[kind].setdefault(name, {})
+            for key, value in series.items():
+                into[key] = into.get(key, 0) + value
+    for name, series in values.get('histogram', {}).items():
+        into = total['histogram'].setdefault(name, {})
+        for key, hist in series.items():
+            into[key] = [a + b for a, b in zip(into[key], hist)] if key in into else list(hist)
+
+
+metrics = Metrics(Config.METRICS_DIR or None)
+
+
+class timed(ContextDecorator):
+    """
+    Record how long a block or function takes as ``stage_seconds{stage=...}``::
+
+        with timed('indicators'):
+            ...
+
+        @timed('chart')
+        def chart_payload(...):
+            ...
+    """
+
+    def __init__(self, stage, **labels):
+        self.stage = stage
+        self.labels = labels
+
+    def _recreate_cm(self):
+        # Each decorated call gets its own start time, so threads do not share one
+        return type(self)(self.stage, **self.labels)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
+        metrics.observe('stage_seconds', self.elapsed, stage=self.stage, **self.labels)
+        return False
+
+
+def start_profile():
+    """Start a cProfile profiler for the current request."""
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def dump_profile(profiler, directory, name) -> str:
+    """Stop ``profiler`` and save its stats (readable with ``pstats``) to a new file in ``directory``."""
+    profiler.disable()
+    os.makedirs(directory, exist_ok=True)
+    safe = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in name)
+    path = os.path.join(directory, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{safe}.prof")
+    profiler.dump_stats(path)
+    return path
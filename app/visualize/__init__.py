@@ -1 +1,15 @@
-from .plotly_charts import price_chart, overlay_forecast
+import importlib
+
+# Plotly is imported when a figure is first built, not when the app starts
+_EXPORTS = {
+    'price_chart': '.plotly_charts',
+    'overlay_forecast': '.plotly_charts',
+    'chart_payload': '.chart_data',
+    'downsample': '.chart_data',
+    'last_months': '.chart_data',
+}
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
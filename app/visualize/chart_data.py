@@ -0,0 +1,113 @@
+"""
+Chart data for the dashboard: downsampled traces and the JSON payload the
+page plots with Plotly.js.
+
+Daily history since 2000 is over 6,000 points, far more than a chart a few
+hundred pixels wide can show. ``downsample`` keeps at most ``max_points``
+of them, either by Largest-Triangle-Three-Buckets (keeps the visual shape)
+or by the min and max of each bucket (keeps every extreme). Shorter
+periods are cut from the bars with ``last_months`` before downsampling, so
+they keep every bar that fits. Traces are plain dicts so building a
+payload does not need plotly itself.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from ..utils import timed
+
+PRICE_LAYOUT = {'title': 'Historical Close Price', 'xaxis': {'title': 'Date'}, 'yaxis': {'title': 'Price'}}
+FORECAST_LAYOUT = {'xaxis': {'title': 'Date'}, 'yaxis': {'title': 'Price'}}
+
+
+def lttb(x, y, max_points):
+    """Indices of the points Largest-Triangle-Three-Buckets keeps, first and last included."""
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Inner points split into max_points - 2 buckets; edges[-1] is the last point
+    edges = np.append((np.arange(max_points - 2) * ((n - 2) / (max_points - 2))).astype(np.int64) + 1, n - 1)
+    keep = np.empty(max_points, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[end:next_end].mean(), y[end:next_end].mean()
+        # Twice the area of the triangle (kept point, candidate, next bucket's mean)
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def minmax(y, max_points):
+    """Indices of the lowest and highest point of each of ``max_points // 2`` buckets."""
+    n = len(y)
+    buckets = max_points // 2
+    if max_points >= n or buckets < 1:
+        return np.arange(n)
+    size = -(-n // buckets)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    rows = padded.reshape(buckets, size)
+    filled = ~np.isnan(rows).all(axis=1)
+    offsets = np.arange(buckets)[filled] * size
+    lows = np.nanargmin(rows[filled], axis=1) + offsets
+    highs = np.nanargmax(rows[filled], axis=1) + offsets
+    return np.unique(np.concatenate(([0, n - 1], lows, highs)))
+
+
+def downsample(series: pd.Series, max_points: int, method: str = 'lttb') -> pd.Series:
+    """``series`` without NaNs, reduced to at most about ``max_points`` points."""
+    series = series.dropna()
+    if not max_points or len(series) <= max_points:
+        return series
+    if method == 'lttb':
+        keep = lttb(pd.DatetimeIndex(series.index).asi8, series.to_numpy(), max_points)
+    elif method == 'minmax':
+        keep = minmax(series.to_numpy(dtype=np.float64), max_points)
+    else:
+        raise ValueError(f"Unknown downsampling method {method!r}")
+    return series.iloc[keep]
+
+
+def last_months(df: pd.DataFrame, months: int) -> pd.DataFrame:
+    """The bars of ``df`` in the ``months`` months up to its last bar."""
+    if df.empty:
+        return df
+    return df[df.index >= df.index[-1] - pd.DateOffset(months=months)]
+
+
+def _dates(index) -> list:
+    index = pd.DatetimeIndex(index)
+    daily = (index == index.normalize()).all()
+    return list(index.strftime('%Y-%m-%d' if daily else '%Y-%m-%d %H:%M:%S'))
+
+
+def history_trace(df: pd.DataFrame, max_points: int = None, method: str = 'lttb') -> dict:
+    close = downsample(df['close'], max_points, method)
+    return {'type': 'scatter', 'name': 'Close Price', 'x': _dates(close.index),
+            'y': close.to_numpy(dtype=np.float64).tolist()}
+
+
+def forecast_trace(forecast) -> dict:
+    yhat = forecast['yhat'] if isinstance(forecast, pd.DataFrame) else forecast
+    return {'type': 'scatter', 'mode': 'lines', 'name': 'Forecast', 'line': {'dash': 'dash'},
+            'x': _dates(yhat.index), 'y': yhat.to_numpy(dtype=np.float64).tolist()}
+
+
+@timed('chart')
+def chart_payload(df: pd.DataFrame, forecast, max_points: int = None, method: str = 'lttb') -> str:
+    """
+    JSON for both dashboard charts. The history trace appears once; the page
+    plots it alone as the price chart and again under the forecast trace.
+    """
+    return json.dumps({
+        'history': history_trace(df, max_points, method),
+        'price': {'layout': PRICE_LAYOUT},
+        'forecast': {'data': [forecast_trace(forecast)], 'layout': FORECAST_LAYOUT},
+    }, separators=(',', ':'))
@@ -1,16 +1,12 @@
 import plotly.graph_objects as go, pandas as pd
-def price_chart(df: pd.DataFrame) -> go.Figure:
-    fig = go.Figure()
-    fig.add_trace(go.Scatter(x=df.index, y=df['close'], name='Close Price'))
-    fig.update_layout(title='Historical Close Price', xaxis_title='Date', yaxis_title='Price')
-    return fig
-def overlay_forecast(hist: pd.DataFrame, forecast) -> go.Figure:
-    fig = price_chart(hist)
+from .chart_data import PRICE_LAYOUT, history_trace, forecast_trace
+def price_chart(df: pd.DataFrame, max_points: int = None) -> go.Figure:
+    # History is downsampled to max_points (all points when None)
+    return go.Figure(data=[history_trace(df, max_points)], layout=PRICE_LAYOUT)
+def overlay_forecast(hist: pd.DataFrame, forecast, max_points: int = None) -> go.Figure:
+    fig = price_chart(hist, max_points)
     
-    # Handle both Series and DataFrame for backward compatibility
-    if isinstance(forecast, pd.DataFrame):
-        fig.add_trace(go.Scatter(x=forecast.index, y=forecast['yhat'], name='Forecast', mode='lines', line=dict(dash='dash')))
-    else:
-        fig.add_trace(go.Scatter(x=forecast.index, y=forecast, name='Forecast', mode='lines', line=dict(dash='dash')))
+    # Handles both Series and DataFrame forecasts
+    fig.add_trace(forecast_trace(forecast))
     
     return fig
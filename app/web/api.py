@@ -0,0 +1,236 @@
+from flask import Blueprint, Response, request, jsonify, send_file, stream_with_context
+from ..data import fetch_price_history, fetch_price_histories
+from ..data.loader import price_store
+from ..data.screener import Screener
+from ..models import model_available
+from ..models.service import iter_batch_forecasts, forecast_records
+from ..models.simulation import METHODS, band_records, iter_simulations
+from ..jobs import make_pool
+from .routes import report_context
+from ..config import Config
+from .. import reports
+import io
+import json
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+bp = Blueprint('api', __name__, url_prefix='/api')
+
+_pool = None
+_pool_pid = None
+_screener = None
+
+def batch_pool():
+    """
+    Per-worker process pool sized to the machine, created on first use.
+    ARIMA order searches inside it run serially (see ``arima_search_pool``).
+    """
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid() or getattr(_pool, '_broken', False):
+        _pool = make_pool(Config.BATCH_WORKERS or os.cpu_count())
+        _pool_pid = os.getpid()
+    return _pool
+
+def batch_request(payload):
+    """
+    Validate a batch payload ``{"tickers": [...], "model": "prophet",
+    "horizon": 30, "params": {}}``; returns ``(tickers, model, horizon,
+    params)`` or raises ValueError with a message for the client.
+    """
+    tickers = payload.get('tickers')
+    model = payload.get('model', 'prophet')
+    params = payload.get('params') or {}
+    try:
+        horizon = int(payload.get('horizon', 30))
+    except (TypeError, ValueError):
+        raise ValueError("horizon must be an integer")
+
+    if not isinstance(tickers, list) or not tickers:
+        raise ValueError("tickers must be a non-empty list")
+    if len(tickers) > Config.BATCH_MAX_TICKERS:
+        raise ValueError(f"At most {Config.BATCH_MAX_TICKERS} tickers per batch")
+    if not model_available(model):
+        raise ValueError(f"Unknown or unavailable model {model!r}")
+    if not 1 <= horizon <= 365:
+        raise ValueError("horizon must be between 1 and 365")
+    return list(dict.fromkeys(str(t).upper().strip() for t in tickers)), model, horizon, params
+
+@bp.post('/forecast/batch')
+def forecast_batch():
+    """
+    Forecast many tickers in one call. Takes the ``batch_request`` payload
+    and streams one JSON object per line (NDJSON) as each ticker's fit
+    finishes.
+    """
+    try:
+        tickers, model, horizon, params = batch_request(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    logger.info(f"Batch forecast for {len(tickers)} tickers ({model}, horizon {horizon})")
+    frames, errors = fetch_price_histories(tickers)
+
+    def generate():
+        for ticker, error in errors.items():
+            yield json.dumps({"ticker": ticker, "status": "error", "error": error}) + "\n"
+        for ticker, forecast_df, error in iter_batch_forecasts(frames, horizon, batch_pool(), model, params):
+            if error is not None:
+                line = {"ticker": ticker, "status": "error", "error": error}
+            else:
+                line = {"ticker": ticker, "status": "ok", "model": model, "horizon": horizon,
+                        "forecast": forecast_records(forecast_df)}
+            yield json.dumps(line) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@bp.post('/reports/pdf')
+def reports_pdf():
+    """
+    One PDF holding the report of every ticker in a ``batch_request``
+    payload, forecast in parallel and rendered in a single pass. Tickers
+    that fail are listed in the ``X-Failed-Tickers`` header.
+    """
+    try:
+        tickers, model, horizon, params = batch_request(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    logger.info(f"Bulk PDF report for {len(tickers)} tickers ({model}, horizon {horizon})")
+    frames, errors = fetch_price_histories(tickers)
+    forecasts = {}
+    for ticker, forecast_df, error in iter_batch_forecasts(frames, horizon, batch_pool(), model, params):
+        if error is not None:
+            errors[ticker] = error
+        else:
+            forecasts[ticker] = forecast_df
+    # Keep the requested order in the document
+    contexts = [report_context(t, horizon, frames[t], forecasts[t]) for t in tickers if t in forecasts]
+    if not contexts:
+        return jsonify({"error": "No report could be built", "errors": errors}), 422
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'reports.pdf')
+        reports.build_pdfs(contexts, path)
+        with open(path, 'rb') as f:
+            data = f.read()
+    response = send_file(io.BytesIO(data), mimetype='application/pdf', as_attachment=True,
+                         download_name=f"reports_{len(contexts)}_tickers.pdf")
+    if errors:
+        response.headers['X-Failed-Tickers'] = ','.join(sorted(errors))
+    return response
+
+def simulation_request(payload):
+    """
+    Validate a simulation payload ``{"tickers": [...], "horizon": 30,
+    "paths": 10000, "method": "gbm", "window": 252, "seed": null}``;
+    returns the keyword arguments for ``iter_simulations`` plus the ticker
+    list, or raises ValueError with a message for the client.
+    """
+    tickers = payload.get('tickers')
+    if not isinstance(tickers, list) or not tickers:
+        raise ValueError("tickers must be a non-empty list")
+    if len(tickers) > Config.BATCH_MAX_TICKERS:
+        raise ValueError(f"At most {Config.BATCH_MAX_TICKERS} tickers per request")
+    try:
+        horizon = int(payload.get('horizon', 30))
+        paths = int(payload.get('paths', Config.SIM_DEFAULT_PATHS))
+        window = int(payload.get('window', 252))
+        seed = payload.get('seed')
+        seed = None if seed is None else int(seed)
+    except (TypeError, ValueError):
+        raise ValueError("horizon, paths, window and seed must be integers")
+    method = payload.get('method', 'gbm')
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {', '.join(METHODS)}")
+    if not 1 <= horizon <= 365:
+        raise ValueError("horizon must be between 1 and 365")
+    if not 1 <= paths <= Config.SIM_MAX_PATHS:
+        raise ValueError(f"paths must be between 1 and {Config.SIM_MAX_PATHS}")
+    if not 20 <= window <= 5000:
+        raise ValueError("window must be between 20 and 5000")
+    tickers = list(dict.fromkeys(str(t).upper().strip() for t in tickers))
+    return tickers, {'horizon': horizon, 'n_paths': paths, 'method': method, 'window': window,
+                     'seed': seed, 'chunk_bytes': Config.SIM_CHUNK_BYTES}
+
+@bp.post('/simulate')
+def simulate_scenarios():
+    """
+    Monte Carlo price scenarios for the tickers of a ``simulation_request``
+    payload: percentile bands per date, VaR and expected shortfall. Several
+    tickers are simulated in parallel on the batch pool.
+    """
+    try:
+        tickers, options = simulation_request(request.get_json(silent=True) or {})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if len(tickers) == 1:
+        frames, errors = {}, {}
+        try:
+            frames[tickers[0]] = fetch_price_history(tickers[0], lookback=options['window'] + 1)
+        except Exception as e:
+            errors[tickers[0]] = str(e)
+        executor = None
+    else:
+        frames, errors = fetch_price_histories(tickers)
+        # Only the return window travels to the pool processes
+        frames = {t: df.iloc[-(options['window'] + 1):] for t, df in frames.items()}
+        executor = batch_pool()
+
+    results = {}
+    for ticker, result, error in iter_simulations(frames, executor, **options):
+        if error is not None:
+            errors[ticker] = error
+            continue
+        results[ticker] = dict(result, bands=band_records(result['bands']))
+    status = 200 if results else 422
+    return jsonify({"results": [dict(ticker=t, **results[t]) for t in tickers if t in results],
+                    "errors": errors}), status
+
+def screener():
+    """The worker's screener over the price store, built on first use."""
+    global _screener
+    if _screener is None:
+        _screener = Screener(price_store, tickers=Config.SCREENER_TICKERS or None,
+                             refresh_seconds=Config.SCREENER_REFRESH_SECONDS)
+    return _screener
+
+def screener_request(payload):
+    """
+    Validate a screener payload ``{"filters": [["rsi_14", "<", 30],
+    ["rating", "=", "Strong Buy"]], "sort": "volatility_30d", "descending":
+    true, "limit": 50, "columns": [...]}``; returns the ``Screener.query``
+    keyword arguments or raises ValueError with a message for the client.
+    """
+    filters = payload.get('filters') or []
+    if not isinstance(filters, list) or not all(isinstance(f, list) and len(f) == 3 for f in filters):
+        raise ValueError("filters must be a list of [column, operator, value] triples")
+    limit = payload.get('limit', 100)
+    try:
+        limit = int(limit) if limit is not None else None
+    except (TypeError, ValueError):
+        raise ValueError("limit must be an integer")
+    if limit is not None and limit < 1:
+        raise ValueError("limit must be positive")
+    columns = payload.get('columns')
+    if columns is not None and not isinstance(columns, list):
+        raise ValueError("columns must be a list")
+    return {'filters': [tuple(f) for f in filters], 'sort': payload.get('sort'),
+            'descending': bool(payload.get('descending', False)), 'limit': limit, 'columns': columns}
+
+@bp.post('/screener')
+def screen():
+    """
+    Filter and rank every screened ticker on its latest indicators, signals
+    and rating. Takes the ``screener_request`` payload and answers from the
+    precomputed matrix, refreshed first if it is due.
+    """
+    try:
+        query = screener_request(request.get_json(silent=True) or {})
+        current = screener()
+        current.maybe_refresh()
+        return jsonify(current.query(**query))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
@@ -1,10 +1,19 @@
-from flask import Blueprint, render_template, request, send_file, flash, redirect, jsonify
+from flask import Blueprint, render_template, request, send_file, flash, redirect, jsonify, url_for, current_app
 from ..data import fetch_price_history
-from ..data.indicators import sma, ema, rsi, macd
-from ..models import ProphetForecaster
-from ..visualize import price_chart, overlay_forecast
-from ..reports import build_pdf
-import tempfile, io, pandas as pd
+from ..data.loader import history_cache, price_store
+from ..data.resample import periods_per_year
+from ..data.streaming import stored_state
+from ..data.indicators import (compute_indicators, rating, signal_votes, volatility_mean,
+                               LOOKBACK as INDICATOR_LOOKBACK, RATINGS, SIGNAL_LABELS)
+from ..models import model_available
+from ..models.service import get_forecast, forecast_records, forecast_cache, data_fingerprint
+from ..cache import make_key
+from ..artifacts import ArtifactStore
+from ..jobs import JobQueue, DONE, FAILED, QUEUED
+from ..config import Config
+from ..utils import timed
+from .. import visualize, reports
+import pandas as pd
 import numpy as np
 from datetime import datetime
 import logging
@@ -12,123 +21,92 @@ import traceback
 
 logger = logging.getLogger(__name__)
 bp = Blueprint('web', __name__)
+job_queue = JobQueue(Config.JOB_DB_PATH, max_workers=Config.JOB_WORKERS, timeout=Config.JOB_TIMEOUT)
+artifact_store = ArtifactStore(Config.ARTIFACT_DIR, max_bytes=Config.ARTIFACT_MAX_BYTES)
 
-def calculate_indicators(df):
-    """Calculate all technical indicators and statistics for a price dataframe"""
-    # Basic stats
-    latest_close = df['close'].iloc[-1]
-    prev_close = df['close'].iloc[-2]
-    price_change = latest_close - prev_close
-    price_change_pct = (price_change / prev_close) * 100
-    
-    # Moving averages
-    df['sma_7'] = sma(df['close'], 7)
-    df['sma_20'] = sma(df['close'], 20)
-    df['sma_50'] = sma(df['close'], 50)
-    df['ema_12'] = ema(df['close'], 12)
-    df['ema_26'] = ema(df['close'], 26)
-    
-    # RSI
-    df['rsi_14'] = rsi(df['close'], 14)
-    
-    # MACD
-    macd_df = macd(df['close'])
-    df['macd'] = macd_df['macd']
-    df['macd_signal'] = macd_df['signal']
-    df['macd_hist'] = df['macd'] - df['macd_signal']
+# Forecast models offered in the form, in display order
+MODEL_CHOICES = [
+    ('prophet', 'Prophet'),
+    ('auto_arima', 'ARIMA (auto order)'),
+    ('arima', 'ARIMA (5,1,0)'),
+    ('lstm', 'LSTM'),
+    ('linear', 'Linear trend + seasonality'),
+]
+
+# Labels of the bar intervals offered in the form (Config.INTERVALS)
+INTERVAL_LABELS = {
+    '5m': '5 minutes',
+    '15m': '15 minutes',
+    '30m': '30 minutes',
+    '1h': '1 hour',
+    '1d': 'Daily',
+    '1wk': 'Weekly',
+    '1mo': 'Monthly',
+}
+
+def requested_interval(form):
+    """Bar interval named in a request, defaulting to daily bars; raises ValueError if not offered"""
+    interval = form.get('interval', '1d')
+    if interval not in Config.INTERVALS:
+        raise ValueError(f"Unsupported interval {interval!r}")
+    return interval
+
+def requested_model(form):
+    """Model named in a request, defaulting to Prophet; raises ValueError if unavailable"""
+    model = form.get('model', 'prophet')
+    if not model_available(model):
+        raise ValueError(f"Unknown or unavailable model {model!r}")
+    return model
+
+@timed('indicators')
+def calculate_indicators(df, interval='1d'):
+    """Calculate all technical indicators and statistics for a price dataframe of ``interval`` bars"""
+    # The latest volatility is judged against its mean over the whole history;
+    # everything else only needs the recent bars
+    volatility_baseline = volatility_mean(df['close'].to_numpy(dtype=np.float64), periods_per_year(interval))
+    df = df.iloc[-INDICATOR_LOOKBACK:]
+    close = df['close'].to_numpy(dtype=np.float64)
+    has_range = 'high' in df.columns and 'low' in df.columns
+    has_volume = 'volume' in df.columns
     
-    # Bollinger Bands
-    df['bb_middle'] = df['sma_20']
-    df['bb_std'] = df['close'].rolling(20).std()
-    df['bb_upper'] = df['bb_middle'] + (df['bb_std'] * 2)
-    df['bb_lower'] = df['bb_middle'] - (df['bb_std'] * 2)
-    df['bb_width'] = (df['bb_upper'] - df['bb_lower']) / df['bb_middle']
+    # One vectorised pass; the (possibly cached) price frame is left untouched
+    ind = compute_indicators(close,
+                             high=df['high'].to_numpy(dtype=np.float64) if has_range else None,
+                             low=df['low'].to_numpy(dtype=np.float64) if has_range else None,
+                             volume=df['volume'].to_numpy(dtype=np.float64) if has_volume else None,
+                             periods_per_year=periods_per_year(interval))
+    last = {name: values[-1] for name, values in ind.items()}
+    volume_value = df['volume'].iloc[-1] if has_volume else None
+    return format_indicators(close[-1], last, volume_value, volatility_baseline)
+
+def format_indicators(latest_close, last, volume_value, volatility_baseline):
+    """
+    Display stats and the last bar's change in percent from the latest
+    value of every indicator in ``last`` (the keys of ``compute_indicators``);
+    ``volume_value`` is None without volume data
+    """
+    # Basic stats
+    price_change_pct = last['returns'] * 100
     
-    # Check if we have high/low data for Stochastic Oscillator
-    n = 14
-    if 'high' in df.columns and 'low' in df.columns:
-        # Calculate Stochastic Oscillator with high/low data
-        df['stoch_k'] = 100 * ((df['close'] - df['low'].rolling(n).min()) / 
-                            (df['high'].rolling(n).max() - df['low'].rolling(n).min()))
-        df['stoch_d'] = df['stoch_k'].rolling(3).mean()
-        stoch_value = df['stoch_k'].iloc[-1]
-        
-        # Calculate ATR with high/low data
-        tr1 = df['high'] - df['low']
-        tr2 = abs(df['high'] - df['close'].shift())
-        tr3 = abs(df['low'] - df['close'].shift())
-        df['tr'] = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        df['atr_14'] = df['tr'].rolling(14).mean()
-        atr_value = df['atr_14'].iloc[-1]
-    else:
-        # Alternative calculation for Stochastic using only close prices
-        # This is less accurate but still provides a momentum indicator
-        df['close_min'] = df['close'].rolling(n).min()
-        df['close_max'] = df['close'].rolling(n).max()
-        df['stoch_k'] = 100 * ((df['close'] - df['close_min']) / 
-                            (df['close_max'] - df['close_min']).replace(0, 1))  # Avoid division by zero
-        df['stoch_d'] = df['stoch_k'].rolling(3).mean()
-        stoch_value = df['stoch_k'].iloc[-1]
-        
-        # Simple volatility measure as ATR alternative
-        df['daily_change'] = df['close'].diff().abs()
-        df['atr_14'] = df['daily_change'].rolling(14).mean()
-        atr_value = df['atr_14'].iloc[-1]
+    stoch_value = last['stoch_k']
+    atr_value = last['atr_14']
     
     # Volume analysis - check if volume data is available
-    if 'volume' in df.columns:
-        df['volume_sma_20'] = df['volume'].rolling(20).mean()
-        volume_value = df['volume'].iloc[-1]
-        volume_change_pct = ((volume_value / df['volume_sma_20'].iloc[-1]) - 1) * 100
+    if volume_value is not None:
+        volume_change_pct = ((volume_value / last['volume_sma_20']) - 1) * 100
     else:
         # No volume data available
         volume_value = 0
         volume_change_pct = 0
     
-    # Volatility
-    df['returns'] = df['close'].pct_change()
-    volatility_30d = df['returns'].rolling(30).std() * np.sqrt(252) * 100
-    
-    # Technical signals
-    sma_7_signal = "Buy" if df['close'].iloc[-1] > df['sma_7'].iloc[-1] else "Sell"
-    sma_20_signal = "Buy" if df['close'].iloc[-1] > df['sma_20'].iloc[-1] else "Sell"
-    sma_50_signal = "Buy" if df['close'].iloc[-1] > df['sma_50'].iloc[-1] else "Sell"
-    ema_12_signal = "Buy" if df['close'].iloc[-1] > df['ema_12'].iloc[-1] else "Sell"
-    ema_26_signal = "Buy" if df['close'].iloc[-1] > df['ema_26'].iloc[-1] else "Sell"
-    
-    macd_signal = "Buy" if df['macd_hist'].iloc[-1] > 0 else "Sell"
-    rsi_val = df['rsi_14'].iloc[-1]
-    rsi_signal = "Buy" if rsi_val < 30 else "Sell" if rsi_val > 70 else "Neutral"
-    stoch_signal = "Buy" if (df['stoch_k'].iloc[-1] < 20 and df['stoch_d'].iloc[-1] < 20) else \
-                   "Sell" if (df['stoch_k'].iloc[-1] > 80 and df['stoch_d'].iloc[-1] > 80) else "Neutral"
-    
-    # Bollinger Bands signal
-    bb_signal = "Buy" if df['close'].iloc[-1] < df['bb_lower'].iloc[-1] else \
-                "Sell" if df['close'].iloc[-1] > df['bb_upper'].iloc[-1] else "Neutral"
-    
-    # Count signals for summary
-    signals = [sma_7_signal, sma_20_signal, sma_50_signal, ema_12_signal, ema_26_signal, 
-               macd_signal, rsi_signal, stoch_signal, bb_signal]
-    buy_count = signals.count("Buy")
-    sell_count = signals.count("Sell")
-    neutral_count = signals.count("Neutral")
-    total_signals = len(signals)
-    
-    buy_percent = round((buy_count / total_signals) * 100)
-    sell_percent = round((sell_count / total_signals) * 100)
-    neutral_percent = round((neutral_count / total_signals) * 100)
-    
-    # Overall rating
-    if buy_percent > 60:
-        rating = "Strong Buy"
-    elif buy_percent > 40:
-        rating = "Buy"
-    elif sell_percent > 60:
-        rating = "Strong Sell"
-    elif sell_percent > 40:
-        rating = "Sell"
-    else:
-        rating = "Neutral"
+    # Technical signals and the overall rating
+    rsi_val = last['rsi_14']
+    raw_votes = signal_votes(latest_close, last)
+    votes = {name: SIGNAL_LABELS[int(vote)] for name, vote in raw_votes.items()}
+    summary = rating(raw_votes)
+    buy_percent, sell_percent, neutral_percent = (int(summary[f'{side}_percent'])
+                                                  for side in ('buy', 'sell', 'neutral'))
+    rating_label = RATINGS[int(summary['rating']) + 2]
     
     # Format for display
     formatted_stats = {
@@ -140,28 +118,28 @@ def calculate_indicators(df):
         'volume_change_pct': f"{volume_change_pct:.2f}",
         'volume_class': 'success' if volume_change_pct > 0 else 'danger',
         'volume_icon': 'arrow-up' if volume_change_pct > 0 else 'arrow-down',
-        'volatility_30d': f"{volatility_30d.iloc[-1]:.2f}%",
-        'volatility_high': volatility_30d.iloc[-1] > volatility_30d.mean(),
+        'volatility_30d': f"{last['volatility_30d']:.2f}%",
+        'volatility_high': last['volatility_30d'] > volatility_baseline,
         'rsi': f"{rsi_val:.2f}",
         'rsi_val': rsi_val,
-        'sma_7': f"{df['sma_7'].iloc[-1]:.2f}",
-        'sma_20': f"{df['sma_20'].iloc[-1]:.2f}",
-        'sma_50': f"{df['sma_50'].iloc[-1]:.2f}",
-        'ema_12': f"{df['ema_12'].iloc[-1]:.2f}",
-        'ema_26': f"{df['ema_26'].iloc[-1]:.2f}",
-        'sma_7_indicator': sma_7_signal,
-        'sma_20_indicator': sma_20_signal,
-        'sma_50_indicator': sma_50_signal,
-        'ema_12_indicator': ema_12_signal,
-        'ema_26_indicator': ema_26_signal,
-        'macd': f"{df['macd'].iloc[-1]:.4f}",
-        'macd_indicator': macd_signal,
+        'sma_7': f"{last['sma_7']:.2f}",
+        'sma_20': f"{last['sma_20']:.2f}",
+        'sma_50': f"{last['sma_50']:.2f}",
+        'ema_12': f"{last['ema_12']:.2f}",
+        'ema_26': f"{last['ema_26']:.2f}",
+        'sma_7_indicator': votes['sma_7'],
+        'sma_20_indicator': votes['sma_20'],
+        'sma_50_indicator': votes['sma_50'],
+        'ema_12_indicator': votes['ema_12'],
+        'ema_26_indicator': votes['ema_26'],
+        'macd': f"{last['macd']:.4f}",
+        'macd_indicator': votes['macd'],
         'stoch': f"{stoch_value:.2f}",
-        'stoch_indicator': stoch_signal,
-        'bb_width': f"{df['bb_width'].iloc[-1]:.4f}",
-        'bb_indicator': bb_signal,
+        'stoch_indicator': votes['stoch'],
+        'bb_width': f"{last['bb_width']:.4f}",
+        'bb_indicator': votes['bb'],
         'atr': f"{atr_value:.4f}",
-        'rating': rating,
+        'rating': rating_label,
         'buy_signals': buy_percent,
         'sell_signals': sell_percent,
         'neutral_signals': neutral_percent
@@ -169,158 +147,246 @@ def calculate_indicators(df):
     
     return formatted_stats, price_change_pct
 
+def indicator_stats(ticker, df, interval='1d'):
+    """
+    Indicator stats for the bars of ``df``: read from the indicator state
+    kept with the price store when it ends at the same bar, otherwise
+    ``calculate_indicators`` through the shared cache, keyed on the bars it reads
+    """
+    state = stored_state(price_store, ticker, interval, df.index[-1], df['close'].iloc[-1])
+    if state is not None:
+        volume_value = state.volume.values[-1] if state.has_volume and state.volume.values else None
+        return format_indicators(state.prev_close, state.latest, volume_value, state.volatility_mean)
+    recent = df.iloc[-INDICATOR_LOOKBACK:]
+    # The whole close history too, which the volatility baseline is taken over
+    key = make_key('indicators', ticker.upper(), interval, data_fingerprint(recent, tuple(recent.columns)),
+                   data_fingerprint(df))
+    return forecast_cache.get_or_compute(key, lambda: calculate_indicators(df, interval))
+
+def chart_key(ticker, df, forecast_df):
+    return make_key('chart', ticker, data_fingerprint(df), data_fingerprint(forecast_df, ('yhat',)),
+                    Config.CHART_MAX_POINTS, Config.CHART_DOWNSAMPLE)
+
+def cached_chart(ticker, df, forecast_df, key=None):
+    """The dashboard chart payload for a forecast, built once and shared through the cache"""
+    return forecast_cache.get_or_compute(
+        key or chart_key(ticker, df, forecast_df),
+        lambda: visualize.chart_payload(df, forecast_df, Config.CHART_MAX_POINTS, Config.CHART_DOWNSAMPLE))
+
+def forecast_stats(df, forecast_df):
+    """Headline forecast figures shown next to the indicator stats"""
+    current_close = df['close'].iloc[-1]
+    forecast_close = forecast_df['yhat'].iloc[-1]
+    forecast_change_pct = ((forecast_close - current_close) / current_close) * 100
+    return {
+        'forecast_close': f"{forecast_close:.2f}",
+        'forecast_change_pct': f"{forecast_change_pct:.2f}",
+        'forecast_end_date': forecast_df.index[-1].strftime('%Y-%m-%d %H:%M' if has_times(forecast_df) else '%Y-%m-%d')
+    }
+
+def has_times(df):
+    """Whether the bars of ``df`` have times of day"""
+    return bool((pd.DatetimeIndex(df.index).asi8 % (24 * 3600 * 10 ** 9) != 0).any())
+
+def report_context(ticker, horizon, df, forecast_df, interval='1d'):
+    """Everything ``reports.build_pdf`` needs for one ticker"""
+    stats, _ = indicator_stats(ticker, df, interval)
+    stats.update(forecast_stats(df, forecast_df))
+    return {
+        'ticker': ticker,
+        'horizon': horizon,
+        'stats': stats,
+        'current_date': datetime.now().strftime('%B %d, %Y'),
+        'df': df,
+        'forecast_df': forecast_df
+    }
+
 @bp.route('/', methods=['GET','POST'])
 def index():
     if request.method == 'POST':
-        ticker = request.form['ticker'].upper().strip()
-        horizon = int(request.form.get('horizon',30))
-        
         try:
-            logger.info(f"Processing request for ticker: {ticker} with horizon: {horizon}")
-            df = fetch_price_history(ticker)
-            
-            if df.empty:
-                logger.error(f"Empty dataframe returned for {ticker}")
-                flash(f"No data available for {ticker}. Please try another stock symbol.", 'danger')
-                return redirect('/')
-                
-            logger.info(f"Successfully fetched data for {ticker}: {len(df)} records")
-            
-            # Calculate all indicators
-            stats, price_change_pct = calculate_indicators(df)
-            
-            # Forecast
-            logger.info(f"Generating forecast for {ticker} with horizon: {horizon}")
-            forecaster = ProphetForecaster()
-            forecaster.fit(df)
-            forecast_df = forecaster.predict(horizon)
-            
-            # Get forecast metrics
-            current_close = df['close'].iloc[-1]
-            forecast_close = forecast_df['yhat'].iloc[-1]
-            forecast_change = forecast_close - current_close
-            forecast_change_pct = (forecast_change / current_close) * 100
-            forecast_end_date = forecast_df.index[-1].strftime('%Y-%m-%d')
-            
-            # Add forecast stats
-            stats.update({
-                'forecast_close': f"{forecast_close:.2f}",
-                'forecast_change_pct': f"{forecast_change_pct:.2f}",
-                'forecast_end_date': forecast_end_date
-            })
-            
-            # Create charts
-            logger.info("Generating charts")
-            price_fig = price_chart(df)
-            fc_fig = overlay_forecast(df, forecast_df)
-            
-            # Current date for display
-            current_date = datetime.now().strftime('%B %d, %Y')
-            
-            logger.info(f"Rendering dashboard for {ticker}")
-            return render_template('dashboard.html', 
-                                  ticker=ticker, 
-                                  horizon=horizon,
-                                  stats=stats,
-                                  price_change_pct=price_change_pct,  # Pass the numeric value
-                                  price_change_pct_formatted=f"{price_change_pct:.2f}",  # Pass the formatted string as well
-                                  current_date=current_date,
-                                  price_chart=price_fig.to_html(full_html=False, include_plotlyjs='cdn'),
-                                  forecast_chart=fc_fig.to_html(full_html=False, include_plotlyjs=False)) 
+            ticker, horizon, model, interval = job_request(request.form)
         except ValueError as e:
-            logger.error(f"Value error for {ticker}: {str(e)}")
             flash(str(e), 'danger')
             return redirect('/')
-        except Exception as e:
-            logger.error(f"Error processing {ticker}: {str(e)}")
-            logger.error(traceback.format_exc())
-            flash(f"Error processing {ticker}: {str(e)}", 'danger')
-            return redirect('/')
+        
+        # Fitting happens in the job pool; the dashboard renders once it is done
+        job_id = job_queue.submit(ticker, horizon, model, interval=interval)
+        return redirect(url_for('web.job_dashboard', job_id=job_id))
             
-    return render_template('index.html')
+    models = [(name, label) for name, label in MODEL_CHOICES if model_available(name)]
+    intervals = [(interval, INTERVAL_LABELS.get(interval, interval)) for interval in Config.INTERVALS]
+    return render_template('index.html', models=models, intervals=intervals)
+
+def job_request(payload):
+    """
+    Validate a job payload ``{"ticker": "AAPL", "horizon": 30, "model":
+    "prophet", "interval": "1d"}``; returns ``(ticker, horizon, model,
+    interval)`` or raises ValueError with a message for the client
+    """
+    ticker = str(payload.get('ticker') or '').upper().strip()
+    if not ticker:
+        raise ValueError("ticker is required")
+    try:
+        horizon = int(payload.get('horizon', 30))
+    except (TypeError, ValueError):
+        raise ValueError("horizon must be an integer")
+    if not 1 <= horizon <= 365:
+        raise ValueError("horizon must be between 1 and 365")
+    return ticker, horizon, requested_model(payload), requested_interval(payload)
 
-@bp.post('/download/pdf')
-def download_pdf():
-    ticker = request.form['ticker']
-    horizon = int(request.form['horizon'])
+@bp.post('/jobs')
+def submit_job():
+    """Queue a forecast job and return its id without waiting for the fit"""
+    try:
+        ticker, horizon, model, interval = job_request(request.get_json(silent=True) or request.form)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    job_id = job_queue.submit(ticker, horizon, model, interval=interval)
+    return jsonify({"id": job_id, "status": QUEUED,
+                    "status_url": url_for('web.job_status', job_id=job_id)}), 202
+
+@bp.get('/jobs/<job_id>')
+def job_status(job_id):
+    """Report the status of a forecast job, with the forecast once it is done"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job {job_id}"}), 404
+    
+    forecast_df = job['result']
+    job['result'] = forecast_records(forecast_df) if forecast_df is not None else None
+    return jsonify(job)
+
+@bp.get('/jobs/<job_id>/dashboard')
+def job_dashboard(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        flash("Unknown forecast request, please try again.", 'danger')
+        return redirect('/')
+    
+    ticker, horizon, model, interval = job['ticker'], job['horizon'], job['model'], job['interval']
+    if job['status'] == FAILED:
+        logger.error(f"Forecast job {job_id} for {ticker} failed: {job['error']}")
+        flash(f"Error processing {ticker}: {job['error']}", 'danger')
+        return redirect('/')
+    if job['status'] != DONE:
+        return render_template('job.html', job=job, job_id=job_id)
     
     try:
-        logger.info(f"Generating PDF report for {ticker}")
-        # Get data and calculate indicators
-        df = fetch_price_history(ticker)
-        stats, _ = calculate_indicators(df)
+        df = fetch_price_history(ticker, interval=interval)
+        logger.info(f"Successfully fetched data for {ticker}: {len(df)} {interval} records")
         
-        # Forecast
-        forecaster = ProphetForecaster()
-        forecaster.fit(df)
-        forecast_df = forecaster.predict(horizon)
-        
-        # Get forecast metrics for the report
-        current_close = df['close'].iloc[-1]
-        forecast_close = forecast_df['yhat'].iloc[-1]
-        forecast_change = forecast_close - current_close
-        forecast_change_pct = (forecast_change / current_close) * 100
-        forecast_end_date = forecast_df.index[-1].strftime('%Y-%m-%d')
+        # Calculate all indicators
+        stats, price_change_pct = indicator_stats(ticker, df, interval)
         
         # Add forecast stats
-        stats.update({
-            'forecast_close': f"{forecast_close:.2f}",
-            'forecast_change_pct': f"{forecast_change_pct:.2f}",
-            'forecast_end_date': forecast_end_date
-        })
-        
-        # Create charts
-        price_fig = price_chart(df)
-        fc_fig = overlay_forecast(df, forecast_df)
+        stats.update(forecast_stats(df, job['result']))
         
-        # Current date for the report
+        # Current date for display
         current_date = datetime.now().strftime('%B %d, %Y')
         
-        # Create PDF
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as f:
-            build_pdf({
-                'ticker': ticker,
-                'horizon': horizon,
-                'stats': stats,
-                'current_date': current_date,
-                'fig_price': price_fig.to_html(full_html=False, include_plotlyjs='cdn'),
-                'fig_forecast': fc_fig.to_html(full_html=False, include_plotlyjs=False)
-            }, f.name)
-            
-            logger.info(f"PDF report generated successfully for {ticker}")
-            return send_file(f.name, as_attachment=True, download_name=f"{ticker}_report.pdf")
+        logger.info(f"Rendering dashboard for {ticker}")
+        return render_template('dashboard.html', 
+                              ticker=ticker, 
+                              horizon=horizon,
+                              model=model,
+                              interval=interval,
+                              stats=stats,
+                              price_change_pct=price_change_pct,  # Pass the numeric value
+                              price_change_pct_formatted=f"{price_change_pct:.2f}",  # Pass the formatted string as well
+                              current_date=current_date,
+                              chart_url=url_for('web.job_chart', job_id=job_id))
+    except ValueError as e:
+        logger.error(f"Value error for {ticker}: {str(e)}")
+        flash(str(e), 'danger')
+        return redirect('/')
     except Exception as e:
-        logger.error(f"Error generating PDF for {ticker}: {str(e)}")
+        logger.error(f"Error processing {ticker}: {str(e)}")
         logger.error(traceback.format_exc())
-        flash(f"Error generating PDF: {str(e)}", 'danger')
+        flash(f"Error processing {ticker}: {str(e)}", 'danger')
         return redirect('/')
 
-@bp.post('/download/csv')
-def download_csv():
-    ticker = request.form['ticker']
-    horizon = int(request.form['horizon'])
+@bp.get('/jobs/<job_id>/chart.json')
+def job_chart(job_id):
+    """
+    Plotly data for a finished job's two dashboard charts, revalidated by
+    ETag. With ``?months=N`` the history covers only the last N months,
+    downsampled on its own so short periods keep their full resolution
+    """
+    job = job_queue.get(job_id)
+    if job is None or job['status'] != DONE:
+        return jsonify({"error": f"No finished forecast for job {job_id}"}), 404
+    months = request.args.get('months', type=int)
+    if 'months' in request.args and not (months and 1 <= months <= 600):
+        return jsonify({"error": "months must be an integer between 1 and 600"}), 400
+    
+    ticker, forecast_df = job['ticker'], job['result']
+    df = fetch_price_history(ticker, interval=job['interval'])
+    if months:
+        df = visualize.last_months(df, months)
+    key = chart_key(ticker, df, forecast_df)
+    response = current_app.response_class(mimetype='application/json')
+    response.set_etag(key)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    if request.if_none_match.contains(key):
+        response.status_code = 304
+        return response
+    
+    response.set_data(cached_chart(ticker, df, forecast_df, key))
+    return response
+
+# kind -> (mimetype, file name suffix)
+DOWNLOADS = {
+    'pdf': ('application/pdf', 'report'),
+    'csv': ('text/csv', 'forecast'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'forecast'),
+}
+
+def build_artifact(kind, ticker, horizon, model, df, path, interval='1d'):
+    """Write the ``kind`` download for one forecast on ``interval`` bars to ``path``"""
+    # The forecast comes from the shared cache the dashboard job filled
+    forecast_df = get_forecast(ticker, df, horizon, model, interval=interval)
+    if kind == 'pdf':
+        reports.build_pdf(report_context(ticker, horizon, df, forecast_df, interval), path)
+    elif kind == 'csv':
+        forecast_df.to_csv(path)
+    else:
+        reports.dataframe_to_excel(forecast_df, path)
+
+@bp.route('/download/<kind>', methods=['GET', 'POST'])
+def download(kind):
+    """
+    Stream a forecast report (pdf) or export (csv, xlsx) from the artifact
+    store, building it on first request. The ETag is the artifact key, so
+    a repeated GET is answered with 304 Not Modified.
+    """
+    if kind not in DOWNLOADS:
+        return jsonify({"error": f"Unknown download type {kind!r}"}), 404
+    ticker = request.values['ticker'].upper().strip()
     
     try:
-        logger.info(f"Generating CSV forecast for {ticker}")
-        df = fetch_price_history(ticker)
-        forecaster = ProphetForecaster()
-        forecaster.fit(df)
-        forecast_df = forecaster.predict(horizon)
+        horizon = int(request.values['horizon'])
+        model = requested_model(request.values)
+        interval = requested_interval(request.values)
+        df = fetch_price_history(ticker, interval=interval)
+        key = make_key('artifact', kind, ticker, horizon, model, interval, data_fingerprint(df),
+                       Config.PDF_BACKEND if kind == 'pdf' else None)
+        path = artifact_store.get_or_create(
+            key, kind, lambda path: build_artifact(kind, ticker, horizon, model, df, path, interval))
         
-        logger.info(f"CSV forecast generated successfully for {ticker}")
-        return send_file(
-            io.BytesIO(forecast_df.to_csv().encode()), 
-            mimetype='text/csv',
-            as_attachment=True, 
-            download_name=f"{ticker}_forecast.csv"
-        )
+        mimetype, suffix = DOWNLOADS[kind]
+        logger.info(f"Serving {kind} for {ticker} ({model}, {interval}, horizon {horizon})")
+        return send_file(path, mimetype=mimetype, as_attachment=True,
+                         download_name=f"{ticker}_{suffix}.{kind}", conditional=True, etag=key)
     except Exception as e:
-        logger.error(f"Error generating CSV for {ticker}: {str(e)}")
+        logger.error(f"Error generating {kind} for {ticker}: {str(e)}")
         logger.error(traceback.format_exc())
-        flash(f"Error generating CSV: {str(e)}", 'danger')
+        flash(f"Error generating {kind.upper()}: {str(e)}", 'danger')
         return redirect('/')
 
 @bp.route('/health')
 def health_check():
-    """Simple endpoint to check if the application is running"""
-    return jsonify({"status": "ok", "message": "Stock forecast app is running"})
+    """Simple endpoint to check if the application is running, with this worker's cache statistics"""
+    return jsonify({"status": "ok", "message": "Stock forecast app is running",
+                    "history_cache": history_cache.stats()})
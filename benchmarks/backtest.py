@@ -0,0 +1,48 @@
+"""
+Rolling-origin accuracy and cost benchmark of the forecasting models.
+
+Runs offline on the synthetic histories from ``get_fallback_data``:
+
+    python benchmarks/backtest.py --models prophet arima auto_arima lstm \
+        --tickers AAA BBB --folds 5 --horizon 30 --out backtest.csv
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.data.loader import get_fallback_data
+from app.models import model_available
+from app.models.backtest import run_backtest, summarize
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--models', nargs='+', default=['prophet', 'arima', 'auto_arima', 'lstm'])
+    parser.add_argument('--tickers', nargs='+', default=['AAA', 'BBB', 'CCC', 'DDD'])
+    parser.add_argument('--horizon', type=int, default=30)
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--min-train', type=int, default=250)
+    parser.add_argument('--workers', type=int, default=None, help='pool size; 1 runs serially')
+    parser.add_argument('--params', type=json.loads, default={},
+                        help='JSON mapping model name to constructor parameters, e.g. \'{"lstm": {"epochs": 2}}\'')
+    parser.add_argument('--out', help='write per-fold results to this CSV file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    models = [m for m in args.models if model_available(m)]
+    skipped = sorted(set(args.models) - set(models))
+    if skipped:
+        print(f"Skipping unavailable models: {', '.join(skipped)}")
+
+    frames = {ticker: get_fallback_data(ticker) for ticker in args.tickers}
+    results = run_backtest(frames, models, args.params, args.horizon, args.folds,
+                           args.min_train, args.workers)
+    if args.out:
+        results.to_csv(args.out, index=False)
+    print(summarize(results).to_string(float_format=lambda v: f"{v:.3f}"))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""
+Measure cold import time of the app's modules and heavy backends.
+
+Each measurement runs in a fresh interpreter so nothing is already cached
+in ``sys.modules``:
+
+    python benchmarks/import_time.py [--repeat 3]
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TARGETS = [
+    ('flask', 'import flask'),
+    ('pandas', 'import pandas'),
+    ('yfinance', 'import yfinance'),
+    ('scipy.signal', 'import scipy.signal'),
+    ('plotly', 'import plotly.graph_objects'),
+    ('prophet', 'import prophet'),
+    ('statsmodels ARIMA', 'from statsmodels.tsa.arima.model import ARIMA'),
+    ('tensorflow', 'import tensorflow'),
+    ('app.web.routes', 'import app.web.routes'),
+    ('create_app()', 'from app import create_app; create_app()'),
+    ('create_app() + preload', 'from app import create_app, preload_backends; create_app(); preload_backends()'),
+]
+
+SNIPPET = """
+import time
+t0 = time.perf_counter()
+{statement}
+print(time.perf_counter() - t0)
+"""
+
+def measure(statement):
+    env = dict(os.environ, PYTHONPATH=ROOT, LOG_LEVEL='WARNING', PRELOAD_BACKENDS='0')
+    result = subprocess.run([sys.executable, '-c', SNIPPET.format(statement=statement)],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='runs per target; the best is reported')
+    args = parser.parse_args()
+
+    print(f"{'target':<26}{'seconds':>10}")
+    for name, statement in TARGETS:
+        times = [t for t in (measure(statement) for _ in range(args.repeat)) if t is not None]
+        print(f"{name:<26}{min(times):>10.3f}" if times else f"{name:<26}{'failed':>10}")
+
+if __name__ == '__main__':
+    main()
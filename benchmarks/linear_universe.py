@@ -0,0 +1,50 @@
+"""
+Time the batched linear forecaster on a synthetic universe.
+
+Fits ``--tickers`` random walks of ``--bars`` business days (a few percent
+of bars missing) in one ``forecast_universe`` call, and times a single
+``LinearForecaster`` fit for comparison:
+
+    python benchmarks/linear_universe.py --tickers 3000 --bars 1260
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.models.linear_model import LinearForecaster, forecast_universe
+
+def synthetic_universe(tickers: int, bars: int) -> dict:
+    rng = np.random.default_rng(0)
+    index = pd.date_range('2019-01-02', periods=bars, freq='B', name='date')
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, (bars, tickers)), axis=0))
+    close[rng.random((bars, tickers)) < 0.02] = np.nan
+    return {f"T{i:04d}": pd.DataFrame({'close': close[:, i]}, index=index) for i in range(tickers)}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tickers', type=int, default=3000)
+    parser.add_argument('--bars', type=int, default=1260)
+    parser.add_argument('--horizon', type=int, default=30)
+    args = parser.parse_args()
+
+    frames = synthetic_universe(args.tickers, args.bars)
+    started = time.perf_counter()
+    forecasts, errors = forecast_universe(frames, args.horizon)
+    elapsed = time.perf_counter() - started
+    print(f"{len(forecasts)} tickers x {args.bars} bars: {elapsed:.2f} s "
+          f"({elapsed / len(forecasts) * 1000:.2f} ms per ticker), {len(errors)} errors")
+
+    single = LinearForecaster()
+    started = time.perf_counter()
+    single.fit(frames['T0000'])
+    single.predict(args.horizon)
+    print(f"one ticker on its own: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+if __name__ == '__main__':
+    main()
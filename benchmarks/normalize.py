@@ -0,0 +1,78 @@
+"""
+Time yfinance normalization on a synthetic bulk download.
+
+Builds a frame shaped like ``yf.download(tickers, group_by='ticker')`` (or
+the default ``(Price, Ticker)`` layout with ``--layout column``) and
+compares the per-ticker loop the loader used to run with ``split_tickers``:
+
+    python benchmarks/normalize.py --tickers 500 --bars 6000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.data.normalize import normalize_ohlcv, split_tickers
+
+def synthetic_bulk(tickers: int, bars: int, layout: str = 'ticker') -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    names = [f"T{i:04d}" for i in range(tickers)]
+    index = pd.date_range('2000-01-03', periods=bars, freq='B', name='Date')
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, (bars, tickers)), axis=0))
+    # Later listings: each ticker starts at a random bar, NaN before it
+    close[np.arange(bars)[:, None] < rng.integers(0, bars // 2, tickers)] = np.nan
+    fields = {'Open': close * 0.99, 'High': close * 1.01, 'Low': close * 0.98, 'Close': close,
+              'Volume': np.where(np.isnan(close), np.nan, rng.integers(1e5, 1e7, (bars, tickers)))}
+    if layout == 'ticker':
+        columns = pd.MultiIndex.from_product([names, list(fields)], names=['Ticker', 'Price'])
+        values = np.stack([fields[f] for f in fields], axis=2).reshape(bars, -1)
+    else:
+        columns = pd.MultiIndex.from_product([list(fields), names], names=['Price', 'Ticker'])
+        values = np.concatenate([fields[f] for f in fields], axis=1)
+    return pd.DataFrame(values, index=index, columns=columns)
+
+def loop_split(bulk: pd.DataFrame) -> dict:
+    """The previous per-ticker loop, for comparison."""
+    frames = {}
+    for ticker in bulk.columns.get_level_values(0).unique():
+        df = bulk[ticker].dropna()
+        if df.empty:
+            continue
+        df.columns = [str(col).lower() for col in df.columns]
+        df.index.name = "date"
+        frames[ticker] = df
+    return frames
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--bars', type=int, default=6000)
+    parser.add_argument('--layout', choices=['ticker', 'column'], default='ticker')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    bulk = synthetic_bulk(args.tickers, args.bars, args.layout)
+    print(f"{args.tickers} tickers x {args.bars} bars, {bulk.memory_usage().sum() / 2**20:.0f} MB")
+    timings = {'split_tickers (float64)': lambda: split_tickers(bulk),
+               'split_tickers (float32)': lambda: split_tickers(bulk, dtype=np.float32),
+               'normalize_ohlcv, one ticker': lambda: normalize_ohlcv(bulk, 'T0000')}
+    if args.layout == 'ticker':
+        timings = {'per-ticker loop': lambda: loop_split(bulk), **timings}
+    for label, fn in timings.items():
+        print(f"{label:<30} {best_of(fn, args.repeat) * 1000:9.1f} ms")
+
+if __name__ == '__main__':
+    main()
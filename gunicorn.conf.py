@@ -0,0 +1,11 @@
+import os
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 2))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+loglevel = os.environ.get("GUNICORN_LOG_LEVEL", "info")
+
+# With PRELOAD_BACKENDS=1 the master builds the app and imports Prophet,
+# statsmodels, TensorFlow, Plotly and the report stack once; workers fork
+# from it with those modules already loaded and share their pages.
+preload_app = os.environ.get("PRELOAD_BACKENDS", "0").lower() in ("1", "true", "yes")
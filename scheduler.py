@@ -0,0 +1,48 @@
+"""
+Cache-warming scheduler, run as its own process next to the web app:
+
+    python scheduler.py                   # warm the watchlist after every close
+    python scheduler.py --once            # warm it now and exit
+    python scheduler.py --once --tickers AAPL:5,MSFT
+    python scheduler.py --history         # recent runs and their failures
+"""
+import argparse
+import json
+import signal
+import sys
+import threading
+
+from app import configure_logging
+from app.scheduler import from_config, parse_watchlist
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--once', action='store_true', help="run one warm-up now and exit")
+    parser.add_argument('--tickers', help="watchlist to use instead of WATCHLIST/WATCHLIST_FILE")
+    parser.add_argument('--history', type=int, nargs='?', const=10, metavar='N',
+                        help="print the last N runs and exit")
+    args = parser.parse_args()
+
+    configure_logging()
+    scheduler = from_config(parse_watchlist(args.tickers) if args.tickers else None)
+    if args.history:
+        print(json.dumps(scheduler.history(args.history), indent=2))
+        return 0
+    if not scheduler.watchlist:
+        print("The watchlist is empty: set WATCHLIST or WATCHLIST_FILE, or pass --tickers", file=sys.stderr)
+        return 2
+    if args.once:
+        summary = scheduler.run_once()
+        print(json.dumps(summary))
+        return 1 if summary['failed'] else 0
+
+    stop = threading.Event()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: stop.set())
+    scheduler.serve(stop)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
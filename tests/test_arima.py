@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import pytest
+from app.cache import ResultCache
+from app.models import arima_model, service
+from app.models.arima_model import AutoARIMAForecaster, select_order
+
+def _ar1(n=400, phi=0.7, seed=1):
+    rng = np.random.default_rng(seed)
+    x = np.zeros(n)
+    for i in range(1, n):
+        x[i] = phi * x[i - 1] + rng.normal()
+    idx = pd.date_range('2023-01-02', periods=n, freq='B', name='date')
+    return pd.DataFrame({'close': 50 + x}, index=idx)
+
+def test_select_order_finds_ar1_serially_and_in_parallel():
+    values = _ar1()['close'].to_numpy()
+    serial = select_order(values, max_p=3, max_q=3)
+    with ThreadPoolExecutor(4) as pool:
+        parallel = select_order(values, max_p=3, max_q=3, executor=pool)
+    assert serial == parallel
+    assert serial[1] == 0 and serial[0] >= 1
+
+def test_auto_arima_reuses_cached_order_and_dates_forecast(tmp_path, monkeypatch):
+    monkeypatch.setattr(service, '_arima_orders', ResultCache(tmp_path / 'orders.sqlite'))
+    monkeypatch.setattr(service.Config, 'ARIMA_SEARCH_WORKERS', 1)
+    df = _ar1()
+    params = {'max_p': 2, 'max_q': 2}
+    first = service.fit_auto_arima(df, params, ticker='aaa')
+
+    def no_search(*args, **kwargs):
+        raise AssertionError("order search should be skipped")
+    monkeypatch.setattr(arima_model, 'select_order', no_search)
+    again = service.fit_auto_arima(df.iloc[:-5], params, ticker='AAA')
+    assert again.order == first.order
+
+    forecast = again.predict(10)
+    assert list(forecast.columns) == ['yhat', 'yhat_lower', 'yhat_upper']
+    assert forecast.index[0] == df.index[-5]
+    assert (forecast['yhat_lower'] < forecast['yhat_upper']).all()
+    with pytest.raises(ValueError):
+        AutoARIMAForecaster(criterion='hqic')
+
+def test_order_search_runs_serially_inside_pool_workers(monkeypatch):
+    monkeypatch.setattr(service.Config, 'ARIMA_SEARCH_WORKERS', 4)
+    monkeypatch.setattr(service.multiprocessing, 'parent_process', lambda: object())
+    assert service.arima_search_pool() is None
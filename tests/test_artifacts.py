@@ -0,0 +1,42 @@
+import os
+import time
+import pytest
+from app.artifacts import ArtifactStore
+
+def _writer(size, calls):
+    def write(path):
+        calls.append(path)
+        with open(path, 'wb') as f:
+            f.write(b'x' * size)
+    return write
+
+def test_artifacts_built_once_and_evicted_by_size(tmp_path):
+    store = ArtifactStore(tmp_path, max_bytes=2500)
+    calls = []
+    first = store.get_or_create('a', 'pdf', _writer(1000, calls))
+    assert store.get_or_create('a', 'pdf', _writer(1000, calls)) == first
+    assert len(calls) == 1 and os.path.getsize(first) == 1000
+
+    second = store.get_or_create('b', 'csv', _writer(1000, calls))
+    old = time.time() - 100
+    os.utime(first, (old - 50, old - 50))
+    os.utime(second, (old, old))
+    store.get('a', 'pdf')  # serving a file makes it recent again
+    store.get_or_create('c', 'csv', _writer(1000, calls))
+    assert store.get('a', 'pdf') is not None
+    assert store.get('b', 'csv') is None and store.get('c', 'csv') is not None
+
+def test_failed_and_stale_temp_files_are_removed(tmp_path):
+    store = ArtifactStore(tmp_path, stale_after=60)
+    def broken(path):
+        open(path, 'w').close()
+        raise RuntimeError('renderer crashed')
+    with pytest.raises(RuntimeError):
+        store.put('k', 'pdf', broken)
+    assert os.listdir(tmp_path) == []
+
+    stale = tmp_path / 'abc.tmp.pdf'
+    stale.write_bytes(b'partial')
+    os.utime(stale, (time.time() - 120, time.time() - 120))
+    store.put('k', 'csv', _writer(10, []))
+    assert sorted(os.listdir(tmp_path)) == ['k.csv']
@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.models.backtest import rolling_origins, run_backtest, score, summarize
+
+def test_rolling_origins_and_scores():
+    assert rolling_origins(400, 30, 3, 250) == [250, 310, 370]
+    assert rolling_origins(400, 30, 1, 250) == [370]
+    with pytest.raises(ValueError):
+        rolling_origins(100, 30, 3, 250)
+    metrics = score([100, 200], [110, 180])
+    assert metrics['mape'] == pytest.approx(10.0)
+    assert metrics['rmse'] == pytest.approx(np.sqrt((100 + 400) / 2))
+
+def test_backtest_reports_accuracy_and_cost_per_fold():
+    rng = np.random.default_rng(2)
+    idx = pd.date_range('2022-01-03', periods=330, freq='B', name='date')
+    df = pd.DataFrame({'close': 100 * np.cumprod(1 + rng.normal(0, 0.01, 330))}, index=idx)
+    results = run_backtest({'AAA': df}, ['arima', 'auto_arima'],
+                           {'auto_arima': {'max_p': 1, 'max_q': 1}},
+                           horizon=10, folds=3, min_train=250, workers=1)
+    assert len(results) == 6
+    assert set(results.columns) >= {'mape', 'rmse', 'fit_s', 'predict_s', 'peak_mb'}
+    assert (results['mape'] > 0).all() and (results['peak_mb'] > 0).all()
+    summary = summarize(results)
+    assert list(summary['folds']) == [3, 3]
+
+def test_lstm_folds_keep_training_on_newer_bars(monkeypatch):
+    from app.models.lstm_model import LSTMForecaster
+    trained = []
+    update = LSTMForecaster.update
+    def spy(self, df, epochs=None):
+        weights = [w.copy() for w in self.model.get_weights()]
+        update(self, df, epochs)
+        trained.append((len(df), any((w != v).any() for w, v in zip(weights, self.model.get_weights()))))
+    monkeypatch.setattr(LSTMForecaster, 'update', spy)
+    idx = pd.date_range('2022-01-03', periods=330, freq='B', name='date')
+    df = pd.DataFrame({'close': 100 + np.sin(np.arange(330) / 5)}, index=idx)
+    results = run_backtest({'AAA': df}, ['lstm'], {'lstm': {'seq_len': 10, 'epochs': 1}},
+                           horizon=10, folds=3, min_train=250, workers=1)
+    assert len(results) == 3
+    # Each later fold trains the previous fold's network on its own window
+    assert trained == [(285, True), (320, True)]
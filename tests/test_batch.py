@@ -0,0 +1,74 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from app.data import loader
+from app.data.store import PriceStore
+from app.models import service
+from app.web import api
+
+def _bars(start, periods):
+    idx = pd.date_range(start, periods=periods, freq='B', name='date')
+    close = 100 + np.arange(periods, dtype=float)
+    return pd.DataFrame({'open': close, 'high': close, 'low': close, 'close': close, 'volume': 1.0}, index=idx)
+
+class _Chain:
+    def __init__(self):
+        self.calls = []
+
+    def fetch(self, ticker, since, interval):
+        self.calls.append((ticker, since))
+        return _bars('2024-01-01', 40)
+
+def test_batch_histories_bulk_download_unseen_and_stale_tickers(tmp_path, monkeypatch):
+    store = PriceStore(tmp_path)
+    monkeypatch.setattr(loader, 'price_store', store)
+    store.write('OLD', '1d', _bars('2024-01-01', 20), start='2024-01-01', fetched_at=0)
+    store.write('LATE', '1d', _bars('2024-01-01', 10), start='2024-01-01', fetched_at=0)
+    store.write('FRESH', '1d', _bars('2024-01-01', 20), start='2024-01-01', fetched_at=time.time())
+    # LATE is planned from a later date than its sync asks for under the lock
+    pending = store.pending_start
+    monkeypatch.setattr(store, 'pending_start', lambda ticker, *args: '2024-01-29' if ticker == 'LATE'
+                        else pending(ticker, *args))
+    downloads = []
+    def download_many(tickers, since, interval):
+        downloads.append((sorted(tickers), str(pd.Timestamp(since).date())))
+        return {t: _bars('2024-01-01', 40)[lambda df: df.index >= pd.Timestamp(since)] for t in tickers}
+    monkeypatch.setattr(loader, '_download_many', download_many)
+    chain = _Chain()
+    monkeypatch.setattr(loader, 'default_chain', lambda: chain)
+
+    frames, errors = loader.fetch_price_histories(['NEW', 'OLD', 'LATE', 'FRESH'], start='2024-01-01')
+    assert not errors and downloads == [(['NEW'], '2024-01-01'), (['LATE', 'OLD'], '2024-01-25')]
+    # OLD is served from its bulk frame; LATE's starts after the anchor it is synced from
+    assert chain.calls == [('LATE', '2024-01-11')]
+    assert len(frames['NEW']) == len(frames['OLD']) == len(frames['LATE']) == 40
+    assert len(frames['FRESH']) == 20
+
+def test_batch_forecast_streams_ndjson_lines(monkeypatch):
+    from app import create_app
+    history = _bars('2010-01-01', 3000)
+    monkeypatch.setattr(api, 'fetch_price_histories', lambda tickers: (
+        {t: history for t in tickers if t != 'GONE'}, {'GONE': 'No data for GONE'}))
+    executor = ThreadPoolExecutor(2)
+    monkeypatch.setattr(api, 'batch_pool', lambda: executor)
+    sizes = {}
+    def forecast(ticker, df, horizon, model, params):
+        sizes[ticker] = len(df)
+        if ticker == 'BAD':
+            raise ValueError("fit failed")
+        return pd.DataFrame({'yhat': [1.0] * horizon}, index=pd.date_range('2021-06-01', periods=horizon))
+    monkeypatch.setattr(service, 'get_forecast', forecast)
+
+    response = create_app().test_client().post('/api/forecast/batch', json={
+        'tickers': ['aapl', 'BAD', 'GONE', 'AAPL'], 'model': 'arima', 'horizon': 2})
+    assert response.mimetype == 'application/x-ndjson'
+    lines = {line['ticker']: line for line in map(json.loads, response.get_data(as_text=True).splitlines())}
+    assert set(lines) == {'AAPL', 'BAD', 'GONE'}
+    assert lines['GONE'] == {'ticker': 'GONE', 'status': 'error', 'error': 'No data for GONE'}
+    assert lines['BAD']['status'] == 'error' and lines['BAD']['error'] == 'fit failed'
+    assert lines['AAPL']['status'] == 'ok' and len(lines['AAPL']['forecast']) == 2
+    # Frames reach the pool cut to the model's lookback
+    assert sizes == {'AAPL': service.model_lookback('arima'), 'BAD': service.model_lookback('arima')}
+    executor.shutdown()
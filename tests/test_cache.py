@@ -0,0 +1,58 @@
+import time
+import numpy as np
+import pandas as pd
+from app.cache import MemoryLRU, ResultCache, make_key
+from app.models import service
+
+def test_result_cache_ttl_and_size_eviction(tmp_path):
+    cache = ResultCache(tmp_path / 'c.sqlite', ttl=60, max_bytes=3000)
+    for i in range(3):
+        cache.set(make_key('k', i), b'x' * 900)
+        time.sleep(0.01)
+    cache.get(make_key('k', 0))
+    cache.set(make_key('k', 3), b'x' * 900)
+    # The most recently read entry survives, the oldest untouched ones go
+    assert cache.get(make_key('k', 0)) is not None
+    assert cache.get(make_key('k', 1)) is None
+    assert cache.get(make_key('k', 3)) is not None
+
+    cache.ttl = 0
+    assert cache.get(make_key('k', 3)) is None
+
+def test_memory_lru_bounds_bytes_and_counts_hits():
+    cache = MemoryLRU(max_bytes=2 * 8000 + 500)
+    frames = {i: pd.DataFrame({'close': np.zeros(1000)}) for i in range(3)}
+    size = frames[0].memory_usage(index=True, deep=True).sum()
+    cache.set('a', frames[0])
+    cache.set('b', frames[1])
+    assert cache.get('a') is frames[0]
+    cache.set('c', frames[2])
+    # Least recently used goes first once the byte budget is exceeded
+    assert cache.get('b') is None and cache.get('a') is frames[0]
+    stats = cache.stats()
+    assert stats['entries'] == 2 and stats['bytes'] == 2 * size <= stats['max_bytes']
+    assert (stats['hits'], stats['misses'], stats['evictions']) == (2, 1, 1)
+    assert cache.get('zz', count_miss=False) is None and cache.stats()['misses'] == 1
+
+    cache.ttl = 0
+    time.sleep(0.01)
+    assert cache.get('a') is None
+
+def test_get_forecast_fits_once_per_data_version(tmp_path, monkeypatch):
+    monkeypatch.setattr(service, 'forecast_cache', ResultCache(tmp_path / 'f.sqlite'))
+    fits = []
+    def fake_run(df, horizon, model='prophet', params=None, ticker=None):
+        fits.append(model)
+        return pd.DataFrame({'yhat': np.full(horizon, df['close'].iloc[-1])})
+    monkeypatch.setattr(service, 'run_forecast', fake_run)
+
+    idx = pd.date_range('2024-01-01', periods=50, freq='B', name='date')
+    df = pd.DataFrame({'close': np.linspace(1, 2, 50)}, index=idx)
+    first = service.get_forecast('aapl', df, 7)
+    again = service.get_forecast('AAPL', df.copy(), 7)
+    pd.testing.assert_frame_equal(first, again)
+    assert len(fits) == 1
+
+    service.get_forecast('AAPL', df.iloc[:-1], 7)
+    service.get_forecast('AAPL', df, 14)
+    assert len(fits) == 3
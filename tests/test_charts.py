@@ -0,0 +1,37 @@
+import json
+import numpy as np
+import pandas as pd
+from app.visualize.chart_data import chart_payload, downsample, last_months, lttb, minmax
+
+def _close(n=6000, seed=4):
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range('2000-01-03', periods=n, freq='B', name='date')
+    return pd.Series(100 * np.cumprod(1 + rng.normal(0, 0.01, n)), index=idx, name='close')
+
+def test_downsampling_keeps_endpoints_and_extremes():
+    close = _close()
+    close.iloc[3001] = 1000.0  # a spike any faithful downsample must keep
+    for method in ('lttb', 'minmax'):
+        small = downsample(close, 500, method)
+        assert len(small) <= 502 and small.index.is_monotonic_increasing
+        assert small.index[0] == close.index[0] and small.index[-1] == close.index[-1]
+        assert small.max() == 1000.0
+    assert set(minmax(close.to_numpy(), 500)) >= {int(close.argmin()), int(close.argmax())}
+    assert len(lttb(np.arange(10), np.arange(10.0), 20)) == 10
+    assert downsample(close, 0).equals(close)
+
+def test_chart_payload_holds_history_once():
+    df = _close().to_frame()
+    forecast = pd.DataFrame({'yhat': [1.0, 2.0]}, index=pd.date_range('2023-01-02', periods=2, name='ds'))
+    payload = json.loads(chart_payload(df, forecast, max_points=800))
+    assert len(payload['history']['x']) == 800
+    assert payload['history']['x'][0] == '2000-01-03'
+    assert [t['name'] for t in payload['forecast']['data']] == ['Forecast']
+
+def test_recent_periods_keep_every_bar():
+    df = _close().to_frame()
+    year = last_months(df, 12)
+    assert year.index[-1] == df.index[-1] and year.index[0] >= df.index[-1] - pd.DateOffset(months=12)
+    assert len(year) > 250 and last_months(df.iloc[:0], 3).empty
+    payload = json.loads(chart_payload(year, df['close'].iloc[-2:].rename('yhat'), max_points=800))
+    assert len(payload['history']['x']) == len(year)
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.data.indicators import sma, ema, rsi, macd, compute_indicators, volatility_mean, LOOKBACK
+from app.web.routes import calculate_indicators
+
+def _close(n, seed):
+    rng = np.random.default_rng(seed)
+    return 100 * np.cumprod(1 + rng.normal(0.0005, 0.015, n))
+
+def test_engine_matches_pandas_indicators():
+    close = pd.Series(_close(500, 1))
+    ind = compute_indicators(close.to_numpy())
+    np.testing.assert_allclose(ind['sma_20'], sma(close, 20), rtol=1e-10)
+    np.testing.assert_allclose(ind['ema_26'], ema(close, 26), rtol=1e-10)
+    np.testing.assert_allclose(ind['rsi_14'], rsi(close, 14).reindex(close.index), rtol=1e-8)
+    m = macd(close)
+    np.testing.assert_allclose(ind['macd'], m['macd'], rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(ind['macd_signal'], m['signal'], rtol=1e-8, atol=1e-10)
+    np.testing.assert_allclose(ind['bb_upper'], sma(close, 20) + 2 * close.rolling(20).std(), rtol=1e-10)
+    vol = close.pct_change().rolling(30).std() * np.sqrt(252) * 100
+    np.testing.assert_allclose(ind['volatility_30d'], vol, rtol=1e-8)
+
+def test_engine_handles_universe_with_short_histories():
+    a, b = _close(300, 2), _close(300, 3)
+    b[:120] = np.nan  # listed later
+    high, low = np.vstack([a, b]) * 1.01, np.vstack([a, b]) * 0.99
+    ind = compute_indicators(np.vstack([a, b]), high=high, low=low)
+    assert ind['ema_12'].shape == (2, 300)
+
+    for row, series in enumerate((a, b)):
+        close = pd.Series(series)
+        one = compute_indicators(series, high=high[row], low=low[row])
+        for name in ('sma_50', 'ema_12', 'macd_signal', 'stoch_d', 'atr_14'):
+            np.testing.assert_allclose(ind[name][row], one[name], rtol=1e-10)
+        np.testing.assert_allclose(ind['ema_12'][row], ema(close, 12), rtol=1e-10)
+        np.testing.assert_allclose(ind['sma_50'][row], sma(close, 50), rtol=1e-10)
+
+def test_lookback_slice_gives_latest_values_of_full_history():
+    close = _close(3000, 4)
+    full = compute_indicators(close)
+    tail = compute_indicators(close[-LOOKBACK:])
+    for name in ('sma_50', 'ema_26', 'macd_signal', 'rsi_14', 'bb_width', 'stoch_k', 'volatility_30d'):
+        np.testing.assert_allclose(tail[name][-1], full[name][-1], rtol=1e-7, err_msg=name)
+
+def test_volatility_is_judged_against_the_whole_history():
+    # Turbulent years, then calm bars that turn a little livelier at the end
+    rng = np.random.default_rng(5)
+    returns = np.concatenate([rng.normal(0, 0.04, 2000), rng.normal(0, 0.005, 960), rng.normal(0, 0.015, 40)])
+    close = 100 * np.cumprod(1 + returns)
+    volatility = compute_indicators(close)['volatility_30d']
+    assert volatility_mean(close) == pytest.approx(np.nanmean(volatility))
+    assert np.nanmean(volatility[-LOOKBACK:]) < volatility[-1] < volatility_mean(close)
+    idx = pd.date_range('2010-01-01', periods=len(close), freq='B', name='date')
+    stats, _ = calculate_indicators(pd.DataFrame({'close': close}, index=idx))
+    assert not stats['volatility_high']
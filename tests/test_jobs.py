@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import pytest
+import app.data
+from app.jobs import DONE, FAILED, JobQueue
+from app.models import service
+from app.web.routes import job_request
+
+def test_job_request_validates_payload():
+    assert job_request({'ticker': ' aapl ', 'horizon': '14'}) == ('AAPL', 14, 'prophet', '1d')
+    for payload, message in (({'horizon': 30}, 'ticker'), ({'ticker': 'AAPL', 'horizon': 'soon'}, 'integer'),
+                             ({'ticker': 'AAPL', 'horizon': 0}, 'between'),
+                             ({'ticker': 'AAPL', 'interval': '2d'}, 'interval')):
+        with pytest.raises(ValueError, match=message):
+            job_request(payload)
+
+def test_job_queue_runs_fails_and_times_out_jobs(tmp_path, monkeypatch):
+    release = threading.Event()
+    history = pd.DataFrame({'close': [1.0, 2.0]}, index=pd.date_range('2024-01-01', periods=2))
+
+    def forecast(ticker, df, horizon, model, params, interval):
+        if ticker == 'SLOW':
+            release.wait(5)
+        if ticker == 'BAD':
+            raise ValueError("no data for BAD")
+        return pd.DataFrame({'yhat': [3.0] * horizon}, index=pd.date_range('2024-01-03', periods=horizon))
+
+    monkeypatch.setattr(app.data, 'fetch_price_history', lambda ticker, **kwargs: history)
+    monkeypatch.setattr(service, 'get_forecast', forecast)
+    queue = JobQueue(tmp_path / 'jobs.sqlite', timeout=60)
+    queue._executor, queue._pid = ThreadPoolExecutor(2), os.getpid()
+
+    def finished(job_id):
+        for _ in range(200):
+            job = queue.get(job_id)
+            if job['status'] in (DONE, FAILED):
+                return job
+            time.sleep(0.01)
+        raise AssertionError(f"job {job_id} did not finish")
+
+    done = finished(queue.submit('AAPL', 3, 'prophet', interval='1wk'))
+    assert done['ticker'] == 'AAPL' and done['interval'] == '1wk' and list(done['result']['yhat']) == [3.0] * 3
+    failed = finished(queue.submit('BAD', 3))
+    assert failed['error'] == "no data for BAD" and failed['result'] is None
+    assert queue.get('missing') is None
+
+    slow = queue.submit('SLOW', 3)
+    queue.timeout = 0
+    job = queue.get(slow)
+    assert job['status'] == FAILED and 'did not finish' in job['error']
+    release.set()
+    queue._executor.shutdown()
+
+def test_dashboard_form_flashes_bad_horizons_instead_of_queueing(monkeypatch):
+    from app import create_app
+    from app.web import routes
+    submitted = []
+    monkeypatch.setattr(routes.job_queue, 'submit', lambda *args, **kwargs: submitted.append(args) or 'job')
+    client = create_app().test_client()
+    for horizon in ('soon', '0', '100000'):
+        response = client.post('/', data={'ticker': 'AAPL', 'horizon': horizon})
+        assert response.status_code == 302 and response.location == '/'
+    assert not submitted
+    assert client.post('/', data={'ticker': 'aapl', 'horizon': '10'}).status_code == 302
+    assert submitted == [('AAPL', 10, 'prophet')]
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+from app.cache import ResultCache
+from app.models import get_forecaster, service
+from app.models.linear_model import LinearBatchModel, LinearForecaster
+
+def _truth(i, idx):
+    # A slope change at bar 500 plus yearly seasonality
+    t = np.arange(len(idx))
+    trend = 50 + (0.02 + 0.01 * i) * t - 0.03 * np.clip(t - 500, 0, None)
+    return trend + 2 * np.sin(2 * np.pi * idx.dayofyear / 365.25)
+
+def _frames(n=5, bars=800, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range('2021-01-04', periods=bars, freq='B', name='date')
+    return {f"T{i}": pd.DataFrame({'close': _truth(i, idx) + rng.normal(0, 0.3, bars)}, index=idx)
+            for i in range(n)}
+
+def test_batch_fit_matches_single_fits_and_tracks_trend():
+    frames = _frames()
+    frames['T1'].iloc[::7] = np.nan
+    frames['T2'] = frames['T2'].iloc[100:]
+    frames['SHORT'] = frames['T0'].iloc[:10]
+    batch = LinearBatchModel().fit(frames)
+    assert set(batch.errors) == {'SHORT'}
+    forecasts = batch.predict(20)
+    # A refit only reports the errors of its own frames
+    assert not LinearBatchModel().fit(frames).fit({'T0': frames['T0']}).errors
+
+    for ticker in ('T0', 'T1', 'T2'):
+        single = LinearForecaster()
+        single.fit(frames[ticker])
+        pd.testing.assert_frame_equal(single.predict(20), forecasts[ticker], rtol=1e-6)
+    f = forecasts['T3']
+    assert f.index[0] == frames['T3'].index[-1] + pd.offsets.BDay()
+    assert list(f.columns) == ['yhat', 'yhat_lower', 'yhat_upper']
+    assert (f['yhat_lower'] < f['yhat']).all() and (f['yhat'] < f['yhat_upper']).all()
+    # Follows the trend after its change and the seasonality
+    idx = pd.date_range('2021-01-04', periods=820, freq='B')
+    assert np.abs(f['yhat'].to_numpy() - _truth(3, idx)[800:]).max() < 0.5
+
+def test_batch_forecasts_fit_together_and_reuse_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(service, 'forecast_cache', ResultCache(tmp_path / 'f.sqlite'))
+    assert get_forecaster('linear') is LinearForecaster
+    frames = _frames(n=3)
+    frames['SHORT'] = frames['T0'].iloc[:5]
+    first = {t: (f, e) for t, f, e in service.iter_batch_forecasts(frames, 10, None, 'linear')}
+    assert first['SHORT'][0] is None and 'prices' in first['SHORT'][1]
+    calls = []
+    monkeypatch.setattr('app.models.linear_model.forecast_universe', lambda *a, **k: calls.append(a))
+    again = {t: (f, e) for t, f, e in service.iter_batch_forecasts(
+        {t: frames[t] for t in ('T0', 'T1', 'T2')}, 10, None, 'linear')}
+    assert not calls
+    pd.testing.assert_frame_equal(again['T1'][0], first['T1'][0])
+    # The single-ticker path reads the same cache entries
+    pd.testing.assert_frame_equal(service.get_forecast('t2', frames['T2'], 10, 'linear'), first['T2'][0])
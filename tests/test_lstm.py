@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+from app.models.lstm_model import LSTMForecaster
+
+def _fitted(seq_len=10):
+    rng = np.random.default_rng(3)
+    close = 100 + np.cumsum(rng.normal(0, 1, 120))
+    df = pd.DataFrame({'close': close}, index=pd.date_range('2022-01-03', periods=120, freq='B'))
+    forecaster = LSTMForecaster(seq_len=seq_len, epochs=1)
+    forecaster.fit(df)
+    return forecaster, close
+
+def test_batched_rollout_matches_step_by_step_predict():
+    forecaster, close = _fitted()
+    seq, expected = close[-10:].copy(), []
+    for _ in range(5):
+        inp = forecaster.scaler.transform(seq.reshape(-1, 1)).reshape(1, 10, 1)
+        val = forecaster.scaler.inverse_transform(forecaster.model.predict(inp, verbose=0))[0, 0]
+        expected.append(val)
+        seq = np.append(seq[1:], val)
+
+    result = forecaster.predict(5)
+    assert len(result) == 5
+    np.testing.assert_allclose(result.to_numpy(), expected, rtol=1e-4)
+
+    batch = forecaster.predict_many([close, close[:-20], close[:-40]], steps=5)
+    assert batch.shape == (3, 5)
+    np.testing.assert_allclose(batch[0], expected, rtol=1e-4)
+    np.testing.assert_allclose(batch[2], forecaster.predict_many([close[:-40]], 5)[0], rtol=1e-5)
+
+def test_shared_model_over_many_tickers():
+    rng = np.random.default_rng(5)
+    idx = pd.date_range('2022-01-03', periods=80, freq='B')
+    frames = {t: pd.DataFrame({'close': level + np.cumsum(rng.normal(0, 1, 80))}, index=idx)
+              for t, level in (('AAA', 20), ('BBB', 500), ('CCC', 90))}
+    frames['TINY'] = frames['AAA'].iloc[:5]
+    weeks = pd.date_range('2020-01-06', periods=80, freq='W-MON')
+    frames['WEEK'] = pd.DataFrame({'close': 50 + np.cumsum(rng.normal(0, 1, 80))}, index=weeks)
+    forecaster = LSTMForecaster(seq_len=10, epochs=1)
+    forecaster.fit_many(frames)
+    forecasts = forecaster.predict_tickers(steps=4)
+    assert set(forecasts) == {'AAA', 'BBB', 'CCC', 'WEEK'}
+    # Dated from each ticker's own bars
+    assert forecasts['AAA'].index[0] == idx[-1] + pd.offsets.BDay()
+    assert list(forecasts['WEEK'].index) == list(pd.date_range(weeks[-1], periods=5, freq='W-MON')[1:])
+    # Each ticker is rescaled back to its own price level
+    assert abs(forecasts['BBB'].iloc[0] - frames['BBB']['close'].iloc[-1]) < 100
+    assert abs(forecasts['AAA'].iloc[0] - frames['AAA']['close'].iloc[-1]) < 30
@@ -0,0 +1,46 @@
+import json
+import os
+import time
+from app import utils
+from app.utils import Metrics, timed
+
+def test_timed_records_stage_histograms(monkeypatch):
+    registry = Metrics()
+    monkeypatch.setattr(utils, 'metrics', registry)
+
+    @timed('fit', model='arima')
+    def fit():
+        time.sleep(0.02)
+    fit()
+    fit()
+    with timed('chart'):
+        pass
+    registry.inc('model_fits_total', model='arima')
+
+    text = registry.render()
+    assert '# TYPE stockapp_stage_seconds histogram' in text
+    assert 'stockapp_stage_seconds_count{model="arima",stage="fit"} 2' in text
+    assert 'stockapp_stage_seconds_bucket{model="arima",stage="fit",le="0.01"} 0' in text
+    assert 'stockapp_stage_seconds_bucket{model="arima",stage="fit",le="+Inf"} 2' in text
+    assert 'stockapp_stage_seconds_count{stage="chart"} 1' in text
+    assert 'stockapp_model_fits_total{model="arima"} 1' in text
+
+def test_metrics_sum_processes_and_fold_exited_ones(tmp_path):
+    registry = Metrics(str(tmp_path))
+    registry.inc('cache_lookups_total', 3, cache='forecasts', result='hit')
+    registry.set_gauge('cache_bytes', 100, cache='history')
+    # A pool process that has exited left its values behind
+    dead_pid = 2 ** 22 + 1
+    exited = Metrics()
+    exited.inc('cache_lookups_total', cache='forecasts', result='miss')
+    exited.set_gauge('cache_bytes', 50, cache='history')
+    exited.observe('stage_seconds', 0.2, stage='fit')
+    (tmp_path / f"{dead_pid}.json").write_text(json.dumps(exited.values))
+
+    for _ in range(2):
+        text = registry.render()
+        assert 'stockapp_cache_lookups_total{cache="forecasts",result="miss"} 1' in text
+        assert 'stockapp_cache_hit_ratio{cache="forecasts"} 0.75' in text
+        assert 'stockapp_cache_bytes{cache="history"} 100' in text
+        assert 'stockapp_stage_seconds_count{stage="fit"} 1' in text
+    assert sorted(os.listdir(tmp_path)) == sorted(['.lock', 'exited.json', f"{os.getpid()}.json"])
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.data.normalize import normalize_ohlcv, split_tickers
+
+FIELDS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+def _bulk(tickers, bars=10, by_ticker=True):
+    index = pd.date_range('2024-01-01', periods=bars, freq='B', name='Date')
+    frames = {}
+    for n, ticker in enumerate(tickers):
+        close = np.arange(bars, dtype=float) + 100 * (n + 1)
+        frames[ticker] = pd.DataFrame({'Open': close - 1, 'High': close + 1, 'Low': close - 2,
+                                       'Close': close, 'Volume': np.full(bars, 1000.0)}, index=index)
+    if by_ticker:
+        return pd.concat(frames, axis=1, names=['Ticker', 'Price'])
+    return pd.concat(frames, axis=1, names=['Ticker', 'Price']).swaplevel(axis=1).sort_index(axis=1)
+
+@pytest.mark.parametrize('by_ticker', [True, False])
+def test_single_ticker_multiindex_keeps_ohlcv(by_ticker):
+    df = normalize_ohlcv(_bulk(['AAPL'], by_ticker=by_ticker), 'AAPL')
+    assert list(df.columns) == ['open', 'high', 'low', 'close', 'volume']
+    assert df.index.name == 'date' and df['volume'].dtype == np.int64
+    assert df['close'].iloc[0] == 100.0 and df['low'].iloc[0] == 98.0
+
+def test_flat_frame_drops_rows_without_close():
+    flat = _bulk(['X'])['X'].copy()
+    flat.iloc[3, flat.columns.get_loc('Close')] = np.nan
+    flat.iloc[5, flat.columns.get_loc('Volume')] = np.nan
+    df = normalize_ohlcv(flat, dtype=np.float32)
+    assert len(df) == 9 and df['close'].dtype == np.float32
+    assert df['volume'].dtype == np.int64 and (df['volume'] == 0).sum() == 1
+
+@pytest.mark.parametrize('by_ticker', [True, False])
+def test_split_tickers_matches_single_ticker_normalization(by_ticker):
+    bulk = _bulk(['AAA', 'BBB', 'CCC'], by_ticker=by_ticker)
+    # BBB lists late, CCC has a gap and DDD never traded
+    bulk.loc[bulk.index[:4], ('BBB', 'Close') if by_ticker else ('Close', 'BBB')] = np.nan
+    bulk.loc[bulk.index[6], ('CCC', 'Close') if by_ticker else ('Close', 'CCC')] = np.nan
+    empty = pd.DataFrame(np.nan, index=bulk.index, columns=pd.MultiIndex.from_tuples(
+        [('DDD', f) if by_ticker else (f, 'DDD') for f in FIELDS]))
+    bulk = pd.concat([bulk, empty], axis=1)
+
+    frames = split_tickers(bulk)
+    assert sorted(frames) == ['AAA', 'BBB', 'CCC']
+    assert len(frames['BBB']) == 6 and len(frames['CCC']) == 9
+    for ticker, df in frames.items():
+        pd.testing.assert_frame_equal(df, normalize_ohlcv(bulk, ticker), check_freq=False)
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+from app.models import prophet_model
+from app.models.prophet_model import ProphetForecaster, ProphetModelStore
+from app.models.service import data_fingerprint
+
+def _history(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range('2021-01-04', periods=n, freq='B', name='date')
+    return pd.DataFrame({'close': 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.012, n)))}, index=idx)
+
+def test_horizon_only_prediction_matches_full_and_fast_intervals():
+    forecaster = ProphetForecaster(uncertainty_samples=2000)
+    forecaster.fit(_history())
+    model = forecaster.model
+    full = model.predict(model.make_future_dataframe(periods=30)).set_index('ds')[-30:]
+
+    sampled = forecaster.predict(30)
+    pd.testing.assert_index_equal(sampled.index, full.index)
+    np.testing.assert_allclose(sampled['yhat'], full['yhat'])
+
+    forecaster.fast = True
+    many = forecaster.predict_many([7, 30])
+    assert len(many[7]) == 7 and many[7].index.equals(full.index[:7])
+    np.testing.assert_allclose(many[30]['yhat'], full['yhat'])
+    # Analytic intervals agree with the simulated ones up to sampling noise
+    width = (many[30]['yhat_upper'] - many[30]['yhat_lower']).to_numpy()
+    sampled_width = (sampled['yhat_upper'] - sampled['yhat_lower']).to_numpy()
+    np.testing.assert_allclose(width, sampled_width, rtol=0.15)
+    assert np.all(np.diff(width) >= 0)
+
+def _spy_fits(monkeypatch):
+    """Starting values (None for a cold start) of every Prophet fit"""
+    inits = []
+    original = ProphetForecaster.fit
+    def fit(self, df, init=None):
+        inits.append(init)
+        return original(self, df, init=init)
+    monkeypatch.setattr(prophet_model.ProphetForecaster, 'fit', fit)
+    return inits
+
+def test_model_store_reuses_then_warm_starts(tmp_path, monkeypatch):
+    inits = _spy_fits(monkeypatch)
+    store = ProphetModelStore(tmp_path)
+    df = _history(300)
+    first = store.fit('ABC', df, fingerprint=data_fingerprint(df))
+    assert inits == [None]
+    # Unchanged data: the saved model is returned without fitting
+    again = store.fit('ABC', df, fingerprint=data_fingerprint(df))
+    assert len(inits) == 1
+    pd.testing.assert_series_equal(again.predict(5)['yhat'], first.predict(5)['yhat'])
+    # Predict-only options share the saved fit and are applied on load
+    fast = store.fit('ABC', df, params={'uncertainty_samples': 0, 'fast': True}, fingerprint=data_fingerprint(df))
+    assert len(inits) == 1 and fast.fast and fast.uncertainty_samples == 0
+    assert len(list(tmp_path.glob('ABC_*.json'))) == 1
+    # New bars: refit from the saved parameters
+    longer = _history(305)
+    refit = store.fit('ABC', longer, fingerprint=data_fingerprint(longer))
+    assert len(inits) == 2 and set(inits[1]) == {'k', 'm', 'sigma_obs', 'delta', 'beta'}
+    assert refit.cutoff == longer.index[-1]
+
+def test_model_store_fits_cold_without_a_usable_saved_model(tmp_path, monkeypatch):
+    inits = _spy_fits(monkeypatch)
+    store = ProphetModelStore(tmp_path)
+    df = _history(300)
+    store.fit('ABC', df, fingerprint=data_fingerprint(df))
+    # Other parameters are saved separately and fitted from scratch
+    store.fit('ABC', df, params={'daily_seasonality': False}, fingerprint=data_fingerprint(df))
+    assert inits == [None, None]
+    assert store.load('ABC', {'daily_seasonality': False})[0].daily_seasonality is False
+    # A corrupt or missing saved model is ignored
+    with open(store._path('ABC', {}), 'w') as f:
+        f.write('{not json')
+    assert store.load('ABC') == (None, None)
+    store.fit('ABC', df, fingerprint=data_fingerprint(df))
+    store.fit('XYZ', df, fingerprint=data_fingerprint(df))
+    assert inits == [None] * 4
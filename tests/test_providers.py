@@ -0,0 +1,101 @@
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+import pytest
+import requests
+from app.data.providers import (AlphaVantageProvider, Provider, ProviderChain, ProviderError,
+                                TokenBucket)
+
+def _daily_series(days):
+    today = datetime.now().date()
+    return {str(today - timedelta(days=i)): {'1. open': '10.0', '2. high': '11.0', '3. low': '9.0',
+                                             '4. close': str(10.0 + i), '5. volume': '1000'}
+            for i in range(days)}
+
+@pytest.fixture
+def stub_server():
+    """Local Alpha Vantage stand-in: replays queued (status, body) replies, then serves bars."""
+    state = {'requests': [], 'replies': []}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state['requests'].append(parse_qs(urlparse(self.path).query))
+            status, body = state['replies'].pop(0) if state['replies'] else (
+                200, {'Time Series (Daily)': _daily_series(10)})
+            # Simulate upstream latency so concurrent callers overlap
+            time.sleep(0.05)
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.end_headers()
+            self.wfile.write(json.dumps(body).encode())
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state['url'] = f"http://127.0.0.1:{server.server_port}/query"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+def _provider(stub, rate_per_minute=6000):
+    return AlphaVantageProvider('demo', stub['url'], rate_per_minute, session=requests.Session())
+
+def test_alpha_vantage_retries_and_picks_output_size(stub_server, monkeypatch):
+    monkeypatch.setattr('app.config.Config.HTTP_BACKOFF', 0.01)
+    stub_server['replies'] += [(429, {}), (503, {})]
+    provider = _provider(stub_server)
+
+    recent = provider.fetch('ibm', str((datetime.now() - timedelta(days=5)).date()))
+    assert len(stub_server['requests']) == 3
+    assert stub_server['requests'][-1]['outputsize'] == ['compact']
+    assert list(recent.columns) == ['open', 'high', 'low', 'close', 'volume']
+    assert recent.index.is_monotonic_increasing and len(recent) == 6
+
+    provider.fetch('ibm', '2000-01-01')
+    assert stub_server['requests'][-1]['outputsize'] == ['full']
+
+    # A throttling note arrives as HTTP 200 and must not look like data
+    stub_server['replies'].append((200, {'Note': 'API call frequency exceeded'}))
+    with pytest.raises(ProviderError, match='frequency'):
+        provider.fetch('ibm', '2000-01-01')
+
+def test_token_bucket_limits_request_rate():
+    bucket = TokenBucket(rate=20, capacity=1)
+    started = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    # One token is available at once, the other four refill at 20 per second
+    assert time.monotonic() - started >= 0.18
+
+def test_chain_coalesces_concurrent_fetches_and_falls_through(stub_server):
+    class Broken(Provider):
+        name = 'broken'
+        def fetch(self, ticker, start, interval='1d'):
+            raise ProviderError('down')
+
+    chain = ProviderChain([Broken(), _provider(stub_server)])
+    results = [None] * 10
+    barrier = threading.Barrier(len(results))
+    def worker(i):
+        barrier.wait()
+        results[i] = chain.fetch('IBM', '2000-01-01')
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(results))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(stub_server['requests']) == 1
+    assert all(df is results[0] for df in results)
+    assert isinstance(results[0], pd.DataFrame) and len(results[0]) == 10
+
+    with pytest.raises(ProviderError, match='broken: down'):
+        ProviderChain([Broken()]).fetch('IBM', '2000-01-01')
@@ -0,0 +1,32 @@
+import re
+import numpy as np
+import pandas as pd
+import pytest
+from app.reports import pdf_report
+from app.web.routes import report_context
+
+def _context(ticker, seed):
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range('2021-01-04', periods=600, freq='B', name='date')
+    close = 100 * np.cumprod(1 + rng.normal(0, 0.01, 600))
+    df = pd.DataFrame({'close': close, 'high': close * 1.01, 'low': close * 0.99,
+                       'volume': rng.integers(1e5, 1e6, 600)}, index=idx)
+    future = pd.date_range(idx[-1] + pd.offsets.BDay(), periods=10, freq='B', name='ds')
+    forecast = pd.DataFrame({'yhat': close[-1], 'yhat_lower': close[-1] - 5,
+                             'yhat_upper': close[-1] + 5}, index=future)
+    return report_context(ticker, 10, df, forecast)
+
+def test_native_backend_writes_every_report_in_one_pdf(tmp_path):
+    out = tmp_path / 'bulk.pdf'
+    pdf_report.build_pdfs([_context('AAA', 1), _context('BBB', 2)], out, backend='matplotlib')
+    data = out.read_bytes()
+    assert data.startswith(b'%PDF-')
+    assert len(re.findall(rb'/Type\s*/Page[^s]', data)) == 4
+
+    single = tmp_path / 'one.pdf'
+    pdf_report.build_pdf(_context('AAA', 1), single, backend='matplotlib')
+    assert len(re.findall(rb'/Type\s*/Page[^s]', single.read_bytes())) == 2
+    with pytest.raises(ValueError):
+        pdf_report.build_pdf(_context('AAA', 1), single, backend='latex')
+    # The Jinja environment is built once and caches the compiled template
+    assert pdf_report.env.get_template('report.html') is pdf_report.env.get_template('report.html')
@@ -0,0 +1,56 @@
+import time
+import numpy as np
+import pandas as pd
+from app.data.resample import base_interval, derive_bars, future_index, resample_ohlcv
+from app.data.store import PriceStore
+
+AGG = {'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last', 'volume': 'sum'}
+
+def _session_bars(days=10, seed=0):
+    """5-minute bars of regular New York sessions, 9:30 to 16:00"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range('2024-03-04', periods=days)
+    idx = pd.DatetimeIndex(np.concatenate([
+        pd.date_range(d + pd.Timedelta(hours=9, minutes=30), periods=78, freq='5min').values for d in dates]))
+    idx = idx.tz_localize('America/New_York').rename('date')
+    close = 100 + np.cumsum(rng.normal(0, 0.1, len(idx)))
+    return pd.DataFrame({'open': close + rng.normal(0, 0.05, len(idx)), 'high': close + 0.2,
+                         'low': close - 0.2, 'close': close,
+                         'volume': rng.integers(1, 1000, len(idx))}, index=idx)
+
+def test_rollups_match_pandas_resample():
+    df = _session_bars()
+    # Hourly buckets start at the session open, across the DST change on 2024-03-10
+    hourly = resample_ohlcv(df, '1h')
+    expected = df.resample('1h', offset='30min').agg(AGG).dropna(subset=['close'])
+    pd.testing.assert_frame_equal(hourly, expected, check_freq=False, check_dtype=False, check_names=False)
+    assert hourly.index[0] == pd.Timestamp('2024-03-04 09:30', tz='America/New_York')
+    daily = resample_ohlcv(df, '1d')
+    assert len(daily) == 10 and daily['volume'].sum() == df['volume'].sum()
+    weekly = resample_ohlcv(daily, '1wk')
+    assert list(weekly.index.day_name()) == ['Monday', 'Monday']
+    assert weekly['high'].iloc[0] == df['high'].iloc[:5 * 78].max()
+    assert base_interval('1h') == '5m' and base_interval('1wk') == '1d' and base_interval('7m') == '7m'
+
+def test_derived_bars_update_incrementally(tmp_path):
+    store = PriceStore(tmp_path)
+    df = _session_bars(days=6)
+    store.write('XYZ', '5m', df.iloc[:-40], start='2024-03-04', fetched_at=time.time())
+    first = derive_bars(store, 'XYZ', '1h', '5m')
+    assert store.read_meta('XYZ', '1h')['source'] == '5m'
+    # New base bars only rebuild the last day's buckets, with the same result as a full rollup
+    store.write('XYZ', '5m', df, start='2024-03-04', fetched_at=time.time() + 1)
+    updated = derive_bars(store, 'XYZ', '1h', '5m')
+    pd.testing.assert_frame_equal(updated, resample_ohlcv(df, '1h'), check_freq=False)
+    pd.testing.assert_frame_equal(updated.iloc[:len(first) - 1], first.iloc[:-1], check_freq=False)
+
+def test_future_index_follows_the_bar_spacing():
+    hourly = resample_ohlcv(_session_bars(days=3), '1h')
+    future = future_index(hourly.index, 9)
+    # 7 hourly bars per session, continuing on the following business days
+    assert future[0] == pd.Timestamp('2024-03-07 09:30', tz='America/New_York')
+    assert future[7] == pd.Timestamp('2024-03-08 09:30', tz='America/New_York')
+    daily = pd.bdate_range('2024-01-01', '2024-03-08')
+    assert future_index(daily, 2)[0] == pd.Timestamp('2024-03-11')
+    weekly = pd.date_range('2024-01-01', periods=10, freq='7D')
+    assert future_index(weekly, 1)[0] == weekly[-1] + pd.Timedelta(weeks=1)
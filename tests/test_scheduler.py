@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+import app.data
+from app.cache import ResultCache
+from app.models import service
+from app.scheduler import Scheduler, parse_watchlist
+from app.web import routes
+
+def test_parse_watchlist_and_next_run(tmp_path):
+    assert parse_watchlist("msft, AAPL:10 # core\nnvda:5 msft:3\n\n") == \
+        [('AAPL', 10), ('NVDA', 5), ('MSFT', 3)]
+    scheduler = Scheduler(tmp_path / 's.sqlite', [], run_at='16:30')
+    tz = ZoneInfo('America/New_York')
+    friday_noon = datetime(2024, 3, 8, 12, 0, tzinfo=tz)
+    assert scheduler.next_run(friday_noon) == datetime(2024, 3, 8, 16, 30, tzinfo=tz)
+    # After Friday's close the next run is Monday, across the DST change
+    monday = scheduler.next_run(datetime(2024, 3, 8, 17, 0, tzinfo=tz))
+    assert (monday.date().isoformat(), monday.hour, monday.utcoffset().total_seconds()) == \
+        ('2024-03-11', 16, -4 * 3600)
+
+def test_run_once_warms_caches_in_priority_order_and_records_failures(tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path / 'f.sqlite')
+    monkeypatch.setattr(service, 'forecast_cache', cache)
+    monkeypatch.setattr(routes, 'forecast_cache', cache)
+    idx = pd.date_range('2022-01-03', periods=300, freq='B', name='date')
+    frames = {t: pd.DataFrame({'close': np.linspace(50, 60 + i, 300)}, index=idx) for i, t in enumerate('AB')}
+    fetched = []
+    def fetch(ticker, **kwargs):
+        fetched.append(ticker)
+        if ticker not in frames:
+            raise ValueError(f"No data for {ticker!r}")
+        return frames[ticker]
+    monkeypatch.setattr(app.data, 'fetch_price_history', fetch)
+
+    scheduler = Scheduler(tmp_path / 's.sqlite', parse_watchlist("A B:2 BAD:1"), horizons=[5, 10],
+                          models=['linear'])
+    with ThreadPoolExecutor(1) as pool:
+        summary = scheduler.run_once(executor=pool)
+    assert fetched == ['B', 'BAD', 'A']
+    assert summary['failed'] == ['BAD'] and summary['tickers'] == 3
+
+    forecast = service.get_forecast('A', frames['A'], 10, 'linear')
+    assert cache.get(routes.chart_key('A', frames['A'], forecast)) is not None
+    assert len(cache.get(routes.chart_key('B', frames['B'], service.get_forecast('B', frames['B'], 5, 'linear')))) > 0
+    run, = scheduler.history()
+    assert (run['tickers'], run['failed']) == (3, 1) and run['seconds'] > 0
+    assert [(f['ticker'], f['stage']) for f in run['failures']] == [('BAD', 'prices')]
@@ -0,0 +1,122 @@
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from app.data.indicators import RATINGS
+from app.data.screener import Screener
+from app.data.store import PriceStore
+from app.data.streaming import refresh_state
+from app.web import routes
+from app.web.routes import calculate_indicators
+
+def _store(tmp_path, n=12):
+    store = PriceStore(tmp_path)
+    rng = np.random.default_rng(0)
+    idx = pd.date_range('2022-01-03', periods=400, freq='B', name='date')
+    for i in range(n):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 400)))
+        df = pd.DataFrame({'close': close, 'high': close * 1.01, 'low': close * 0.99,
+                           'volume': rng.integers(1e5, 1e6, 400)}, index=idx)
+        if i == 0:
+            df = df[['close']]
+        store.write(f"T{i}", '1d', df.iloc[i * 10:], start='2000-01-01', fetched_at=time.time())
+    return store
+
+def test_screener_rows_match_dashboard_and_answer_queries(tmp_path):
+    store = _store(tmp_path)
+    screener = Screener(store)
+    assert screener.refresh() == 12
+    rows = {r['ticker']: r for r in screener.query()['results']}
+    for ticker in ('T0', 'T5'):
+        stats, change = calculate_indicators(store.read(ticker, '1d'))
+        row = rows[ticker]
+        assert row['rating'] == stats['rating'] and row['buy_percent'] == stats['buy_signals']
+        assert f"{row['rsi_14']:.2f}" == stats['rsi'] and row['bb_signal'] == stats['bb_indicator']
+        assert row['change_pct'] == pytest.approx(change)
+
+    result = screener.query([('rsi_14', '<', 60), ('rating', 'in', ['Buy', 'strong buy'])],
+                            sort='volatility_30d', descending=True, columns=['rsi_14', 'volatility_30d'])
+    expected = sorted((r for r in rows.values() if r['rsi_14'] < 60 and r['rating'] in RATINGS[3:]),
+                      key=lambda r: -r['volatility_30d'])
+    assert [r['ticker'] for r in result['results']] == [r['ticker'] for r in expected]
+    assert result['count'] == len(expected) and result['total'] == 12
+    assert expected and set(result['results'][0]) == {'ticker', 'rsi_14', 'volatility_30d'}
+    assert len(screener.query(sort='rsi_14', limit=3)['results']) == 3
+    with pytest.raises(ValueError):
+        screener.query([('rating', '=', 'Maybe')])
+    with pytest.raises(ValueError):
+        screener.query(sort='nope')
+
+def test_screener_refreshes_only_changed_tickers(tmp_path):
+    store = _store(tmp_path, n=4)
+    screener = Screener(store, refresh_seconds=3600)
+    screener.maybe_refresh()
+    before = {r['ticker']: r for r in screener.query()['results']}
+    assert screener.refresh() == 0
+
+    time.sleep(0.01)
+    df = store.read('T2', '1d')
+    store.write('T2', '1d', df.iloc[:-5], start='2000-01-01', fetched_at=time.time())
+    (tmp_path / 'T3_1d.npy').unlink()
+    assert screener.refresh() == 1
+    after = {r['ticker']: r for r in screener.query()['results']}
+    assert set(after) == {'T0', 'T1', 'T2'}
+    assert after['T1'] == before['T1'] and after['T2']['close'] == df['close'].iloc[-6]
+
+def test_saved_indicator_state_gives_the_same_rows_and_stats(tmp_path, monkeypatch):
+    store = _store(tmp_path, n=4)
+    screener = Screener(store)
+    screener.refresh()
+    batch = {r['ticker']: r for r in screener.query()['results']}
+
+    for ticker in batch:
+        refresh_state(store, ticker, '1d', store.read(ticker, '1d'))
+    # Up-to-date states mean no bars are read
+    monkeypatch.setattr(store, 'read_columns', lambda *args, **kwargs: pytest.fail('bars read'))
+    from_state = Screener(store)
+    assert from_state.refresh() == 4
+    for row in from_state.query()['results']:
+        expected = batch[row['ticker']]
+        for name, value in row.items():
+            assert value == (pytest.approx(expected[name], rel=1e-8, nan_ok=True)
+                             if isinstance(value, float) else expected[name]), name
+
+    monkeypatch.setattr(routes, 'price_store', store)
+    for ticker in ('T0', 'T1'):
+        df = store.read(ticker, '1d')
+        (stats, change), (expected, expected_change) = routes.indicator_stats(ticker, df), calculate_indicators(df)
+        assert stats.pop('rsi_val') == pytest.approx(expected.pop('rsi_val'))
+        assert stats == expected and change == pytest.approx(expected_change)
+
+def test_screener_skips_stale_state_and_picks_up_new_state(tmp_path):
+    store = _store(tmp_path, n=2)
+    df = store.read('T1', '1d')
+    refresh_state(store, 'T1', '1d', df)
+    # New bars stored but the state not updated with them
+    revised = df.copy()
+    revised.iloc[-1, revised.columns.get_loc('close')] *= 1.05
+    store.write('T1', '1d', revised, start='2000-01-01', fetched_at=time.time())
+    screener = Screener(store)
+    screener.refresh()
+    row = next(r for r in screener.query()['results'] if r['ticker'] == 'T1')
+    assert row['close'] == pytest.approx(revised['close'].iloc[-1])
+
+    time.sleep(0.01)
+    refresh_state(store, 'T1', '1d', revised)
+    assert screener.refresh() == 1
+
+def test_screener_annualises_volatility_for_its_interval(tmp_path):
+    store = PriceStore(tmp_path)
+    rng = np.random.default_rng(9)
+    idx = pd.date_range('2015-01-05', periods=200, freq='W-MON', name='date')
+    for ticker in ('W0', 'W1'):
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.03, 200)))
+        store.write(ticker, '1wk', pd.DataFrame({'close': close}, index=idx), start='2000-01-01',
+                    fetched_at=time.time())
+    # One row from saved state, one computed from the bars
+    refresh_state(store, 'W0', '1wk', store.read('W0', '1wk'), periods_per_year=52)
+    screener = Screener(store, interval='1wk')
+    screener.refresh()
+    for row in screener.query()['results']:
+        stats, _ = calculate_indicators(store.read(row['ticker'], '1wk'), '1wk')
+        assert f"{row['volatility_30d']:.2f}%" == stats['volatility_30d']
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+from app.models.simulation import band_records, log_returns, simulate
+
+def _history(n=400, seed=0):
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range('2022-01-03', periods=n, freq='B', name='date')
+    return pd.DataFrame({'close': 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.012, n)))}, index=idx)
+
+def test_gbm_matches_lognormal_and_ignores_chunking():
+    df = _history()
+    r = log_returns(df['close'], 252)
+    result = simulate(df, horizon=20, n_paths=40000, seed=7)
+    again = simulate(df, horizon=20, n_paths=40000, seed=7, chunk_bytes=20 * 8 * 999)
+    pd.testing.assert_frame_equal(result['bands'], again['bands'])
+    assert result['var'] == again['var']
+
+    last = df['close'].iloc[-1]
+    expected_median = last * np.exp(r.mean() * 20)
+    assert abs(result['bands']['p50'].iloc[-1] / expected_median - 1) < 0.005
+    assert result['bands'].index[0] == df.index[-1] + pd.offsets.BDay()
+    # Bands widen with the horizon and are ordered across percentiles
+    spread = result['bands']['p95'] - result['bands']['p5']
+    assert spread.is_monotonic_increasing
+    assert (result['bands'].diff(axis=1).iloc[:, 1:] > 0).all().all()
+    assert 0 < result['var']['0.95']['price'] < result['var']['0.99']['price'] <= result['cvar']['0.99']['price']
+
+def test_bootstrap_only_replays_observed_returns():
+    df = _history(seed=1)
+    r = log_returns(df['close'], 100)
+    result = simulate(df, horizon=1, n_paths=5000, method='bootstrap', window=100, seed=3)
+    last = df['close'].iloc[-1]
+    low, high = result['bands']['p5'].iloc[0], result['bands']['p95'].iloc[0]
+    assert last * np.exp(r.min()) <= low <= high <= last * np.exp(r.max()) * (1 + 1e-6)
+    rows = band_records(result['bands'])
+    assert rows[0]['ds'] == str((df.index[-1] + pd.offsets.BDay()).date()) and set(rows[0]) >= {'p5', 'p95'}
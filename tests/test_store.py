@@ -0,0 +1,67 @@
+import pytest
+import numpy as np
+import pandas as pd
+from app.data.store import PriceStore
+
+def _bars(start, periods, scale=1.0):
+    idx = pd.date_range(start, periods=periods, freq='B', name='date')
+    close = np.linspace(100, 110, periods) * scale
+    return pd.DataFrame({'close': close, 'volume': np.arange(periods, dtype='int64')}, index=idx)
+
+def test_sync_appends_only_new_bars(tmp_path):
+    history = _bars('2024-01-01', 60)
+    calls = []
+    def download(ticker, start, interval):
+        calls.append(start)
+        return history[history.index >= pd.Timestamp(start)]
+
+    store = PriceStore(tmp_path)
+    first = store.sync('AAPL', '2024-01-01', '1d', download, max_age=0)
+    assert len(first) == 60 and calls == ['2024-01-01']
+
+    # A few new bars arrive: only the tail should be requested
+    history = pd.concat([history, _bars('2024-03-25', 5).assign(close=120.0)])
+    history = history[~history.index.duplicated(keep='last')]
+    df = store.sync('AAPL', '2024-01-01', '1d', download, max_age=0)
+    assert calls[-1] == first.index[-2].strftime('%Y-%m-%d')
+    assert df.index.equals(history.index)
+    assert df['volume'].dtype == np.int64
+    pd.testing.assert_frame_equal(store.read('AAPL', '1d'), history, check_freq=False)
+
+def test_sync_respects_max_age_and_readjustment(tmp_path):
+    history = _bars('2024-01-01', 30)
+    calls = []
+    def download(ticker, start, interval):
+        calls.append(start)
+        return history[history.index >= pd.Timestamp(start)]
+
+    store = PriceStore(tmp_path)
+    store.sync('MSFT', '2024-01-01', '1d', download, max_age=3600)
+    store.sync('MSFT', '2024-01-15', '1d', download, max_age=3600)
+    assert len(calls) == 1
+
+    # A split rescales the whole adjusted history: reload everything
+    history = _bars('2024-01-01', 31, scale=0.5)
+    df = store.sync('MSFT', '2024-01-01', '1d', download, max_age=0)
+    assert calls[-1] == '2024-01-01'
+    assert np.allclose(df['close'].to_numpy(), history['close'].to_numpy())
+
+def test_load_bars_reads_only_the_lookback_of_fresh_bars(tmp_path, monkeypatch):
+    from app.data import loader
+    store = PriceStore(tmp_path)
+    monkeypatch.setattr(loader, 'price_store', store)
+    history = _bars('2024-01-01', 60)
+    def download(ticker, start, interval):
+        return history[history.index >= pd.Timestamp(start)]
+    full = loader.load_bars('AAPL', '2024-01-01', '1d', download)
+    assert len(full) == 60
+
+    reads = []
+    read = store.read
+    monkeypatch.setattr(store, 'read', lambda *args, **kw: reads.append(kw.get('tail')) or read(*args, **kw))
+    monkeypatch.setattr(store, 'sync', lambda *args, **kw: pytest.fail("fresh bars were synced"))
+    tail = loader.load_bars('AAPL', '2024-01-01', '1d', download, lookback=10)
+    pd.testing.assert_frame_equal(tail, full.iloc[-10:], check_freq=False)
+    assert reads == [10]
+    weekly = loader.load_bars('AAPL', '2024-01-01', '1wk', download, lookback=3)
+    assert len(weekly) == 3 and weekly.index[-1].day_name() == 'Monday'
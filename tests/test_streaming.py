@@ -0,0 +1,72 @@
+import json
+import numpy as np
+import pandas as pd
+from app.data.indicators import compute_indicators
+from app.data.store import PriceStore
+from app.data.streaming import IndicatorState, refresh_state, stored_state
+
+def _bars(n, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.cumprod(1 + rng.normal(0.0005, 0.015, n))
+    idx = pd.date_range('2020-01-01', periods=n, freq='B', name='date')
+    return pd.DataFrame({'close': close, 'high': close * rng.uniform(1.0, 1.03, n),
+                         'low': close * rng.uniform(0.97, 1.0, n),
+                         'volume': rng.integers(1e5, 1e7, n)}, index=idx)
+
+def _assert_matches_batch(latest, df):
+    ind = compute_indicators(df['close'].to_numpy(), high=df.get('high'), low=df.get('low'),
+                             volume=df.get('volume'))
+    for name, values in ind.items():
+        np.testing.assert_allclose(latest[name], values[-1], rtol=1e-9, atol=1e-9, err_msg=name)
+
+def test_streaming_matches_batch_bar_by_bar():
+    df = _bars(400)
+    state = IndicatorState()
+    for i in range(len(df)):
+        row = df.iloc[i]
+        latest = state.update(row['close'], row['high'], row['low'], row['volume'], date=df.index[i])
+        if i in (0, 13, 15, 30, 49, 399):
+            _assert_matches_batch(latest, df.iloc[:i + 1])
+
+    close_only = IndicatorState(has_range=False, has_volume=False)
+    close_only.update_many(df[['close']])
+    _assert_matches_batch(close_only.latest, df[['close']])
+
+def test_state_round_trips_and_resumes_from_store(tmp_path):
+    df = _bars(300, seed=11)
+    state = IndicatorState()
+    state.update_many(df.iloc[:250])
+    restored = IndicatorState.from_dict(json.loads(json.dumps(state.to_dict())))
+    restored.update_many(df.iloc[250:])
+    _assert_matches_batch(restored.latest, df)
+
+    store = PriceStore(tmp_path)
+    refresh_state(store, 'AAPL', '1d', df.iloc[:280])
+    resumed = refresh_state(store, 'AAPL', '1d', df)
+    assert resumed.bars == 300
+    _assert_matches_batch(resumed.latest, df)
+
+def test_revised_last_bar_is_applied_without_a_rebuild(tmp_path, monkeypatch):
+    df = _bars(300, seed=3)
+    store = PriceStore(tmp_path)
+    refresh_state(store, 'AAPL', '1d', df)
+
+    updates = []
+    update = IndicatorState.update
+    monkeypatch.setattr(IndicatorState, 'update', lambda self, *args, **kwargs:
+                        updates.append(1) or update(self, *args, **kwargs))
+    revised = df.copy()
+    revised.iloc[-1, revised.columns.get_loc('close')] *= 1.02
+    state = refresh_state(store, 'AAPL', '1d', revised)
+    assert len(updates) == 1
+    _assert_matches_batch(state.latest, revised)
+    # The open bar settles and a new one opens: two updates
+    grown = pd.concat([revised, _bars(301, seed=3).iloc[-1:].set_axis(
+        [revised.index[-1] + pd.offsets.BDay()])])
+    _assert_matches_batch(refresh_state(store, 'AAPL', '1d', grown).latest, grown)
+    assert len(updates) == 3
+    refresh_state(store, 'AAPL', '1d', grown)
+    assert len(updates) == 3
+
+    assert stored_state(store, 'AAPL', '1d', grown.index[-1], grown['close'].iloc[-1]) is not None
+    assert stored_state(store, 'AAPL', '1d', grown.index[-1], grown['close'].iloc[-1] * 1.01) is None
@@ -0,0 +1,23 @@
+import numpy as np
+from app.models.windows import WindowDataset, sliding_windows
+
+def test_sliding_windows_are_views_matching_the_loop():
+    values = np.arange(20, dtype=np.float32)
+    X, y = sliding_windows(values, 5)
+    assert np.shares_memory(X, values) and np.shares_memory(y, values)
+    expected = np.array([values[i - 5:i] for i in range(5, 20)])
+    np.testing.assert_array_equal(X, expected)
+    np.testing.assert_array_equal(y, values[5:])
+    assert sliding_windows(values[:5], 5)[0].shape == (0, 5)
+
+def test_dataset_streams_every_window_once_per_epoch():
+    series = [np.arange(10, dtype=np.float32), 100 + np.arange(7, dtype=np.float32)]
+    ds = WindowDataset(series, seq_len=3, batch_size=4, seed=0)
+    assert len(ds) == 3  # 7 + 4 windows
+    pairs = set()
+    for i in range(len(ds)):
+        X, y = ds[i]
+        assert X.shape[1:] == (3, 1) and X.dtype == np.float32
+        np.testing.assert_array_equal(X[:, -1, 0] + 1, y)
+        pairs.update(y.tolist())
+    assert len(pairs) == 11